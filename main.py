@@ -26,7 +26,7 @@ from src.util.position_vote import PositionVote
 if __name__ == '__main__':
     CSV_Writer.init_writer()
     # set general parameters of Ordinos
-    key_generator = lambda: PaillierABB.gen_trustees(64, 2, 2, SubLinearProtocolSuite) #to run with Paillier
+    key_generator = lambda: PaillierABB.load_trustees(64, 2, 2, SubLinearProtocolSuite) #to run with Paillier, all elections share the stored key and trustees
     
     setup_logging(logging.INFO)
     n_cand = 5
@@ -1,9 +1,10 @@
 import abc
 import logging
+import weakref
+import zlib
 from math import ceil
 from random import randrange
-
-import numpy as np
+from threading import Lock, local
 
 from gmpy2 import random_state
 from src.election.trustee import init_trustees
@@ -15,6 +16,8 @@ log = logging.getLogger(__name__)
 class ABB():
 
     __metaclass__ = abc.ABCMeta
+    trustees_cache = {}
+    trustees_lock = Lock()
 
     def __init__(self, prot_suite, pk, num_shares, threshold, sk):
         self.op_logger = ABBLogger()
@@ -24,13 +27,70 @@ class ABB():
         self.threshold = threshold
         self.sk = sk
         self.rand = random_state(randrange(123456789))
+        self.ctx_id = ContextRegistry.register(self)
 
         self.enc_zero = self.enc_no_r(0)
         self.enc_one = self.enc_no_r(1)
 
+    def __reduce__(self):
+        """abbs are pickled (e.g. inside protocols sent to trustee processes) as reference
+        to the abb of their context in the receiving process"""
+        return (ContextRegistry.get_abb, (ContextRegistry.get_key_id(self.ctx_id),))
+
     @classmethod
-    def gen_trustees(cls, bits, num_shares, threshold, prot_suite_cls):
-        pk, sks = cls.keygen(bits, num_shares, threshold)
+    def gen_trustees(cls, bits, num_shares, threshold, prot_suite_cls, preprocess_bits=None, processes=False):
+        """
+        generates keys and trustees.
+        preprocess_bits: bit widths of comparisons, whose preprocessing data is generated
+        with the dealer context during the setup
+        processes: every trustee runs in its own process (see create_trustees)
+        """
+        pk, sks, dealer = cls.dealer_keygen(bits, num_shares, threshold)
+        if preprocess_bits:
+            setup_abb = cls(None, pk, num_shares, threshold, None)
+            setup_abb.set_dealer(dealer)
+            prot_suite_cls().preprocess(setup_abb, preprocess_bits)
+        if dealer is not None:
+            # the factorization must not be known while the trustees are online
+            dealer.wipe()
+        return cls.create_trustees(pk, sks, num_shares, threshold, prot_suite_cls, processes)
+
+    @classmethod
+    def load_trustees(cls, bits, num_shares, threshold, prot_suite_cls, processes=False):
+        """
+        trustees with the stored key of the parameters (see load_key), created once per process.
+        All callers share the trustees, the operation counters are reset on every call.
+        The trustees must not run several evaluations at the same time.
+        """
+        key = (cls.__name__, bits, num_shares, threshold, prot_suite_cls, processes)
+        with cls.trustees_lock:
+            trustees = cls.trustees_cache.get(key)
+            if trustees is None:
+                pk, sks = cls.load_key(bits, num_shares, threshold)
+                trustees = cls.create_trustees(pk, sks, num_shares, threshold, prot_suite_cls, processes)
+                cls.trustees_cache[key] = trustees
+        for trustee in trustees:
+            trustee.abb.op_logger.reset()
+        return trustees
+
+    @classmethod
+    def load_key(cls, bits, num_shares, threshold):
+        """
+        returns a stored key (pk, sks) of the parameters, abbs without key storage generate a new one
+        """
+        return cls.keygen(bits, num_shares, threshold)
+
+    @classmethod
+    def create_trustees(cls, pk, sks, num_shares, threshold, prot_suite_cls, processes=False):
+        """
+        creates connected trustees with the given key.
+        With processes every trustee runs its protocols in its own process (see ProcessTrustee),
+        otherwise all trustees are threads of this process.
+        """
+        if processes:
+            # imported here, so the crypto layer doesn't depend on the trustee processes
+            from src.election.process_trustee import init_process_trustees
+            return init_process_trustees(cls, prot_suite_cls, pk, sks, num_shares, threshold)
         prot_suits = [prot_suite_cls() for _ in range(num_shares)]
         abbs = [cls(prot_suits[i], pk, num_shares, threshold, sks[i]) for i in range(num_shares)]
         trustees = init_trustees(abbs, [i for i in range(num_shares)])
@@ -39,6 +99,22 @@ class ABB():
             prot_suit.set_connections(trustees[i].connections)
         return trustees
 
+    @classmethod
+    def dealer_keygen(cls, bits, num_shares, threshold):
+        """
+        like keygen, but additionally returns a dealer context (None if not supported)
+        """
+        pk, sks = cls.keygen(bits, num_shares, threshold)
+        return pk, sks, None
+
+    def get_context_key(self):
+        """ciphertexts of abbs with the same context key are interchangeable"""
+        return type(self).__name__
+
+    def set_dealer(self, dealer):
+        """abbs without a dealer context ignore it"""
+        pass
+
     def create_local_abb(self):
         """
         """
@@ -46,21 +122,32 @@ class ABB():
 
     def get_bits_for_size(self, biggest_possible_number):
         """
+        returns the bit width of comparisons of values from 0 to biggest_possible_number,
+        comparisons support any width, so it isn't rounded up
         """
-        used_bits = 1
-        if biggest_possible_number > 0:
-            bits = ceil(np.log2(biggest_possible_number))
-
-            # allowed_bit_numbers = [2,3,4,5,6,8,10,12,16,20,24,32,40,48,64] # 111222444888
-            allowed_bit_numbers = [2, 4, 8, 16, 32, 64] # 111222444888
-            allowed_bit_numbers.reverse()
-            for allowed_bit in allowed_bit_numbers:
-                if bits > allowed_bit:
-                    break
-                used_bits = allowed_bit
+        used_bits = max(1, int(ceil(biggest_possible_number)).bit_length())
         log.debug("Use bits_int=" + str(used_bits))
         return used_bits
 
+    def linear_combination(self, ciphers, weights, const=0):
+        """returns an encryption of sum(weights[i] * ciphers[i]) + const with plaintext weights"""
+        result = self.enc_no_r(const)
+        for cipher, weight in zip(ciphers, weights):
+            result = result + cipher * weight
+        return result
+
+    def mul_many(self, xs, ys):
+        """returns encryptions of x * y for independent factors, abbs without batching multiply them one by one"""
+        return [x * y for x, y in zip(xs, ys)]
+
+    def eq_many(self, pairs, bits):
+        """returns encryptions of x == y for independent pairs (x, y), abbs without batching test them one by one"""
+        return [self.eq(x, y, bits) for x, y in pairs]
+
+    def gt_many(self, pairs, bits):
+        """returns encryptions of x >= y for independent pairs (x, y), abbs without batching test them one by one"""
+        return [self.gt(x, y, bits) for x, y in pairs]
+
     def convert_to_cipher(self, val):
         if not isinstance(val, Ciphertext):
             return self.enc_no_r(val)
@@ -79,6 +166,11 @@ class ABB():
     def get_random_plaintext(self):
         pass
 
+    @abc.abstractmethod
+    def get_plaintext_bits(self):
+        """all non-negative integers with this number of bits are valid plaintexts"""
+        pass
+
     @abc.abstractmethod
     def enc_get_r(self):
         pass
@@ -95,6 +187,10 @@ class ABB():
     def dec(self, cipher):
         pass
 
+    @abc.abstractmethod
+    def dec_many(self, ciphers):
+        pass
+
     @abc.abstractmethod
     def eq(self, cipher1, cipher2, bits):
         pass
@@ -123,21 +219,117 @@ class ABB():
     def eval_mul_protocol(self, cipher1, cipher2):
         pass
 
+    @abc.abstractmethod
+    def add_values(self, vals1, vals2):
+        """elementwise addition of two lists of raw ciphertext values (used by CipherVector)"""
+        pass
+
+    @abc.abstractmethod
+    def sub_values(self, vals1, vals2):
+        pass
+
+    @abc.abstractmethod
+    def mul_const_values(self, vals, const):
+        pass
+
+    @abc.abstractmethod
+    def sum_values(self, vals):
+        """raw value of the sum of all given raw values"""
+        pass
+
+
+class ContextRegistry():
+    """
+    Maps the small context id stored in every ciphertext to the abb evaluating its operations.
+    Abbs with the same context key (e.g. all trustees of a key) share the lower 32 bits of their ids,
+    the upper bits number the abbs of a key, so a ciphertext knows the abb which created it.
+    A thread can activate its own abb for a context key (e.g. the trustee running a protocol),
+    otherwise the abb which created the ciphertext is used, or the first one of the key, if it is gone
+    (e.g. for ciphertexts from another process).
+    Abbs are only referenced weakly. The key ids are the same in every process.
+    """
+
+    KEY_MASK = 0xFFFFFFFF
+
+    lock = Lock()
+    abbs = weakref.WeakValueDictionary()
+    # key id -> weak references to all registered abbs of the key, in the order of registration
+    key_abbs = {}
+    abb_counts = {}
+    context_keys = {}
+    local = local()
+
+    @classmethod
+    def register(cls, abb):
+        key = repr(abb.get_context_key())
+        key_id = zlib.crc32(key.encode())
+        with cls.lock:
+            if cls.context_keys.setdefault(key_id, key) != key:
+                raise ValueError('Context id {} is already used by another key.'.format(key_id))
+            count = cls.abb_counts.get(key_id, 0)
+            cls.abb_counts[key_id] = count + 1
+            ctx_id = (count << 32) | key_id
+            refs = [ref for ref in cls.key_abbs.get(key_id, []) if ref() is not None]
+            refs.append(weakref.ref(abb))
+            cls.key_abbs[key_id] = refs
+            cls.abbs[ctx_id] = abb
+        return ctx_id
+
+    @classmethod
+    def get_key_id(cls, ctx_id):
+        return ctx_id & cls.KEY_MASK
+
+    @classmethod
+    def same_context(cls, ctx_id1, ctx_id2):
+        """ true, if ciphertexts of the two contexts are interchangeable """
+        return cls.get_key_id(ctx_id1) == cls.get_key_id(ctx_id2)
+
+    @classmethod
+    def activate(cls, abb):
+        """ operations on ciphertexts of the abb's context key in the current thread are evaluated by abb """
+        active = getattr(cls.local, 'active', None)
+        if active is None:
+            active = cls.local.active = {}
+        active[cls.get_key_id(abb.ctx_id)] = abb
+
+    @classmethod
+    def get_abb(cls, ctx_id):
+        key_id = cls.get_key_id(ctx_id)
+        active = getattr(cls.local, 'active', None)
+        if active is not None:
+            abb = active.get(key_id)
+            if abb is not None:
+                return abb
+        abb = cls.abbs.get(ctx_id)
+        if abb is not None:
+            return abb
+        for ref in cls.key_abbs.get(key_id, []):
+            abb = ref()
+            if abb is not None:
+                return abb
+        raise KeyError('No abb of context {} is alive.'.format(ctx_id))
+
 
 class Ciphertext():
 
     __metaclass__ = abc.ABCMeta
+    # ciphertexts are stored in large numbers, so they only keep the value and a context id
+    __slots__ = ('ctx', 'val')
 
     def __init__(self, abb, val):
-        self.abb = abb
+        self.ctx = abb.ctx_id
         self.val = val
 
+    @property
+    def abb(self):
+        return ContextRegistry.get_abb(self.ctx)
+
     def __str__(self):
         return '{}'.format(self.val)
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return ContextRegistry.same_context(self.ctx, other.ctx) and self.val == other.val
         return False
 
     def __ne__(self, other):
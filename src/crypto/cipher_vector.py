@@ -0,0 +1,189 @@
+import logging
+
+from src.crypto.abb import Ciphertext, ContextRegistry
+
+log = logging.getLogger(__name__)
+
+
+class CipherVector():
+    """
+    Vector of ciphertexts of one context, stored as list of raw values.
+    Elementwise operations run in tight loops over the values (see ABB.add_values etc.),
+    ciphertext objects are only created when single elements are accessed.
+    Supports the dict methods items, keys and values with the indices as keys,
+    so it can replace the candidate dicts used by the evaluators.
+    """
+
+    __slots__ = ('ctx', 'vals')
+
+    def __init__(self, abb, vals):
+        self.ctx = abb.ctx_id
+        self.vals = vals
+
+    @classmethod
+    def zeros(cls, abb, length):
+        return cls(abb, [abb.enc_zero.val] * length)
+
+    @classmethod
+    def from_ciphers(cls, abb, ciphers):
+        """ciphers: CipherVector, list of ciphertexts or dict index -> ciphertext"""
+        if isinstance(ciphers, CipherVector):
+            return cls(abb, list(ciphers.vals))
+        if isinstance(ciphers, dict):
+            ciphers = [ciphers[i] for i in range(len(ciphers))]
+        return cls(abb, [abb.convert_to_cipher(c).val for c in ciphers])
+
+    @property
+    def abb(self):
+        return ContextRegistry.get_abb(self.ctx)
+
+    def __len__(self):
+        return len(self.vals)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return CipherVector(self.abb, self.vals[i])
+        return self.abb.init_cipher(self.vals[i])
+
+    def __setitem__(self, i, cipher):
+        self.vals[i] = self.abb.convert_to_cipher(cipher).val
+
+    def __iter__(self):
+        abb = self.abb
+        return (abb.init_cipher(val) for val in self.vals)
+
+    def __str__(self):
+        return str(self.vals)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def keys(self):
+        return range(len(self.vals))
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return list(enumerate(self))
+
+    def _other_vals(self, other):
+        if isinstance(other, CipherVector):
+            vals = other.vals
+        elif isinstance(other, Ciphertext) or not hasattr(other, '__len__'):
+            # a single ciphertext or constant is added to every element
+            vals = [self.abb.convert_to_cipher(other).val] * len(self.vals)
+        else:
+            vals = CipherVector.from_ciphers(self.abb, other).vals
+        if len(vals) != len(self.vals):
+            raise ValueError('Vectors of length {} and {} can not be combined.'.format(len(self.vals), len(vals)))
+        return vals
+
+    def __add__(self, other):
+        return CipherVector(self.abb, self.abb.add_values(self.vals, self._other_vals(other)))
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return CipherVector(self.abb, self.abb.sub_values(self.vals, self._other_vals(other)))
+
+    def __rsub__(self, other):
+        return CipherVector(self.abb, self.abb.sub_values(self._other_vals(other), self.vals))
+
+    def __mul__(self, const):
+        """multiplication with a plaintext scalar"""
+        if isinstance(const, (Ciphertext, CipherVector)):
+            raise ValueError('CipherVector only supports multiplication with plaintext scalars.')
+        return CipherVector(self.abb, self.abb.mul_const_values(self.vals, const))
+
+    def __rmul__(self, const):
+        return self.__mul__(const)
+
+    def accumulate(self, other):
+        """adds other elementwise in place"""
+        self.vals[:] = self.abb.add_values(self.vals, self._other_vals(other))
+        return self
+
+    def __iadd__(self, other):
+        return self.accumulate(other)
+
+    def sum(self):
+        """returns the encrypted sum of all elements"""
+        abb = self.abb
+        return abb.init_cipher(abb.sum_values(self.vals))
+
+
+class CipherMatrix():
+    """
+    Matrix of ciphertexts of one context, stored as list of CipherVector rows.
+    matrix[i] returns the row i (not a copy), matrix[i][j] the ciphertext of row i and column j.
+    """
+
+    __slots__ = ('ctx', 'rows')
+
+    def __init__(self, abb, rows):
+        self.ctx = abb.ctx_id
+        self.rows = rows
+
+    @classmethod
+    def zeros(cls, abb, n_rows, n_cols):
+        return cls(abb, [CipherVector.zeros(abb, n_cols) for _ in range(n_rows)])
+
+    @classmethod
+    def from_ciphers(cls, abb, rows):
+        """rows: CipherMatrix or nested lists of ciphertexts"""
+        return cls(abb, [CipherVector.from_ciphers(abb, row) for row in rows])
+
+    @property
+    def abb(self):
+        return ContextRegistry.get_abb(self.ctx)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return self.rows[i]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __str__(self):
+        return str(self.rows)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def _other_rows(self, other):
+        if len(other) != len(self.rows):
+            raise ValueError('Matrices with {} and {} rows can not be combined.'.format(len(self.rows), len(other)))
+        return other.rows if isinstance(other, CipherMatrix) else other
+
+    def __add__(self, other):
+        return CipherMatrix(self.abb, [row + other_row for row, other_row in zip(self.rows, self._other_rows(other))])
+
+    def __sub__(self, other):
+        return CipherMatrix(self.abb, [row - other_row for row, other_row in zip(self.rows, self._other_rows(other))])
+
+    def __mul__(self, const):
+        return CipherMatrix(self.abb, [row * const for row in self.rows])
+
+    def __rmul__(self, const):
+        return self.__mul__(const)
+
+    def accumulate(self, other):
+        """adds other elementwise in place"""
+        for row, other_row in zip(self.rows, self._other_rows(other)):
+            row.accumulate(other_row)
+        return self
+
+    def __iadd__(self, other):
+        return self.accumulate(other)
+
+    def row_sums(self):
+        return CipherVector(self.abb, [self.abb.sum_values(row.vals) for row in self.rows])
+
+    def col_sums(self):
+        abb = self.abb
+        n_cols = len(self.rows[0]) if len(self.rows) > 0 else 0
+        return CipherVector(abb, [abb.sum_values([row.vals[j] for row in self.rows]) for j in range(n_cols)])
@@ -0,0 +1,82 @@
+import logging
+from math import ceil
+
+from src.crypto.cipher_vector import CipherVector
+
+log = logging.getLogger(__name__)
+
+
+class PackedEncoding():
+    """
+    Packs several non-negative counters into the plaintext of one ciphertext.
+    Counter i is stored in slot i: value * 2^(i * slot_bits). Every slot has room for the counter
+    and for the masks of all parties added by the unpack protocol, so slots never carry into each other.
+    Counters that don't fit into one plaintext are spread over several ciphertexts.
+    """
+
+    # the masks of the unpack protocol are STATISTICAL_SECURITY bits longer than the counters
+    STATISTICAL_SECURITY = 40
+    # counters have 32 bits, if the maximum number of votes is unknown
+    DEFAULT_VALUE_BITS = 32
+
+    def __init__(self, n_values, max_points_per_vote, max_votes, plaintext_bits, n_parties):
+        self.n_values = n_values
+        self.max_points_per_vote = max_points_per_vote
+        self.max_votes = max_votes
+        self.max_value = max_points_per_vote * max_votes
+
+        self.value_bits = max(1, int(self.max_value).bit_length())
+        self.mask_bits = self.value_bits + self.STATISTICAL_SECURITY
+        # the sum of the counter and n_parties masks stays below 2^slot_bits
+        self.slot_bits = self.mask_bits + int(n_parties).bit_length() + 1
+        # the packed plaintext has to be smaller than the plaintext space
+        self.slots_per_cipher = (plaintext_bits - 1) // self.slot_bits
+        if self.slots_per_cipher < 1:
+            raise ValueError('A slot of {} bits does not fit into a plaintext of {} bits.'.format(self.slot_bits, plaintext_bits))
+        self.n_ciphers = ceil(n_values / self.slots_per_cipher)
+
+    @classmethod
+    def for_abb(cls, abb, n_values, max_points_per_vote, max_votes=None):
+        """encoding for the plaintext space of abb. Without max_votes, counters have DEFAULT_VALUE_BITS bits"""
+        if max_votes is None:
+            max_votes = (2**cls.DEFAULT_VALUE_BITS - 1) // max_points_per_vote
+        return cls(n_values, max_points_per_vote, max_votes, abb.get_plaintext_bits(), abb.num_shares)
+
+    def check_votes(self, n_votes):
+        """raises an error, if n_votes ballots could overflow a counter"""
+        if n_votes > self.max_votes:
+            raise ValueError('{} votes exceed the headroom of the packed counters ({} votes).'.format(n_votes, self.max_votes))
+
+    def pack(self, values):
+        """returns the plaintexts holding the given values, values have to be smaller than 2^slot_bits"""
+        if len(values) != self.n_values:
+            raise ValueError('Expected {} values, got {}.'.format(self.n_values, len(values)))
+        plains = []
+        for start in range(0, self.n_values, self.slots_per_cipher):
+            plain = 0
+            for i, value in enumerate(values[start:start + self.slots_per_cipher]):
+                if not 0 <= value < 2**self.slot_bits:
+                    raise ValueError('{} does not fit into a slot of {} bits.'.format(value, self.slot_bits))
+                plain += int(value) << (i * self.slot_bits)
+            plains.append(plain)
+        return plains
+
+    def unpack(self, plains):
+        """returns the values of the slots of the given plaintexts"""
+        values = []
+        slot_mask = 2**self.slot_bits - 1
+        for plain in plains:
+            for i in range(min(self.slots_per_cipher, self.n_values - len(values))):
+                values.append((int(plain) >> (i * self.slot_bits)) & slot_mask)
+        return values
+
+    def encrypt(self, abb, values):
+        """packed encryption of the values (one ciphertext per n_slots values)"""
+        return CipherVector(abb, [abb.enc(plain).val for plain in self.pack(values)])
+
+    def encrypt_vote(self, abb, points):
+        """packed ballot, every candidate gets at most max_points_per_vote points"""
+        for p in points:
+            if not 0 <= p <= self.max_points_per_vote:
+                raise ValueError('{} points exceed the maximum of {} points per vote.'.format(p, self.max_points_per_vote))
+        return self.encrypt(abb, points)
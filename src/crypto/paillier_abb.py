@@ -1,10 +1,14 @@
 import logging
+from os import getcwd, makedirs
+from os.path import exists, join
 from random import randint, choice
+from threading import Lock
 
 import gmpy2 as gmpy
+import yaml
 from src.crypto.abb import ABB, Ciphertext
 from src.util.primes import PrimeStorage
-from src.util.utils import eval_polynomial, ext_euclid, calc_lambda
+from src.util.utils import batch_invert, calc_lambda, eval_polynomial, ext_euclid, multi_powmod
 import numpy as np
 
 log = logging.getLogger(__name__)
@@ -12,11 +16,24 @@ log = logging.getLogger(__name__)
 
 class PaillierABB(ABB):
 
+    # lazy linear combinations with more terms are evaluated immediately
+    LAZY_TERM_LIMIT = 64
+
     @classmethod
     def keygen(cls, bits, num_shares, threshold):
         """
         generates public and private key for the threshhold variant of paillier.
         """
+        pk, key_shares, dealer = cls.dealer_keygen(bits, num_shares, threshold)
+        dealer.wipe()
+        return pk, key_shares
+
+    @classmethod
+    def dealer_keygen(cls, bits, num_shares, threshold):
+        """
+        like keygen, but additionally returns a dealer context knowing the factorization of n.
+        The dealer context has to be wiped before any trustee goes online.
+        """
         if threshold < 2:
             raise('Threshold should be at least 2, but is {}'.format(threshold))
         primes = PrimeStorage()
@@ -41,11 +58,43 @@ class PaillierABB(ABB):
         # - v, a generator of Z^*_(n^2)
         # - verification key for each decryption party
 
-        return pk, key_shares
+        return pk, key_shares, PaillierDealerContext(pk, p, q)
+
+    @classmethod
+    def load_key(cls, bits, num_shares, threshold):
+        """
+        returns the key stored in data/key, a new key is generated and stored, if there is none
+        """
+        return PaillierKeyStorage().get_threshold_key(bits, num_shares, threshold)
 
     def __init__(self, prot_suite, pk, num_shares, threshold, sk):
+        self.randomizer_pool = None
+        self.dealer = None
+        self.lazy = False
         super().__init__(prot_suite, pk, num_shares, threshold, sk)
 
+    def set_dealer(self, dealer):
+        """encrypts with the factorization of the dealer context until it is wiped"""
+        if dealer is not None and dealer.pk.n != self.pk.n:
+            raise ValueError('Dealer context belongs to another public key.')
+        self.dealer = dealer
+
+    def set_randomizer_pool(self, pool):
+        """uses precomputed randomizers of the pool, falls back to inline generation if it runs dry"""
+        if pool is not None and pool.pk.n != self.pk.n:
+            raise ValueError('Randomizer pool belongs to another public key.')
+        self.randomizer_pool = pool
+
+    def set_lazy(self, lazy):
+        """
+        In lazy mode subtractions and multiplications with scalars build linear combinations of ciphertexts,
+        which are evaluated by one multi-exponentiation as soon as the value is needed.
+        """
+        self.lazy = lazy
+
+    def get_context_key(self):
+        return (type(self).__name__, str(self.pk.n))
+
     def init_cipher(self, val):
         return PaillierCiphertext(self, val)
 
@@ -53,12 +102,14 @@ class PaillierABB(ABB):
         """returns a possible plaintext"""
         return gmpy.mpz_urandomb(self.rand, self.pk.bits) % self.pk.n
 
+    def get_plaintext_bits(self):
+        return int(self.pk.n).bit_length() - 1
+
     def enc_get_r(self, plain):
         if not isinstance(plain, (int, gmpy.mpz().__class__)):
             raise ValueError('{} is not a valid number (it is of type {}).'.format(plain, type(plain)))
-        r = self.get_r()
-        x = gmpy.powmod(r, self.pk.n, self.pk.n_sq)
-        cipher = (gmpy.powmod(self.pk.g, plain, self.pk.n_sq) * x) % self.pk.n_sq
+        r, x = self.get_randomizer()
+        cipher = (self.pk.encode(plain) * x) % self.pk.n_sq
         return PaillierCiphertext(self, cipher), r
 
     def enc(self, plain):
@@ -69,10 +120,8 @@ class PaillierABB(ABB):
     def enc_no_r(self, plain):
         if not isinstance(plain, (int, gmpy.mpz().__class__)):
             raise ValueError('{} is not a valid number (it is of type {}).'.format(plain, type(plain)))
-        r = 1
-        x = gmpy.powmod(r, self.pk.n, self.pk.n_sq)
-        cipher = (gmpy.powmod(self.pk.g, plain, self.pk.n_sq) * x) % self.pk.n_sq
-        return PaillierCiphertext(self, cipher)
+        # randomness r = 1, so r^n = 1
+        return PaillierCiphertext(self, self.pk.encode_const(plain))
 
     def dec(self, cipher):
         self.op_logger.log_dec()
@@ -85,6 +134,28 @@ class PaillierABB(ABB):
 
         return self.sk.reconstruct_plaintext(plaintext_shares)
 
+    def dec_many(self, ciphers):
+        """decrypts independent ciphertexts with a single broadcast round"""
+        ciphers = list(ciphers)
+        if len(ciphers) == 0:
+            return []
+        self.op_logger.log_dec(len(ciphers))
+        plaintext_shares = self.prot_suite.broadcast_and_receive(self.compute_plaintext_shares(ciphers))
+        return self.reconstruct_plaintexts(plaintext_shares, len(ciphers))
+
+    def compute_plaintext_shares(self, ciphers):
+        return [self.sk.compute_plaintext_share(cipher) for cipher in ciphers]
+
+    def reconstruct_plaintexts(self, plaintext_shares, n_ciphers):
+        """plaintext_shares: (party, shares) of all parties as received by broadcast_and_receive"""
+        plaintext_shares = [s[1] for s in plaintext_shares]
+
+        while len(plaintext_shares) > self.sk.threshold:
+            plaintext_shares.remove(choice(plaintext_shares))
+
+        return [self.sk.reconstruct_plaintext([party_shares[i] for party_shares in plaintext_shares])
+                for i in range(n_ciphers)]
+
     def eq(self, input1, input2, bits):
         cipher1 = self.convert_to_cipher(input1)
         cipher2 = self.convert_to_cipher(input2)
@@ -98,6 +169,43 @@ class PaillierABB(ABB):
             self.op_logger.op_done()
         return result
 
+    def mul_many(self, xs, ys):
+        """returns encryptions of x * y for independent factors, products of two ciphertexts are computed
+        by one batched multiplication protocol, products with constants locally"""
+        xs = list(xs)
+        ys = list(ys)
+        if len(xs) != len(ys):
+            raise ValueError('Got {} and {} factors.'.format(len(xs), len(ys)))
+        results = [None] * len(xs)
+        secure = []
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            if isinstance(x, PaillierCiphertext) and isinstance(y, PaillierCiphertext):
+                secure.append(i)
+            else:
+                results[i] = x * y
+        if len(secure) > 0:
+            self.op_logger.log_mul(len(secure))
+            products = self.prot_suite.mul_many([xs[i] for i in secure], [ys[i] for i in secure])
+            for i, product in zip(secure, products):
+                results[i] = product
+        return results
+
+    def eq_many(self, pairs, bits):
+        """returns encryptions of x == y for independent pairs (x, y), all tests run in the rounds of one"""
+        pairs = list(pairs)
+        if len(pairs) == 0:
+            return []
+        ciphers1 = [self.convert_to_cipher(x) for x, _ in pairs]
+        ciphers2 = [self.convert_to_cipher(y) for _, y in pairs]
+        top_level = self.op_logger.is_logging_active
+        self.op_logger.log_eq(bits, n=len(pairs))
+        if top_level:
+            self.op_logger.start_op()
+        result = self.prot_suite.eq_many(ciphers1, ciphers2, bits)
+        if top_level:
+            self.op_logger.op_done()
+        return result
+
     def gt(self, input1, input2, bits):
         cipher1 = self.convert_to_cipher(input1)
         cipher2 = self.convert_to_cipher(input2)
@@ -111,21 +219,125 @@ class PaillierABB(ABB):
             self.op_logger.op_done()
         return result
 
+    def gt_many(self, pairs, bits):
+        """returns encryptions of x >= y for independent pairs (x, y), all tests run through the recursion together"""
+        pairs = list(pairs)
+        if len(pairs) == 0:
+            return []
+        ciphers1 = [self.convert_to_cipher(x) for x, _ in pairs]
+        ciphers2 = [self.convert_to_cipher(y) for _, y in pairs]
+        top_level = self.op_logger.is_logging_active
+        self.op_logger.log_gt(bits, n=len(pairs))
+        if top_level:
+            self.op_logger.start_op()
+        result = self.prot_suite.gt_many(ciphers1, ciphers2, bits)
+        if top_level:
+            self.op_logger.op_done()
+        return result
+
     def randomize(self, cipher, r=None):
         if not r:
-            r = self.get_random_r()
-        val = (cipher.val * gmpy.powmod(r, self.pk.n, self.pk.n_sq)) % self.pk.n_sq
+            _, x = self.get_randomizer()
+        else:
+            x = gmpy.powmod(r, self.pk.n, self.pk.n_sq)
+        val = (cipher.val * x) % self.pk.n_sq
         return PaillierCiphertext(self, val)
 
+    def get_randomizer(self):
+        """returns (r, r^n mod n^2), taken from the randomizer pool if possible"""
+        if self.randomizer_pool is not None:
+            randomizer = self.randomizer_pool.pop()
+            if randomizer is not None:
+                return randomizer
+            log.debug('Randomizer pool ran dry, generate randomizer inline.')
+        if self.dealer is not None and self.dealer.is_active():
+            return self.dealer.get_randomizer()
+        r = self.get_r()
+        return r, gmpy.powmod(r, self.pk.n, self.pk.n_sq)
+
     def get_r(self):
         while True:
             r = gmpy.mpz_urandomb(self.rand, self.pk.bits)
             if 0 < r < self.pk.n and gmpy.gcd(r, self.pk.n) == 1:
                 return r
 
+    def linear_combination(self, ciphers, weights, const=0):
+        vals = []
+        cipher_weights = []
+        for cipher, weight in zip(ciphers, weights):
+            if isinstance(cipher, PaillierCiphertext):
+                vals.append(cipher.val)
+                cipher_weights.append(weight)
+            else:
+                const += cipher * weight
+        return PaillierCiphertext(self, self._eval_linear_combination(vals, cipher_weights, const))
+
+    def _eval_linear_combination(self, vals, weights, const, reduce_weights=True):
+        """
+        raw value of sum(weights[i] * vals[i]) + const. Terms with weight +-1 are multiplied directly,
+        all other terms share one multi-exponentiation and all negative terms share one inversion.
+        If reduce_weights is set, weights are reduced to (-n/2, n/2]: the plaintext stays the same,
+        but the ciphertext differs from the one of the single operations.
+        """
+        n = self.pk.n
+        n_sq = self.pk.n_sq
+        pos = gmpy.mpz(1)
+        neg = gmpy.mpz(1)
+        pos_bases, pos_exps, neg_bases, neg_exps = [], [], [], []
+        for val, weight in zip(vals, weights):
+            weight = gmpy.mpz(weight)
+            if reduce_weights:
+                weight %= n
+                if weight > n // 2:
+                    weight -= n
+            if weight == 1:
+                pos = (pos * val) % n_sq
+            elif weight == -1:
+                neg = (neg * val) % n_sq
+            elif weight > 0:
+                pos_bases.append(val)
+                pos_exps.append(weight)
+            elif weight < 0:
+                neg_bases.append(val)
+                neg_exps.append(-weight)
+        if pos_bases:
+            pos = (pos * multi_powmod(pos_bases, pos_exps, n_sq)) % n_sq
+        if neg_bases:
+            neg = (neg * multi_powmod(neg_bases, neg_exps, n_sq)) % n_sq
+        if neg != 1:
+            pos = (pos * gmpy.invert(neg, n_sq)) % n_sq
+        if const % n != 0:
+            pos = (pos * self.pk.encode_const(const)) % n_sq
+        return pos
+
+    def _lazy_combination(self, cipher1, weight1, cipher2=None, weight2=0, const=0):
+        """
+        returns weight1 * cipher1 + weight2 * cipher2 + const as lazy ciphertext.
+        Weights are not reduced, so the value equals the one of the single operations
+        (e.g. for decryption shares, which use secret exponents).
+        """
+        terms = {}
+        for cipher, weight in ((cipher1, weight1), (cipher2, weight2)):
+            if cipher is None:
+                continue
+            # terms of a lazy ciphertext are dropped once it is materialized
+            lazy_terms = cipher.terms if isinstance(cipher, LazyPaillierCiphertext) else None
+            if lazy_terms is not None:
+                for val, w in lazy_terms.items():
+                    terms[val] = terms.get(val, 0) + w * weight
+                const += cipher.const * weight
+            else:
+                terms[cipher.val] = terms.get(cipher.val, 0) + weight
+        result = LazyPaillierCiphertext(self, terms, const % self.pk.n)
+        if len(terms) > self.LAZY_TERM_LIMIT:
+            result.materialize()
+        return result
+
     def eval_add_protocol(self, cipher1, cipher2):
         if isinstance(cipher1, PaillierCiphertext):
             if isinstance(cipher2, PaillierCiphertext):
+                if is_lazy(cipher1) or is_lazy(cipher2):
+                    return self._lazy_combination(cipher1, 1, cipher2, 1)
                 return self._add_ciphertexts(cipher1, cipher2)
             else:
                 return self._add_constant(cipher1, cipher2)
@@ -139,22 +351,25 @@ class PaillierABB(ABB):
         return PaillierCiphertext(self, (cipher1.val * cipher2.val) % self.pk.n_sq)
 
     def _add_constant(self, cipher, const):
-        return self._add_ciphertexts(cipher, self.enc_no_r(const))
+        if is_lazy(cipher):
+            return self._lazy_combination(cipher, 1, const=const)
+        return PaillierCiphertext(self, (cipher.val * self.pk.encode_const(const)) % self.pk.n_sq)
 
     def eval_sub_protocol(self, cipher1, cipher2):
-        enc1 = None
-        enc2 = None
-        if isinstance(cipher1, PaillierCiphertext):
-            enc1 = cipher1
-        else:
-            enc1 = self.enc_no_r(cipher1)
-        if isinstance(cipher2, PaillierCiphertext):
-            enc2 = cipher2
-        else:
-            enc2 = self.enc_no_r(cipher2)
+        if not isinstance(cipher2, PaillierCiphertext):
+            if not isinstance(cipher1, PaillierCiphertext):
+                raise ValueError('No ciphertext for ciphertext subtraction found.')
+            return self._add_constant(cipher1, -cipher2)
 
-        inv_enc2 = self._invert(enc2)
-        return enc1 + inv_enc2
+        if self.lazy or is_lazy(cipher1) or is_lazy(cipher2):
+            if isinstance(cipher1, PaillierCiphertext):
+                return self._lazy_combination(cipher1, 1, cipher2, -1)
+            return self._lazy_combination(cipher2, -1, const=cipher1)
+
+        inv_enc2 = self._invert(cipher2)
+        if isinstance(cipher1, PaillierCiphertext):
+            return self._add_ciphertexts(cipher1, inv_enc2)
+        return self._add_constant(inv_enc2, cipher1)
 
     def _invert(self, cipher):
         inv = gmpy.invert(cipher.val, self.pk.n_sq)
@@ -174,27 +389,163 @@ class PaillierABB(ABB):
                 raise ValueError('No ciphertext for ciphertext multiplication found.')
 
     def _mul_const(self, cipher, const):
+        if self.lazy or is_lazy(cipher):
+            return self._lazy_combination(cipher, const)
         val = gmpy.powmod(cipher.val, const, self.pk.n_sq)
         return PaillierCiphertext(self, val)
 
+    def add_values(self, vals1, vals2):
+        n_sq = self.pk.n_sq
+        return [(a * b) % n_sq for a, b in zip(vals1, vals2)]
+
+    def sub_values(self, vals1, vals2):
+        n_sq = self.pk.n_sq
+        return [(a * b) % n_sq for a, b in zip(vals1, batch_invert(vals2, n_sq))]
+
+    def mul_const_values(self, vals, const):
+        n_sq = self.pk.n_sq
+        if const < 0:
+            vals = batch_invert(vals, n_sq)
+            const = -const
+        return [gmpy.powmod(a, const, n_sq) for a in vals]
+
+    def sum_values(self, vals):
+        n_sq = self.pk.n_sq
+        result = gmpy.mpz(1)
+        for a in vals:
+            result = (result * a) % n_sq
+        return result
+
 
 class PaillierCiphertext(Ciphertext):
 
+    __slots__ = ()
+
     def serialize(self):
         return {'cipher': str(self.val)}
 
     @classmethod
-    def deserialize(cls, s):
-        return PaillierCiphertext(mpz(s['cipher']))
+    def deserialize(cls, s, abb):
+        return PaillierCiphertext(abb, gmpy.mpz(s['cipher']))
+
+
+class LazyPaillierCiphertext(PaillierCiphertext):
+    """
+    Linear combination sum(w * c for c, w in terms) + const of ciphertexts (stored as raw values)
+    with plaintext weights. The value is computed by a single multi-exponentiation on first access.
+    """
+
+    __slots__ = ('terms', 'const', 'value')
+
+    def __init__(self, abb, terms, const):
+        self.ctx = abb.ctx_id
+        self.terms = terms
+        self.const = const
+        self.value = None
+
+    @property
+    def val(self):
+        if self.value is None:
+            self.materialize()
+        return self.value
+
+    def __reduce__(self):
+        """pickled as the plain ciphertext of its value, in the same format as PaillierCiphertext"""
+        return (restore_ciphertext, (self.ctx, self.val))
+
+    def materialize(self):
+        terms = self.terms
+        if terms is None:
+            # materialized by another thread
+            return
+        self.value = self.abb._eval_linear_combination(list(terms.keys()), list(terms.values()), self.const, False)
+        self.terms = None
+
+
+def restore_ciphertext(ctx, val):
+    """the PaillierCiphertext with the context id and value (unpickles lazy ciphertexts)"""
+    cipher = PaillierCiphertext.__new__(PaillierCiphertext)
+    cipher.ctx = ctx
+    cipher.val = val
+    return cipher
+
+
+def is_lazy(cipher):
+    """true for lazy ciphertexts whose value was not computed yet"""
+    return isinstance(cipher, LazyPaillierCiphertext) and cipher.value is None
+
+
+class PaillierKeyStorage():
+    """
+    Threshold keys (pk and all key shares) in yaml files, one per bits, number of parties and threshold.
+    Loaded keys are cached within the process.
+    """
+
+    cache = {}
+    lock = Lock()
+
+    def __init__(self):
+        self.data_path = join('data', 'key')
+
+    def get_threshold_key(self, bits_key, n_parties, threshold):
+        key = (bits_key, n_parties, threshold)
+        with self.lock:
+            result = self.cache.get(key)
+            if result is None:
+                filename = self.get_filename(bits_key, n_parties, threshold)
+                if exists(filename):
+                    result = self.load(filename)
+                else:
+                    log.info('No key stored for this parameters.')
+                    result = PaillierABB.keygen(bits_key, n_parties, threshold)
+                    makedirs(join(getcwd(), self.data_path), exist_ok=True)
+                    self.save(filename, *result)
+                self.cache[key] = result
+        return result
+
+    def get_filename(self, bits_key, n_parties, threshold):
+        return join(getcwd(), self.data_path, 'distkey-{}I-{}P-{}t.yaml'.format(bits_key, n_parties, threshold))
+
+    def load(self, filename):
+        file = open(filename, 'r', encoding='utf-8')
+        content = yaml.load(file.read(), Loader=yaml.FullLoader)
+        file.close()
+        pk = PublicPaillierKey.deserialize(content['pk'])
+        sks = [PrivateKeyShare.deserialize(sk, pk) for sk in content['sk']]
+        return pk, sks
+
+    def save(self, filename, pk, sks):
+        content = {'pk': pk.serialize(), 'sk': [sk.serialize() for sk in sks]}
+        f = open(filename, 'w', encoding='utf-8')
+        f.write(str(yaml.dump(content)))
+        f.close()
 
 
 class PublicPaillierKey():
 
+    # constants in [-CONST_CACHE_LIMIT, CONST_CACHE_LIMIT] are cached after their first encoding
+    CONST_CACHE_LIMIT = 1024
+
     def __init__(self, n):
         self.n = n
         self.n_sq = n * n
         self.g = n + 1
         self.bits = gmpy.mpz(gmpy.rint_round(gmpy.log2(self.n)))
+        self.const_cache = {}
+
+    def encode(self, plain):
+        """returns g^plain mod n^2, which is (1 + plain*n) mod n^2 by the binomial theorem, as g = n + 1"""
+        return (1 + plain * self.n) % self.n_sq
+
+    def encode_const(self, plain):
+        """like encode, but small constants (0, 1, -1, bit widths, ...) are only computed once per key"""
+        if -self.CONST_CACHE_LIMIT <= plain <= self.CONST_CACHE_LIMIT:
+            encoded = self.const_cache.get(plain)
+            if encoded is None:
+                encoded = self.encode(plain)
+                self.const_cache[plain] = encoded
+            return encoded
+        return self.encode(plain)
 
     def serialize(self, full=False):
         data = {'n': str(self.n)}
@@ -204,7 +555,58 @@ class PublicPaillierKey():
 
     @classmethod
     def deserialize(self, s):
-        return PublicPaillierKey(mpz(s['n']))
+        return PublicPaillierKey(gmpy.mpz(s['n']))
+
+
+class PaillierDealerContext():
+    """
+    Keeps the factorization of n during the setup, so r^n mod n^2 can be computed
+    with the CRT over p^2 and q^2. It has to be wiped before any trustee goes online.
+    """
+
+    def __init__(self, pk, p, q):
+        self.pk = pk
+        self.rand = gmpy.random_state(randint(0, 1234567891011121314))
+        self.p = p
+        self.q = q
+        self.p_sq = p * p
+        self.q_sq = q * q
+        self.exp_p = pk.n % (p - 1)
+        self.exp_q = pk.n % (q - 1)
+        self.q_sq_inv = gmpy.invert(self.q_sq, self.p_sq)
+
+    def is_active(self):
+        return self.p_sq is not None
+
+    def wipe(self):
+        """removes all values depending on the factorization"""
+        self.p = None
+        self.q = None
+        self.p_sq = None
+        self.q_sq = None
+        self.exp_p = None
+        self.exp_q = None
+        self.q_sq_inv = None
+
+    def get_randomizer(self):
+        """returns (r, r^n mod n^2) for a random r in Z^*_n"""
+        if not self.is_active():
+            raise ValueError('Dealer context was already wiped.')
+        while True:
+            r = gmpy.mpz_urandomb(self.rand, self.pk.bits)
+            if 0 < r < self.pk.n and gmpy.gcd(r, self.pk.n) == 1:
+                break
+        # r^n mod p^2 only depends on r^n mod p: it is the lift (r^n mod p)^p mod p^2
+        x_p = gmpy.powmod(gmpy.powmod(r, self.exp_p, self.p), self.p, self.p_sq)
+        x_q = gmpy.powmod(gmpy.powmod(r, self.exp_q, self.q), self.q, self.q_sq)
+        # CRT: x = x_q mod q^2 and x = x_p mod p^2
+        x = x_q + self.q_sq * (((x_p - x_q) * self.q_sq_inv) % self.p_sq)
+        return r, x
+
+    def enc_val(self, plain):
+        """returns the value of a fresh encryption of plain"""
+        _, x = self.get_randomizer()
+        return (self.pk.encode(plain) * x) % self.pk.n_sq
 
 
 class PrivateKeyShare():
@@ -219,6 +621,8 @@ class PrivateKeyShare():
         self._precompute_data()
 
     def _precompute_data(self):
+        # responding share indices -> lagrange coefficients
+        self.lambda_cache = {}
         self.precomputed_fac = gmpy.fac(self.n_shares)
         self.precomputed_plaintext_share_factor = (
             self.precomputed_fac) * self.key_share
@@ -237,15 +641,25 @@ class PrivateKeyShare():
         # combine shares
         c_comb = self.share_combining(shares)
         # find exponent
-        i = (c_comb.val - 1) // self.n
+        i = (c_comb - 1) // self.n
         # decrypt
         return (i * self.precomputed_reconstruction_factor) % self.n
 
     def share_combining(self, shares):
-        """ this function combines threshold many shares. It needs exactly threshold many shares """
-        mod_shares = [share[1] * (calc_lambda(shares,
-                                                  share[0], self.precomputed_fac)) for i, share in enumerate(shares)]
-        return sum(mod_shares)
+        """ this function combines threshold many shares. It needs exactly threshold many shares.
+        Returns the value prod(share_i^lambda_i) mod n^2, computed as one multi-exponentiation """
+        lambdas = self.get_lambdas([share[0] for share in shares])
+        return multi_powmod([share[1].val for share in shares], lambdas, self.n_sq)
+
+    def get_lambdas(self, indices):
+        """ returns the lagrange coefficients for the given share indices, cached per index set """
+        key = tuple(indices)
+        lambdas = self.lambda_cache.get(key)
+        if lambdas is None:
+            shares = [(index, None) for index in indices]
+            lambdas = [calc_lambda(shares, index, self.precomputed_fac) for index in indices]
+            self.lambda_cache[key] = lambdas
+        return lambdas
 
     def serialize(self, full=False):
         data = {'key_share': str(self.key_share), 'index': str(self.index), 'n_shares': str(self.n_shares), 'threshold': str(self.threshold)}
@@ -256,7 +670,7 @@ class PrivateKeyShare():
 
     @classmethod
     def deserialize(self, l, pk):
-        return PrivateKeyShare(mpz(l['key_share']), int(l['index']), int(l['n_shares']), int(l['threshold']), pk)
+        return PrivateKeyShare(gmpy.mpz(l['key_share']), int(l['index']), int(l['n_shares']), int(l['threshold']), pk)
 
 
 def shared_decryption(sk_shares, ciphertext):
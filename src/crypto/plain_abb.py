@@ -33,6 +33,10 @@ class PlainABB(ABB):
         """returns a possible plaintext"""
         return randint(0, 2*32)
 
+    def get_plaintext_bits(self):
+        # plaintexts are unbounded python integers, behave like a 2048 bit key
+        return 2048
+
     def enc_get_r(self, plain):
         cipher = PlainCiphertext(self, plain)
         r = 0
@@ -50,6 +54,9 @@ class PlainABB(ABB):
     def dec(self, cipher):
         return cipher.val
 
+    def dec_many(self, ciphers):
+        return [self.dec(cipher) for cipher in ciphers]
+
     def eq(self, input1, input2, bits):
         cipher1 = self.convert_to_cipher(input1)
         cipher2 = self.convert_to_cipher(input2)
@@ -131,6 +138,18 @@ class PlainABB(ABB):
         prod = val1 * val2
         return self.enc(prod)
 
+    def add_values(self, vals1, vals2):
+        return [a + b for a, b in zip(vals1, vals2)]
+
+    def sub_values(self, vals1, vals2):
+        return [a - b for a, b in zip(vals1, vals2)]
+
+    def mul_const_values(self, vals, const):
+        return [a * const for a in vals]
+
+    def sum_values(self, vals):
+        return sum(vals)
+
 
 class PlainKeyStorage():
 
@@ -180,4 +199,4 @@ class SecretPlainKey():
 
 class PlainCiphertext(Ciphertext):
 
-    pass
+    __slots__ = ()
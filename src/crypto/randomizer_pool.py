@@ -0,0 +1,139 @@
+import logging
+from collections import deque
+from os import getcwd, makedirs
+from os.path import exists, join
+from random import randrange
+from threading import Condition, Thread
+
+import yaml
+
+from gmpy2 import gcd, mpz, mpz_urandomb, powmod, random_state
+
+log = logging.getLogger(__name__)
+
+
+class RandomizerPool():
+    """
+    Pool of precomputed Paillier randomizers (r, r^n mod n^2).
+    The pool is filled offline (fill) or by a background worker (start_worker)
+    and consumed by PaillierABB, so an online encryption costs a single multiplication.
+    Every randomizer is handed out exactly once.
+    """
+
+    def __init__(self, pk, low_watermark=64, high_watermark=1024):
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError('Watermarks have to fulfill 0 <= low ({}) <= high ({}).'.format(low_watermark, high_watermark))
+        self.pk = pk
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.rand = random_state(randrange(1234567891011121314))
+        self.data_path = join('data', 'randomizers')
+
+        self.randomizers = deque()
+        self.cond = Condition()
+        self.worker = None
+        self.worker_active = False
+
+    def __len__(self):
+        return len(self.randomizers)
+
+    def pop(self):
+        """ returns a tuple (r, r^n mod n^2) or None if the pool ran dry """
+        with self.cond:
+            if len(self.randomizers) == 0:
+                self.cond.notify()
+                return None
+            randomizer = self.randomizers.popleft()
+            if len(self.randomizers) < self.low_watermark:
+                self.cond.notify()
+            return randomizer
+
+    def fill(self, count=None, dealer=None):
+        """ generates randomizers until the high watermark (or count new randomizers) is reached.
+        If an active dealer context is given, the randomizers are computed using the factorization """
+        if count is None:
+            count = max(0, self.high_watermark - len(self.randomizers))
+        for _ in range(count):
+            if dealer is not None:
+                randomizer = dealer.get_randomizer()
+            else:
+                randomizer = self.generate_randomizer()
+            with self.cond:
+                self.randomizers.append(randomizer)
+        return count
+
+    def generate_randomizer(self):
+        while True:
+            r = mpz_urandomb(self.rand, self.pk.bits)
+            if 0 < r < self.pk.n and gcd(r, self.pk.n) == 1:
+                return r, powmod(r, self.pk.n, self.pk.n_sq)
+
+    def start_worker(self):
+        """ starts a daemon thread refilling the pool up to the high watermark
+        whenever it drops below the low watermark """
+        if self.worker is not None:
+            return
+        self.worker_active = True
+        self.worker = Thread(target=self._refill_loop, daemon=True)
+        self.worker.start()
+
+    def stop_worker(self):
+        with self.cond:
+            self.worker_active = False
+            self.cond.notify()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    def _refill_loop(self):
+        while True:
+            with self.cond:
+                while self.worker_active and len(self.randomizers) >= self.low_watermark:
+                    self.cond.wait()
+                if not self.worker_active:
+                    return
+                missing = self.high_watermark - len(self.randomizers)
+            log.debug('Refill randomizer pool with {} randomizers.'.format(missing))
+            # generate in small steps, so consumers are never blocked for long
+            while missing > 0 and self.worker_active:
+                missing -= self.fill(min(missing, 16))
+
+    def save(self):
+        """ stores the unused randomizers, so they can be used by the next run """
+        filename = self._get_filename()
+        makedirs(join(getcwd(), self.data_path), exist_ok=True)
+        content = self._load_data_file(filename)
+        with self.cond:
+            stored = content.get(str(self.pk.n), [])
+            content[str(self.pk.n)] = stored + [[str(r), str(r_n)] for (r, r_n) in self.randomizers]
+            self.randomizers.clear()
+        self._write_data_file(filename, content)
+
+    def load(self):
+        """ loads stored randomizers of this key. The file entry is removed while loading,
+        so a randomizer is never handed out twice, even if the process crashes """
+        filename = self._get_filename()
+        content = self._load_data_file(filename)
+        stored = content.pop(str(self.pk.n), [])
+        if len(stored) > 0:
+            self._write_data_file(filename, content)
+        with self.cond:
+            self.randomizers.extend((mpz(r), mpz(r_n)) for (r, r_n) in stored)
+        log.info('Loaded {} randomizers.'.format(len(stored)))
+        return len(stored)
+
+    def _get_filename(self):
+        return join(getcwd(), self.data_path, '{}K.yaml'.format(self.pk.bits))
+
+    def _load_data_file(self, filename):
+        if not exists(filename):
+            return {}
+        file = open(filename, 'r', encoding='utf-8')
+        content = yaml.load(file.read(), Loader=yaml.FullLoader)
+        file.close()
+        return content if content is not None else {}
+
+    def _write_data_file(self, filename, content):
+        f = open(filename, 'w', encoding='utf-8')
+        f.write(str(yaml.dump(content)))
+        f.close()
@@ -0,0 +1,29 @@
+import logging
+
+from src.crypto.cipher_vector import CipherVector
+from src.crypto.packing import PackedEncoding
+from src.election.bulletin_board.bulletin_board_functions import EmptyBulletinBoardFunctions
+
+log = logging.getLogger(__name__)
+
+
+class PackedAdditionBulletinBoard(EmptyBulletinBoardFunctions):
+    """adds packed ballots (see PackedEncoding), one ciphertext holds the counters of several candidates"""
+
+    def __init__(self, max_points_per_vote, max_votes=None):
+        self.max_points_per_vote = max_points_per_vote
+        self.max_votes = max_votes
+        self.encoding = None
+        self.n_votes = 0
+
+    def get_initial_vote_aggregation(self, abb, n_cand):
+        """ inits the packed counters of all candidates with zero votes """
+        self.encoding = PackedEncoding.for_abb(abb, n_cand, self.max_points_per_vote, self.max_votes)
+        self.n_votes = 0
+        return CipherVector.zeros(abb, self.encoding.n_ciphers)
+
+    def aggregate_vote(self, vote_aggregation, new_vote):
+        """ adds a packed vote, if the counters have enough headroom """
+        self.encoding.check_votes(self.n_votes + 1)
+        vote_aggregation.accumulate(new_vote)
+        self.n_votes += 1
@@ -1,10 +1,8 @@
 import logging
 
-import numpy
-
+from src.crypto.cipher_vector import CipherMatrix, CipherVector
 from src.election.bulletin_board.bulletin_board_functions import \
     EmptyBulletinBoardFunctions
-from time import time
 
 log = logging.getLogger(__name__)
 
@@ -12,14 +10,14 @@ log = logging.getLogger(__name__)
 class CondorcetBulletinBoard(EmptyBulletinBoardFunctions):
 
     def get_initial_vote_aggregation(self, abb, n_cand):
-        """ inits a dictionary containing each candidate with zero votes """
-        preferenceMatrix = [[abb.enc_zero for i in range(n_cand)] for i in range(n_cand)]
-        doubled_borda_points_sum = [abb.enc_zero for i in range(n_cand)]
+        """ inits the preference matrix and the borda points of each candidate with zero votes """
+        preferenceMatrix = CipherMatrix.zeros(abb, n_cand, n_cand)
+        doubled_borda_points_sum = CipherVector.zeros(abb, n_cand)
 
         return [preferenceMatrix, doubled_borda_points_sum]
 
     def aggregate_vote(self, vote_aggregation, new_vote):
         """ adds a vote by adding matrices element by element """
-        vote_aggregation[0] = numpy.add(vote_aggregation[0], new_vote[0])
+        vote_aggregation[0].accumulate(new_vote[0])
         if len(new_vote[1]) > 0:
-            vote_aggregation[1] = numpy.add(vote_aggregation[1], new_vote[1])
+            vote_aggregation[1].accumulate(new_vote[1])
@@ -1,7 +1,6 @@
 import logging
 
-import numpy
-
+from src.crypto.cipher_vector import CipherMatrix, CipherVector
 from src.election.condorcet.condorcet_bulletin_boards import \
     CondorcetBulletinBoard
 from src.election.condorcet.condorcet_evaluation import CondorcetEvaluation
@@ -30,9 +29,9 @@ class Condorcet(ElectionProperties):
     def generate_valid_vote(self, generic_vote, abb):
         """ generate encrypted gt-matrix and borda points if optimization activated out of generic vote """
 
-        gt_matrix_enc = [[abb.enc(e) for e in row] for row in generic_vote.get_duel_matrix()]
+        gt_matrix_enc = CipherMatrix.from_ciphers(abb, [[abb.enc(e) for e in row] for row in generic_vote.get_duel_matrix()])
 
-        borda_points_enc = []
+        borda_points_enc = CipherVector(abb, [])
         if (self.leak_better_half):
             borda_winner_points =  [i for i in range(self.n_cand, 0, -1)]
 
@@ -50,6 +49,6 @@ class Condorcet(ElectionProperties):
                     for cand in candidates:
                         doubled_borda_points[cand] = self.n_cand + 1
 
-            borda_points_enc = [abb.enc(doubled_borda_points[i]) for i in range(len(doubled_borda_points))]
+            borda_points_enc = CipherVector.from_ciphers(abb, [abb.enc(doubled_borda_points[i]) for i in range(len(doubled_borda_points))])
         
         return [gt_matrix_enc, borda_points_enc]
@@ -1,6 +1,7 @@
 import logging
 import math as m
 
+from src.crypto.cipher_vector import CipherVector
 from src.election.evaluation.evaluation_protocol import EvaluationProtocol
 from src.election.evaluation.point_limit_evaluation import PointThresholdEvaluation
 
@@ -22,8 +23,8 @@ class CondorcetEvaluation(EvaluationProtocol):
         self.matrix = vote_aggregation[0]
         self.n_cand = len(self.matrix)
         self.strong_gt_matrix = [[None for j in range(self.n_cand)] for i in range(self.n_cand)]
-        self.strong_gt_sums = [self.abb.enc_zero for i in range(self.n_cand)]
-        self.weak_gt_sums = [self.abb.enc_zero for i in range(self.n_cand)]
+        self.strong_gt_sums = CipherVector.zeros(self.abb, self.n_cand)
+        self.weak_gt_sums = CipherVector.zeros(self.abb, self.n_cand)
 
         self.debug_array_matrix(log, "Start Evaluation with Condorcet-Matrix: %s", self.matrix)
 
@@ -74,10 +75,11 @@ class CondorcetEvaluation(EvaluationProtocol):
 
         for i in range(len(new_candidates)):
             cand_a = new_candidates[i]
-            for j in range(i+1, len(candidates_to_compare)):
-                cand_b = candidates_to_compare[j]
-                weak_gt = self.abb.gt(self.matrix[cand_a][cand_b], self.matrix[cand_b][cand_a], self.bits_compare)
-                eq = self.abb.eq(self.matrix[cand_a][cand_b], self.matrix[cand_b][cand_a], self.bits_compare)
+            opponents = candidates_to_compare[i+1:]
+            duels = [(self.matrix[cand_a][cand_b], self.matrix[cand_b][cand_a]) for cand_b in opponents]
+            weak_gts = self.abb.gt_many(duels, self.bits_compare)
+            eqs = self.abb.eq_many(duels, self.bits_compare)
+            for cand_b, weak_gt, eq in zip(opponents, weak_gts, eqs):
                 strong_gt = weak_gt - eq
                 self.strong_gt_matrix[cand_a][cand_b] = strong_gt
                 self.strong_gt_matrix[cand_b][cand_a] = self.abb.enc_one - weak_gt
@@ -11,9 +11,7 @@ log = logging.getLogger(__name__)
 class CopelandEvaluationFast(EvaluationProtocol):
 
     def run(self, max_points, original_matrix, strong_gt_matrix, strong_gt_sums, weak_gt_sums, possible_winner):
-        copeland_points = []
-        for cand in range(len(strong_gt_sums)):
-            copeland_points.append(strong_gt_sums[cand] + weak_gt_sums[cand])
+        copeland_points = strong_gt_sums + weak_gt_sums
 
         highest_possible_win_count = (len(copeland_points)-1)*2
         bits = self.abb.get_bits_for_size(highest_possible_win_count)
@@ -21,8 +19,9 @@ class CopelandEvaluationFast(EvaluationProtocol):
         for win_count in range(highest_possible_win_count, 0, -1):
             winners = []
             win_count_enc = self.abb.enc_no_r(win_count)
-            for cand in possible_winner:
-                if self.abb.dec(self.abb.eq(win_count_enc, copeland_points[cand], bits)) == 1:
+            matches = self.abb.eq_many([(win_count_enc, copeland_points[cand]) for cand in possible_winner], bits)
+            for cand, match in zip(possible_winner, self.abb.dec_many(matches)):
+                if match == 1:
                     winners.append(cand)
 
             if len(winners) > 0:
@@ -34,9 +33,7 @@ class CopelandEvaluationFast(EvaluationProtocol):
 class CopelandEvaluationSafe(EvaluationProtocol):
 
     def run(self, max_points, original_matrix, strong_gt_matrix, strong_gt_sums, weak_gt_sums, possible_winner):
-        copeland_points = []
-        for cand in range(len(strong_gt_sums)):
-            copeland_points.append(strong_gt_sums[cand] + weak_gt_sums[cand])
+        copeland_points = strong_gt_sums + weak_gt_sums
         return self.run_subprotocol(SingleWinnerEvaluation(max_points), [copeland_points])
 
 
@@ -50,13 +47,11 @@ class MiniMaxMarginsEvaluation(EvaluationProtocol):
         max_points_enc = self.abb.enc_no_r(max_points)
 
         for i in possible_winner:
-            differences = []
-            for j in possible_winner:
-                if i == j:
-                    continue
-                defeat = original_matrix[j][i] - original_matrix[i][j]
-                # important: ignore wins by using preference matrix, so no bigger bit number is needed
-                differences.append(self.if_then_else_enc(strong_gt_matrix[i][j], max_points, max_points_enc - defeat))
+            opponents = [j for j in possible_winner if j != i]
+            defeats = [original_matrix[j][i] - original_matrix[i][j] for j in opponents]
+            # important: ignore wins by using preference matrix, so no bigger bit number is needed
+            differences = self.if_then_else_enc_many([strong_gt_matrix[i][j] for j in opponents], [max_points] * len(opponents),
+                                                     [max_points_enc - defeat for defeat in defeats])
             worst_results.append(self.get_minimum(differences, bits))
 
         return self.run_subprotocol(SingleWinnerEvaluation(max_points), [worst_results])
@@ -73,13 +68,10 @@ class MiniMaxWinningVotesEvaluation(EvaluationProtocol):
         max_points_enc = self.abb.enc_no_r(max_points)
 
         for i in possible_winner:
-            opponent_results_inverted = []
-            for j in possible_winner:
-                if i == j:
-                    continue
-                opponent = original_matrix[j][i]
-                # important: ignore wins by using preference matrix, so condorcet criteria is fullfilled
-                opponent_results_inverted.append(self.if_then_else_enc(strong_gt_matrix[i][j], max_points, max_points_enc - opponent))
+            opponents = [j for j in possible_winner if j != i]
+            # important: ignore wins by using preference matrix, so condorcet criteria is fullfilled
+            opponent_results_inverted = self.if_then_else_enc_many([strong_gt_matrix[i][j] for j in opponents], [max_points] * len(opponents),
+                                                                   [max_points_enc - original_matrix[j][i] for j in opponents])
             worst_results.append(self.get_minimum(opponent_results_inverted, bits))
 
         return self.run_subprotocol(SingleWinnerEvaluation(max_points), [worst_results])
@@ -93,8 +85,10 @@ class WeakCondorcetEvaluation(EvaluationProtocol):
         needed_wins_enc = self.abb.enc_no_r(len(original_matrix) - 1)
 
         winner = []
-        for cand in range(len(original_matrix)):
-            if self.abb.dec(self.abb.eq(weak_gt_sums[cand], needed_wins_enc, self.abb.get_bits_for_size(len(original_matrix)))) == 1:
+        bits = self.abb.get_bits_for_size(len(original_matrix))
+        matches = self.abb.eq_many([(weak_gt_sums[cand], needed_wins_enc) for cand in range(len(original_matrix))], bits)
+        for cand, match in enumerate(self.abb.dec_many(matches)):
+            if match == 1:
                 winner.append(cand)
         return winner
 
@@ -106,9 +100,7 @@ class SmithEvaluation(EvaluationProtocol):
 
     def smith_evaluation(self, strong_gt_sums, weak_gt_sums, possible_winner, leak_min_copeland):
         n_cand = len(strong_gt_sums)
-        copeland_points = []
-        for cand in range(n_cand):
-            copeland_points.append(strong_gt_sums[cand] + weak_gt_sums[cand])
+        copeland_points = strong_gt_sums + weak_gt_sums
 
         self.debug_cipher_list(log, 'copeland-points: %s', copeland_points)
 
@@ -151,8 +143,9 @@ class SmithEvaluation(EvaluationProtocol):
             points_to_search -= 1
             
         smith_set = []
-        for cand in possible_winner:
-            if self.abb.dec(smith_set_indicator[cand]) == 1:
+        indicators = self.abb.dec_many([smith_set_indicator[cand] for cand in possible_winner])
+        for cand, indicator in zip(possible_winner, indicators):
+            if indicator == 1:
                 smith_set.append(cand)
 
         return smith_set
@@ -186,24 +179,26 @@ class SchulzeEvaluation(EvaluationProtocol):
         self.debug_array_matrix(log, "Strongest-Path-Matrix: %s", path)
 
         duel_matrix = [[None for j in possible_winner] for i in possible_winner]
-        for cand_a in possible_winner:
-            for cand_b in possible_winner:
-                if cand_a < cand_b:
-                    gt = self.abb.gt(path[cand_a][cand_b], path[cand_b][cand_a], bits_for_points)
-                    eq = self.abb.eq(path[cand_a][cand_b], path[cand_b][cand_a], bits_for_points)
-                    duel_matrix[cand_a][cand_b] = gt
-                    duel_matrix[cand_b][cand_a] = 1 - gt + eq
+        duels = [(cand_a, cand_b) for cand_a in possible_winner for cand_b in possible_winner if cand_a < cand_b]
+        gts = self.abb.gt_many([(path[cand_a][cand_b], path[cand_b][cand_a]) for cand_a, cand_b in duels], bits_for_points)
+        eqs = self.abb.eq_many([(path[cand_a][cand_b], path[cand_b][cand_a]) for cand_a, cand_b in duels], bits_for_points)
+        for (cand_a, cand_b), gt, eq in zip(duels, gts, eqs):
+            duel_matrix[cand_a][cand_b] = gt
+            duel_matrix[cand_b][cand_a] = 1 - gt + eq
         
         self.debug_array_matrix(log, "Duel-Winner-Matrix: %s", duel_matrix)
 
         winners = []
+        winning_sums = []
         for cand_a in possible_winner:
             winning_sum = self.abb.enc_zero
             for cand_b in possible_winner:
                 if cand_a != cand_b:
                     winning_sum += duel_matrix[cand_a][cand_b]
-            winning_indicator = self.abb.eq(winning_sum, self.abb.enc_no_r(len(possible_winner)-1), self.abb.get_bits_for_size(len(possible_winner)-1))
-            if self.abb.dec(winning_indicator) == 1:
+            winning_sums.append((winning_sum, self.abb.enc_no_r(len(possible_winner)-1)))
+        winning_indicators = self.abb.eq_many(winning_sums, self.abb.get_bits_for_size(len(possible_winner)-1))
+        for cand_a, winning_indicator in zip(possible_winner, self.abb.dec_many(winning_indicators)):
+            if winning_indicator == 1:
                 winners.append(cand_a)
 
         return winners
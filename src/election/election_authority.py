@@ -14,9 +14,13 @@ from src.util.protocol_runner import ProtocolRunner
 
 class ElectionAuthority():
 
-    def __init__(self, trustee_gen, election_properties):
+    def __init__(self, trustee_gen, election_properties, randomizer_pool=None):
+        """randomizer_pool: optional pool of precomputed randomizers used to encrypt the votes,
+        if it runs dry the randomizers are generated inline"""
         trustees = trustee_gen()
         self.abb = trustees[0].abb.create_local_abb()
+        if randomizer_pool is not None:
+            self.abb.set_randomizer_pool(randomizer_pool)
         self.abb_log = trustees[0].abb.op_logger
 
         self.n_cand = election_properties.n_cand
@@ -104,6 +108,10 @@ class ElectionAuthority():
         dec_ops = self.abb_log.get_count_dec_operations()
         mul_ops = self.abb_log.get_count_mul_operations()
         self.logger.info('Computation time to evaluate winner: {:.3f}s, with {} gt-ops, {} eq-ops, {} dec-ops and {} mul-ops'.format(t, gt_ops, eq_ops, dec_ops, mul_ops))
+        for op, (bits, padded) in sorted(self.abb_log.get_bit_savings().items()):
+            if padded > 0:
+                self.logger.info('{}-ops compare {} bits in total, {} bits ({:.1f}%) less than with widths padded to powers of two'.format(
+                    op, bits, padded - bits, 100 * (padded - bits) / padded))
         CSV_Writer.set_eval_time(t)
         CSV_Writer.write_with_election_params(self.n_cand, self.n_votes, self.election_system_name, winner_names, gt_ops, eq_ops, dec_ops, mul_ops)
 
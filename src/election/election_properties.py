@@ -2,6 +2,10 @@ import abc
 import logging
 from time import time
 
+from src.crypto.packing import PackedEncoding
+from src.election.bulletin_board.packed_addition_bulletin_board import \
+    PackedAdditionBulletinBoard
+from src.election.evaluation.unpack_evaluation import UnpackEvaluation
 from src.election.trustee import Trustee, init_trustees
 from src.util.csv_writer import CSV_Writer
 from src.util.point_vote import IllegalVoteException
@@ -23,6 +27,31 @@ class ElectionProperties(object):
         self.system_name = str(self.__class__.__name__) + ("-" if logger_name_extension != "" else "") + logger_name_extension
         self.expected_votes_n = expected_votes_n
         self.bulletin_board_functions_class = bulletin_board_functions_class
+        self.packed = False
+        self.max_points_per_packed_vote = None
+
+    def set_packed(self, max_points_per_vote):
+        """ballots pack the points of all candidates into few ciphertexts (see PackedEncoding),
+        the evaluation starts by unpacking the tally"""
+        self.packed = True
+        self.max_points_per_packed_vote = max_points_per_vote
+        self.bulletin_board_functions_class = lambda: PackedAdditionBulletinBoard(max_points_per_vote, self.expected_votes_n)
+
+    def get_packed_encoding(self, abb):
+        return PackedEncoding.for_abb(abb, self.n_cand, self.max_points_per_packed_vote, self.expected_votes_n)
+
+    def encrypt_points(self, points, abb):
+        """encrypts the points of each candidate (dict or list), packed or one ciphertext per candidate"""
+        points = [points[cand] for cand in range(self.n_cand)]
+        if self.packed:
+            return self.get_packed_encoding(abb).encrypt_vote(abb, points)
+        return {cand: abb.enc(points[cand]) for cand in range(self.n_cand)}
+
+    def get_packed_evaluator(self, evaluator, n_votes, abb):
+        """evaluator, which unpacks the tally first, if ballots are packed"""
+        if not self.packed:
+            return evaluator
+        return UnpackEvaluation(self.get_packed_encoding(abb), evaluator, n_votes)
 
     @abc.abstractmethod
     def get_evaluator(self, n_votes, abb):
@@ -14,11 +14,15 @@ class EvaluationProtocol(Protocol):
 
         self.debug_cipher_list(log, 'search for maximum in %s', list)
 
-        maximum = list[0]
-        for i in range(1, len(list)):
-                gt_indicator = self.abb.gt(list[i], maximum, bits)
-                maximum = self.if_then_else_enc(gt_indicator, list[i], maximum)
-                
+        # tournament: the comparisons of a level are independent and run together
+        maxima = [list[i] for i in range(len(list))]
+        while len(maxima) > 1:
+            pairs = [(maxima[i + 1], maxima[i]) for i in range(0, len(maxima) - 1, 2)]
+            gt_indicators = self.abb.gt_many(pairs, bits)
+            next_maxima = self.if_then_else_enc_many(gt_indicators, [a for a, _ in pairs], [b for _, b in pairs])
+            maxima = next_maxima + maxima[len(pairs) * 2:]
+        maximum = maxima[0]
+
         self.debug_cipher(log, 'maximum is: %s', maximum)
 
         return maximum
@@ -29,11 +33,15 @@ class EvaluationProtocol(Protocol):
 
         self.debug_cipher_list(log, 'search for minimum in %s', list)
 
-        minimum = list[0]
-        for i in range(1, len(list)):
-            st_indicator = self.abb.gt(minimum, list[i], bits)
-            minimum = self.if_then_else_enc(st_indicator, list[i], minimum)
-            
+        # tournament: the comparisons of a level are independent and run together
+        minima = [list[i] for i in range(len(list))]
+        while len(minima) > 1:
+            pairs = [(minima[i], minima[i + 1]) for i in range(0, len(minima) - 1, 2)]
+            st_indicators = self.abb.gt_many(pairs, bits)
+            next_minima = self.if_then_else_enc_many(st_indicators, [b for _, b in pairs], [a for a, _ in pairs])
+            minima = next_minima + minima[len(pairs) * 2:]
+        minimum = minima[0]
+
         self.debug_cipher(log, 'minimum is: %s', minimum)
 
         return minimum
@@ -55,7 +63,8 @@ class EvaluationProtocol(Protocol):
         if isinstance(list[0], (int, gmpy.mpz().__class__)):
             logger.debug(text % str([(list[i] if list[i] is not None else None) for i in range(len(list))]))
         else:
-            logger.debug(text % str([(self.abb.dec(list[i]) if list[i] is not None else None) for i in range(len(list))]))
+            decrypted = iter(self.abb.dec_many([cipher for cipher in list if cipher is not None]))
+            logger.debug(text % str([(next(decrypted) if list[i] is not None else None) for i in range(len(list))]))
 
     def debug_array_matrix(self, logger, text, matrix):
         """logs decrypted matrix of cipher texts, decrypt is only called if log level is debug"""
@@ -81,15 +90,24 @@ class EvaluationProtocol(Protocol):
         - val_true (return if cond=1, can be encrypted)
         - val_false (return if cond=0, can be encrypted)
         """
-        return (cond * val_true) + ((1 - cond) * val_false)
-
-    def match_points(self, point_list, points_to_search_enc, bits):	
-	        match_indicator_dict = {}	
-	        match_sum = self.abb.enc_zero	
-		
-	        for cand in range(0, len(point_list)):	
-	            match = self.abb.eq(point_list[cand], points_to_search_enc, bits)	
-	            match_sum += match	
-	            match_indicator_dict[cand] = match
-		
-	        return match_sum, match_indicator_dict
+        # cond * val_true + (1 - cond) * val_false with a single multiplication
+        return cond * (val_true - val_false) + val_false
+
+    def if_then_else_enc_many(self, conds, vals_true, vals_false):
+        """
+        if_then_else_enc for independent branchings, the multiplications run in the rounds of one
+        """
+        diffs = [val_true - val_false for val_true, val_false in zip(vals_true, vals_false)]
+        products = self.abb.mul_many(conds, diffs)
+        return [product + val_false for product, val_false in zip(products, vals_false)]
+
+    def match_points(self, point_list, points_to_search_enc, bits):
+        match_indicator_dict = {}
+        match_sum = self.abb.enc_zero
+
+        matches = self.abb.eq_many([(point_list[cand], points_to_search_enc) for cand in range(0, len(point_list))], bits)
+        for cand, match in enumerate(matches):
+            match_sum += match
+            match_indicator_dict[cand] = match
+
+        return match_sum, match_indicator_dict
@@ -19,8 +19,9 @@ class PointThresholdEvaluation(EvaluationProtocol):
         winners = []
         self.debug_cipher_list(log, 'Point limit election of: %s', votes)
         log.debug(self.point_limit)
-        for cand in range(len(votes)):
-            if self.abb.dec(self.abb.gt(votes[cand], self.point_limit, self.bits)):
+        gts = self.abb.gt_many([(votes[cand], self.point_limit) for cand in range(len(votes))], self.bits)
+        for cand, gt in enumerate(self.abb.dec_many(gts)):
+            if gt:
                 winners.append(cand)
 
         return winners
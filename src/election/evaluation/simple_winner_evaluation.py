@@ -1,5 +1,6 @@
 import logging
 
+from src.crypto.cipher_vector import CipherVector
 from src.election.evaluation.evaluation_protocol import EvaluationProtocol
 from src.election.evaluation.single_winner_evaluation import \
     SingleWinnerEvaluation
@@ -33,9 +34,7 @@ class SimpleWinnerEvaluation(EvaluationProtocol):
         if self.enc_threshold:
             return enc_winner
 
-        indicator_winner = {}
-        for i, val in enc_winner.items():
-            indicator_winner[i] = self.abb.dec(val)
+        indicator_winner = dict(zip(enc_winner.keys(), self.abb.dec_many(enc_winner.values())))
         winners = []
         for i, val in indicator_winner.items():
             if val == 1:
@@ -47,25 +46,26 @@ class SimpleWinnerEvaluation(EvaluationProtocol):
         matrix = {} 
         for i, a in votes.items():
             matrix[i] = {}
+        duels = []
         for i, a in votes.items():
             for j, b in votes.items():
                 if i == j:
                     matrix[i][j] = self.abb.enc_zero
                     matrix[j][i] = self.abb.enc_zero
                 elif j < i:
-                    gt = self.abb.gt(a, b, self.bits)
-                    eq = self.abb.eq(a, b, self.bits)
-                    matrix[i][j] = gt
-                    matrix[j][i] = 1 - gt + eq
+                    duels.append((i, j))
+        gts = self.abb.gt_many([(votes[i], votes[j]) for i, j in duels], self.bits)
+        eqs = self.abb.eq_many([(votes[i], votes[j]) for i, j in duels], self.bits)
+        for (i, j), gt, eq in zip(duels, gts, eqs):
+            matrix[i][j] = gt
+            matrix[j][i] = 1 - gt + eq
         return matrix
 
     def create_wins_vector(self, matrix):
         """ outputs a vector consisting of wins per candidate """
         wins_vec = {}
         for i, row in matrix.items():
-            wins_vec[i] = self.abb.enc_zero
-            for j, val in row.items():
-                wins_vec[i] += val
+            wins_vec[i] = CipherVector.from_ciphers(self.abb, list(row.values())).sum()
         return wins_vec
 
     def find_gt_candidates(self, wins_vector, threshold_wins, encrypted=False):
@@ -77,8 +77,9 @@ class SimpleWinnerEvaluation(EvaluationProtocol):
             enc_wins = wins
         else:
             enc_wins = self.abb.enc_no_r(wins)
-        for i, val in wins_vector.items():
-            enc_cand_indicator[i] = self.abb.gt(val, enc_wins, self.bits_for_candidates)
+        gts = self.abb.gt_many([(val, enc_wins) for val in wins_vector.values()], self.bits_for_candidates)
+        for i, gt in zip(wins_vector.keys(), gts):
+            enc_cand_indicator[i] = gt
         return enc_cand_indicator
 
     def find_lt_candidates(self, wins_vector, threshold_wins):
@@ -86,8 +87,10 @@ class SimpleWinnerEvaluation(EvaluationProtocol):
         enc_cand_indicator = {}
         wins = threshold_wins
         enc_wins = self.abb.enc_no_r(wins)
-        for i, val in wins_vector.items():
-            enc_cand_indicator[i] = self.abb.eq(val, enc_wins, self.bits_for_candidates) - self.abb.gt(val, enc_wins, self.bits_for_candidates) + 1
+        eqs = self.abb.eq_many([(val, enc_wins) for val in wins_vector.values()], self.bits_for_candidates)
+        gts = self.abb.gt_many([(val, enc_wins) for val in wins_vector.values()], self.bits_for_candidates)
+        for i, eq, gt in zip(wins_vector.keys(), eqs, gts):
+            enc_cand_indicator[i] = eq - gt + 1
         return enc_cand_indicator
 
     def find_eq_candidates(self, wins_vector, threshold_wins):  
@@ -95,6 +98,7 @@ class SimpleWinnerEvaluation(EvaluationProtocol):
         enc_cand_indicator = {}
         wins = threshold_wins
         enc_wins = self.abb.enc_no_r(wins)
-        for i, val in wins_vector.items():
-            enc_cand_indicator[i] = self.abb.eq(val, enc_wins, self.bits_for_candidates)
+        eqs = self.abb.eq_many([(val, enc_wins) for val in wins_vector.values()], self.bits_for_candidates)
+        for i, eq in zip(wins_vector.keys(), eqs):
+            enc_cand_indicator[i] = eq
         return enc_cand_indicator
@@ -24,8 +24,9 @@ class SingleWinnerEvaluation(EvaluationProtocol):
 
         winners = []
         _, winning_indcator = self.match_points(value_list, max_points, self.bits)
+        indicators = self.abb.dec_many([winning_indcator[cand] for cand in range(0, len(votes))])
         for cand in range(0, len(votes)):
-            if self.abb.dec(winning_indcator[cand]) == 1:
+            if indicators[cand] == 1:
                 winners.append(cand)
 
         return winners
\ No newline at end of file
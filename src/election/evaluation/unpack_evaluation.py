@@ -0,0 +1,20 @@
+import logging
+
+from src.election.evaluation.evaluation_protocol import EvaluationProtocol
+from src.protocols.unpack import UnpackProtocol
+
+log = logging.getLogger(__name__)
+
+
+class UnpackEvaluation(EvaluationProtocol):
+    """unpacks the packed tally into one ciphertext per candidate and runs the evaluator on it"""
+
+    def __init__(self, encoding, evaluator, n_votes):
+        super().__init__()
+        encoding.check_votes(n_votes)
+        self.encoding = encoding
+        self.evaluator = evaluator
+
+    def run(self, packed_votes):
+        votes = self.run_subprotocol(UnpackProtocol(self.encoding), [packed_votes])
+        return self.run_subprotocol(self.evaluator, [votes])
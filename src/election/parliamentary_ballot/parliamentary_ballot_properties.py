@@ -7,32 +7,31 @@ from src.election.parliamentary_ballot.parliamentary_evaluation import Parliamen
 
 class ParliamentaryBallotProperties(ElectionProperties):
 
-    def __init__(self, candidates, n_seats, secret_residual, clause):
+    def __init__(self, candidates, n_seats, secret_residual, clause, packed=False):
         """
         :param num_seats: number of seats in parliament
         :param secret_residual: pass true iff secred version is required
         :param clause: number of required votes for a party to obtain seats
+        :param packed: ballots pack all parties into few ciphertexts
         """
-        super().__init__(candidates, SimpleAdditionBulletinBoard, logger_name_extension=str(n_seats)+str(secret_residual)+str(clause))
+        super().__init__(candidates, SimpleAdditionBulletinBoard, logger_name_extension=str(n_seats)+str(secret_residual)+str(clause)+('#packed' if packed else ''))
         self.n_seats = n_seats
         self.secret_residual = secret_residual
         self.clause = clause
+        if packed:
+            self.set_packed(1)
 
     def get_evaluator(self, n_votes, abb):
         eval = ParliamentaryEvaluation(n_votes, self.n_seats, self.secret_residual, self.clause)
-        return eval
+        return self.get_packed_evaluator(eval, n_votes, abb)
 
     def generate_valid_vote(self, generic_vote, abb):
         """ inits a dictionary containing each candidate with zero votes """
-        vote = {}
-
-        # set every cand to 0 and find cand with biggest points, prefer lower numbers if equals
-        for cand in range(self.n_cand):
-            vote[cand] = abb.enc(0)
+        vote = [0] * self.n_cand
 
         # set index with highest points to 1
         winners = generic_vote.get_ranking_map()[1]
         if len(winners) != 1:
             raise IllegalVoteException("More or less than one winner")
-        vote[winners[0]] = abb.enc(1)
-        return vote
\ No newline at end of file
+        vote[winners[0]] = 1
+        return self.encrypt_points(vote, abb)
\ No newline at end of file
@@ -25,9 +25,8 @@ class ParliamentaryEvaluation(EvaluationProtocol):
         new_votes = {}
         enc_clause = self.abb.enc_no_r(self.clause)
         bits_int = self.abb.get_bits_for_size(self.n_votes)
-        for i, party_aggregation in self.vote_aggregation.items():
-            gt = self.abb.gt(party_aggregation, enc_clause, bits_int)
-            dec_gt = self.abb.dec(gt)
+        gts = self.abb.gt_many([(party_aggregation, enc_clause) for party_aggregation in self.vote_aggregation.values()], bits_int)
+        for i, dec_gt in zip(self.vote_aggregation.keys(), self.abb.dec_many(gts)):
             if dec_gt == 1:
                 new_votes[i] = self.vote_aggregation[i]
         log.debug(str(len(self.vote_aggregation)-len(new_votes)) + " parties were blocked")
@@ -40,7 +39,7 @@ class ParliamentaryEvaluation(EvaluationProtocol):
         for i, vote in self.vote_aggregation.items():
             sum_votes += vote
         self.sum_votes = sum_votes
-        log.debug(self.abb.dec(self.sum_votes))
+        self.debug_cipher(log, 'sum of votes: %s', self.sum_votes)
 
     def bin_search(self, number, lower, upper):
         """
@@ -125,10 +124,9 @@ class ParliamentaryEvaluation(EvaluationProtocol):
 
         #secret_residual version: add encrypted residual seats and decrypt the resulting sum
         decrypted_seats = {}
-        for i, seats in self.seats.items():
-            res_added = seats + residual_winners[i]
-            dec_seats = int(self.abb.dec(res_added))
-            decrypted_seats[i] = dec_seats
+        res_added = [seats + residual_winners[i] for i, seats in self.seats.items()]
+        for i, dec_seats in zip(self.seats.keys(), self.abb.dec_many(res_added)):
+            decrypted_seats[i] = int(dec_seats)
 
         log.info(decrypted_seats)
         return decrypted_seats.keys()
@@ -151,13 +149,9 @@ class ParliamentaryEvaluation(EvaluationProtocol):
                 gt_results.append(gt)
 
             #comute the rlambda_k and add them to the sum of k * rlambda_k (see 3.5.2)
-            seats_counter = self.abb.enc_zero
-            for n_seats in range(0, self.n_seats):
-                reduced_result = gt_results[n_seats] - gt_results[n_seats + 1]
-                seats = reduced_result * n_seats
-                seats_counter = seats_counter + seats
-            last = gt_results[self.n_seats] * self.n_seats
-            seats_counter = seats_counter + last
+            # the sum of k * (r_k - r_(k+1)) and n_seats * r_(n_seats) telescopes to r_1 + ... + r_(n_seats)
+            weights = [0] + [1] * self.n_seats
+            seats_counter = self.abb.linear_combination(gt_results, weights)
             self.debug_cipher(log, "Anzahl Sitze: %s", seats_counter)
 
             self.num_assigned_seats += seats_counter
@@ -0,0 +1,113 @@
+import logging
+from multiprocessing import get_context
+
+from src.election.trustee import Trustee
+from src.network.pipe_connector import PipeConnector
+
+log = logging.getLogger(__name__)
+
+
+class ProcessTrustee(Trustee):
+    """
+    Trustee, whose protocols run in its own process (see run_trustee_process), so the big integer
+    operations of several trustees use several cores. The process holds the abb with the key share.
+    This object only forwards the protocols, its abb has no key share and collects the operation counts.
+    """
+
+    def __init__(self, abb, id, process, control):
+        super().__init__(abb, id)
+        self.process = process
+        self.control = control
+
+    def set_timeout(self, timeout):
+        """the timeout of the rounds is set in the trustee process, after the queued protocols"""
+        super().set_timeout(timeout)
+        self.jobs.put(('timeout', timeout))
+        self.start_worker()
+
+    def _run_job(self, job):
+        if job[0] == 'timeout':
+            self.control.send(job)
+            return
+        prot, args, future = job
+        self.protocol = prot
+        self.run_finished = False
+        try:
+            self.control.send(('run', prot, args))
+            self.result, op_logger = self.control.recv()
+            self.abb.op_logger.merge(op_logger)
+            self.run_finished = True
+        except (EOFError, OSError) as e:
+            log.error('Process of trustee {} failed: {!r}'.format(self.id, e))
+            self.result = "Abort."
+        future.set_result(self.result)
+
+    def shutdown(self):
+        """stops the worker and the process of the trustee"""
+        self.stop_worker()
+        if self.process.is_alive():
+            self.control.send(None)
+            self.process.join()
+        self.control.close()
+
+
+def run_trustee_process(abb_cls, prot_suite_cls, pk, num_shares, threshold, sk, id, control, peers, timeout):
+    """runs the protocols received over control with the trustee of the key share sk"""
+    prot_suite = prot_suite_cls()
+    abb = abb_cls(prot_suite, pk, num_shares, threshold, sk)
+    prot_suite.set_abb(abb)
+    trustee = Trustee(abb, id)
+    trustee.connections = {other_id: PipeConnector(other_id, conn) for other_id, conn in peers}
+    trustee.set_timeout(timeout)
+
+    while True:
+        try:
+            job = control.recv()
+        except EOFError:
+            job = None
+        if job is None:
+            break
+        if job[0] == 'timeout':
+            trustee.set_timeout(job[1])
+            continue
+        _, prot, args = job
+        # only the operations of this protocol are reported
+        abb.op_logger.reset()
+        result = trustee.run_protocol(prot, *args).result()
+        control.send((result, abb.op_logger))
+
+    trustee.stop_worker()
+    for connector in trustee.connections.values():
+        connector.close()
+
+
+def init_process_trustees(abb_cls, prot_suite_cls, pk, sks, num_shares, threshold, timeout=None):
+    """
+    starts one process per trustee, the trustees of each pair are connected by a pipe.
+    Protocols and their arguments are pickled, abbs inside them are replaced
+    by the abb of the trustee process (see ABB.__reduce__).
+    """
+    ctx = get_context('spawn')
+    pipes = {(i, j): ctx.Pipe() for i in range(num_shares) for j in range(i + 1, num_shares)}
+
+    trustees = []
+    child_conns = []
+    for i in range(num_shares):
+        peers = [(j, pipes[(min(i, j), max(i, j))][0 if i < j else 1]) for j in range(num_shares) if j != i]
+        control, child_control = ctx.Pipe()
+        process = ctx.Process(target=run_trustee_process, daemon=True,
+                              args=(abb_cls, prot_suite_cls, pk, num_shares, threshold, sks[i], i, child_control, peers, timeout))
+        process.start()
+        child_conns.append(child_control)
+        abb = abb_cls(None, pk, num_shares, threshold, None)
+        trustee = ProcessTrustee(abb, i, process, control)
+        trustee.timeout = timeout
+        trustees.append(trustee)
+
+    # the ends used by the processes are closed here, so a failing process is noticed
+    for conn in child_conns:
+        conn.close()
+    for conn_a, conn_b in pipes.values():
+        conn_a.close()
+        conn_b.close()
+    return trustees
@@ -12,9 +12,12 @@ log = logging.getLogger(__name__)
 
 class SingleVoteElection(ElectionProperties):
 
-    def __init__(self, candidates):
-        super().__init__(candidates, SimpleAdditionBulletinBoard)
+    def __init__(self, candidates, packed=False):
+        """packed: ballots pack all candidates into few ciphertexts"""
+        super().__init__(candidates, SimpleAdditionBulletinBoard, logger_name_extension='packed' if packed else '')
         self.MAX_POINTS_PER_VOTE = 1
+        if packed:
+            self.set_packed(self.MAX_POINTS_PER_VOTE)
 
     def generate_valid_vote(self, generic_vote, abb):
         """ inits a dictionary containing each candidate with zero votes """
@@ -30,12 +33,9 @@ class SingleVoteElection(ElectionProperties):
             raise IllegalVoteException("More or less than one winner")
         vote_decrypted[winners[0]] = 1
 
-        vote_encrypted = {}
         log.debug(str(vote_decrypted))
-        for cand in range(self.n_cand):
-            vote_encrypted[cand] = abb.enc(vote_decrypted[cand])
-        return vote_encrypted
+        return self.encrypt_points(vote_decrypted, abb)
 
     def get_evaluator(self, n_votes, abb):
         eval = SimpleWinnerEvaluation(abb.get_bits_for_size(n_votes * self.MAX_POINTS_PER_VOTE))
-        return eval
+        return self.get_packed_evaluator(eval, n_votes, abb)
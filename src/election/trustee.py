@@ -1,6 +1,15 @@
-from src.network.local_connector import LocalConnector
+import logging
+import weakref
+from concurrent.futures import Future
+from queue import SimpleQueue
+from threading import Lock, Thread
+
+from src.network.client_connector import ClientConnector
 from src.network.connection import Channel
-from threading import Thread
+from src.network.connection_server import ConnectionServer
+from src.network.local_connector import LocalConnector
+
+log = logging.getLogger(__name__)
 
 
 class Trustee():
@@ -12,11 +21,27 @@ class Trustee():
         self.abb = abb
 
         self.connections = {}
-
-    def setup_connections(self, other_trustees):
+        self.server = None
+        # seconds a round of a protocol may take, None waits forever
+        self.timeout = None
+
+        # protocols are run one after another by a long-lived worker thread
+        self.jobs = SimpleQueue()
+        # the worker only references the trustee while it runs a protocol and ends, when the trustee is gone
+        weakref.finalize(self, self.jobs.put, None)
+        self.worker = None
+        self.worker_lock = Lock()
+        self.future = None
+        # all trustees run the same protocols, so the number of the run identifies its messages
+        self.runs = 0
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+
+    def setup_connections(self, other_trustees, connector_cls=LocalConnector):
         for trustee in other_trustees:
             other_id = trustee.id
-            lc = LocalConnector(other_id)
+            lc = connector_cls(other_id)
             self.connections[other_id] = lc
 
     def establish_connections(self, other_trustees):
@@ -24,39 +49,102 @@ class Trustee():
             other_id = trustee.id
             self.connections[other_id].connect(trustee.get_connector(self.id))
 
+    def listen(self, host, port=0):
+        """accepts tcp connections of other trustees (see connect_tcp), returns the address"""
+        self.server = ConnectionServer(self.id, host, port)
+        return self.server.start()
+
+    def connect_tcp(self, addresses, timeout=None):
+        """
+        connects to the other trustees over tcp, addresses: dict id -> (host, port) of all trustees.
+        Trustees connect to the trustees with smaller ids and accept the connections of the ones
+        with bigger ids (listen has to be called first). Messages to trustees, which didn't connect yet,
+        are sent as soon as they connect.
+        """
+        for other_id, (host, port) in sorted(addresses.items()):
+            if other_id < self.id:
+                connector = ClientConnector(other_id, host, port, self.id)
+                connector.connect(timeout)
+                self.connections[other_id] = connector
+            elif other_id > self.id:
+                self.connections[other_id] = self.server.get_connector(other_id)
+
+    def close_connections(self):
+        for connector in self.connections.values():
+            connector.close()
+        if self.server is not None:
+            self.server.close()
+
     def get_connector(self, id):
         return self.connections[id]
 
     def run_protocol(self, prot, *args):
+        """queues the protocol for the worker of this trustee, the returned future is done with its result"""
+        future = Future()
+        self.future = future
         self.run_finished = False
-
-        c = Channel(self.id, self.connections.values())
+        self.jobs.put((prot, args, future))
+        self.start_worker()
+        return future
+
+    def start_worker(self):
+        with self.worker_lock:
+            if self.worker is None:
+                self.worker = Thread(target=work, args=(weakref.ref(self), self.jobs), daemon=True)
+                self.worker.start()
+
+    def stop_worker(self):
+        """stops the worker after the queued protocols"""
+        with self.worker_lock:
+            if self.worker is not None:
+                self.jobs.put(None)
+                self.worker.join()
+                self.worker = None
+
+    def _run_job(self, job):
+        prot, args, future = job
+        self.run_finished = False
+        self.runs += 1
+        c = Channel(self.id, self.connections.values(), self.timeout, self.runs)
         self.abb.prot_suite.set_connections(c)
         prot.set_connection(c)
         prot.set_abb(self.abb)
         prot.set_output_func(self.receive_prot_output)
         self.protocol = prot
-
-        self.thread = Thread(target=prot.start, args=args)
-        self.thread.start()
+        try:
+            prot.start(*args)
+        except BaseException as e:
+            # failing top level protocols log the error and exit
+            log.debug('Protocol of trustee {} aborted: {!r}'.format(self.id, e))
+        if not self.run_finished:
+            self.result = "Abort."
+        future.set_result(self.result)
 
     def receive_prot_output(self, result):
         self.run_finished = True
         self.result = result
 
     def is_protocol_finished(self):
-        if self.run_finished:
-            return True
-        if not self.thread.is_alive():
-            self.result = "Abort."
-            return True
-        return False
+        return self.future is not None and self.future.done()
 
     def get_protocol(self):
         return self.protocol
 
 
-def init_trustees(abbs, ids):
+def work(trustee_ref, jobs):
+    """runs the queued protocols of the trustee until it is stopped or not referenced anymore"""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        trustee = trustee_ref()
+        if trustee is None:
+            return
+        trustee._run_job(job)
+        del trustee, job
+
+
+def init_trustees(abbs, ids, connector_cls=LocalConnector):
     trustees = []
     n_trustees = len(ids)
 
@@ -68,7 +156,7 @@ def init_trustees(abbs, ids):
     for i in range(n_trustees):
         others = trustees.copy()
         others.pop(i)
-        trustees[i].setup_connections(others)
+        trustees[i].setup_connections(others, connector_cls)
 
     # establish connections
     for i in range(n_trustees):
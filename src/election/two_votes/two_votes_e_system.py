@@ -3,7 +3,7 @@ import sys
 from src.protocols.base_protocols import Protocol
 from src.election.trustee import Trustee, init_trustees
 from src.util.crypto.paillier_key_storage import KeyStorage
-from time import sleep, time
+from time import time
 from random import randint
 from src.election.evaluation.seat_distribution import SeatDistributionProtocol
 from src.election.evaluation.direct_mandate_eval import DirectMandateProtocol
@@ -108,13 +108,13 @@ class TwoVotesESystem():
         #execute first step (compute direct mandates)
         startTime = time()
 
+        futures = []
         for t in self.trustees:
             proto_first = DirectMandateProtocol(self.bits_int)
-            t.run_protocol(proto_first, self.first_votes)
+            futures.append(t.run_protocol(proto_first, self.first_votes))
 
-        for t in self.trustees:
-            while not t.is_protocol_finished():
-                sleep(0.05)
+        for future in futures:
+            future.result()
 
         t = time() - startTime
         CSV_Writer_two_votes.set_time_first(t)
@@ -137,6 +137,7 @@ class TwoVotesESystem():
         #execute second step (compute unbalanced seat distribution)
         startTime = time()
 
+        futures = []
         for t in self.trustees:
             proto_second = SeatDistributionProtocol(self.bits_int)
             if self.added_para:
@@ -145,11 +146,10 @@ class TwoVotesESystem():
             if self.secret_residual:
                 proto_second.set_residual_secret()
 
-            t.run_protocol(proto_second, self.second_votes)
+            futures.append(t.run_protocol(proto_second, self.second_votes))
 
-        for t in self.trustees:
-            while not t.is_protocol_finished():
-                sleep(0.05)
+        for future in futures:
+            future.result()
 
         t = time() - startTime
         CSV_Writer_two_votes.set_time_second(t)
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from threading import Thread
+
+log = logging.getLogger(__name__)
+
+# put into the own queue of a connector to stop its reader, it never crosses the connection
+STOP = ('async_channel.stop',)
+
+
+class AsyncChannel():
+    """
+    Asyncio view of a Channel for protocols with concurrent subprotocols (see AsyncProtocol).
+    Messages are keyed, so concurrent broadcasts are matched by key and not by their order.
+    All messages to the peers of one loop iteration (tick) are merged into one batch per peer,
+    independent subprotocols share their rounds this way.
+    One reader thread per connector passes the received batches to the loop.
+    """
+
+    def __init__(self, channel, loop):
+        self.channel = channel
+        self.loop = loop
+        self.timeout = channel.timeout
+        self.outbox = []
+        self.flush_scheduled = False
+        # key -> {party: msg}, key -> future of the waiting broadcast
+        self.inbox = {}
+        self.waiters = {}
+        self.readers = []
+
+    def start(self):
+        for conn in self.channel.connectors:
+            reader = Thread(target=self._read, args=(conn,), daemon=True)
+            reader.start()
+            self.readers.append(reader)
+
+    async def close(self):
+        self._flush()
+        for conn in self.channel.connectors:
+            conn.receive_next_msg((self.channel.run_id, STOP))
+        for reader in self.readers:
+            await asyncio.to_thread(reader.join)
+        self.readers = []
+
+    def broadcast_and_receive(self, key, msg):
+        """sends the message with the next batch, the returned coroutine gives the sorted (party, msg) of all parties"""
+        if key in self.waiters:
+            raise ValueError('Message key {} is used twice.'.format(key))
+        future = self.loop.create_future()
+        self.waiters[key] = future
+        self.outbox.append((key, msg))
+        self._deliver(self.channel.id, [(key, msg)])
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.loop.call_soon(self._flush)
+        return self._wait(key, future)
+
+    async def _wait(self, key, future):
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError('Messages of round {} missing after {}s.'.format(key, self.timeout))
+
+    def _flush(self):
+        self.flush_scheduled = False
+        if len(self.outbox) == 0:
+            return
+        batch = self.outbox
+        self.outbox = []
+        self.channel.rounds += 1
+        for conn in self.channel.connectors:
+            self.channel.send(conn, batch)
+
+    def _deliver(self, party, batch):
+        for key, msg in batch:
+            msgs = self.inbox.setdefault(key, {})
+            msgs[party] = msg
+            future = self.waiters.get(key)
+            if len(msgs) == len(self.channel.connectors) + 1 and future is not None:
+                del self.inbox[key]
+                del self.waiters[key]
+                if not future.done():
+                    future.set_result(sorted(msgs.items(), key=lambda x: x[0]))
+
+    def _read(self, conn):
+        while True:
+            batch = self.channel.receive_from(conn)
+            if batch is STOP:
+                return
+            self.loop.call_soon_threadsafe(self._deliver, conn.id, batch)
@@ -1,28 +1,49 @@
-from socket import socket, AF_INET, SOCK_STREAM
 import logging
+from socket import create_connection
+from threading import Thread
+from time import sleep, time
+
+from src.network.socket_connector import (HANDSHAKE_TIMEOUT, SocketConnector,
+                                          read_handshake)
 
 log = logging.getLogger(__name__)
 
-MSG_END = 'END'
 
-class ClientConnector():
+class ClientConnector(SocketConnector):
+    """
+    Connector to the trustee listening on (host, port) (see ConnectionServer).
+    Lost connections are reestablished by a background thread.
+    """
 
-    def __init__(self, name, port):
-        self.name = name
+    def __init__(self, id, host, port, own_id, retry_interval=0.1):
+        super().__init__(id)
+        self.host = host
         self.port = port
+        self.own_id = own_id
+        self.retry_interval = retry_interval
 
-    def connect(self):
-        sock = socket(AF_INET, SOCK_STREAM)
-        log.info('Trying to connect with {} on port {}...'.format(self.name, self.port))
-        sock.connect((self.name, self.port))
-        self.connection = sock
-        log.info('Connected!')
-
-    def send(self, msg):
-        self.connection.send('{}{}'.format(msg, MSG_END))
+    def connect(self, timeout=None):
+        """connects to the server, retries until it is reachable or timeout seconds passed"""
+        deadline = None if timeout is None else time() + timeout
+        while not self.closed:
+            sock = None
+            try:
+                sock = create_connection((self.host, self.port), timeout=HANDSHAKE_TIMEOUT)
+                self.send_handshake(sock, self.own_id)
+                peer_id, peer_received = read_handshake(sock)
+                if peer_id != self.id:
+                    sock.close()
+                    raise ValueError('Expected trustee {} on port {}, but trustee {} answered.'.format(self.id, self.port, peer_id))
+                if self._start(sock, peer_received):
+                    log.info('Connected with trustee {} on {}:{}.'.format(self.id, self.host, self.port))
+                return
+            except OSError as e:
+                if sock is not None:
+                    sock.close()
+                if deadline is not None and time() > deadline:
+                    raise TimeoutError('Trustee {} on {}:{} not reachable: {!r}'.format(self.id, self.host, self.port, e))
+                sleep(self.retry_interval)
 
-    def receive(self):
-        s = ""
-        while not MSG_END in s:
-            s += self.connection.recv(1024)
-        return s.split(MSG_END)[0]
\ No newline at end of file
+    def on_disconnect(self):
+        log.info('Connection to trustee {} lost, reconnecting.'.format(self.id))
+        Thread(target=self.connect, daemon=True).start()
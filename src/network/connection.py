@@ -1,4 +1,5 @@
 import logging
+from time import time
 
 log = logging.getLogger(__name__)
 
@@ -8,29 +9,50 @@ class Connector():
     def send(self, msg):
         pass
 
-    def receive(self):
+    def receive(self, timeout=None):
         pass
 
 
 class Channel():
-
-    def __init__(self, id, connectors):
+    """
+    Connections of one trustee to all others. If a timeout is given, each round
+    (receiving the messages of all others) has to finish within timeout seconds.
+    Messages are sent as (run_id, msg): a run aborted by a timeout leaves messages of its rounds
+    in the connectors, the channels of later runs (with bigger ids) drop them.
+    """
+
+    def __init__(self, id, connectors, timeout=None, run_id=0):
         self.id = id
         self.connectors = connectors
+        self.timeout = timeout
+        self.run_id = run_id
+        self.rounds = 0
 
     def broadcast(self, msg):
         for conn in self.connectors:
-            conn.send(msg)
+            self.send(conn, msg)
+
+    def send(self, conn, msg):
+        conn.send((self.run_id, msg))
 
     def receive(self):
         msgs = []
+        deadline = None if self.timeout is None else time() + self.timeout
         for conn in self.connectors:
-            conn_id = conn.id
-            msg = conn.receive()
-            msgs.append((conn_id, msg))
+            msgs.append((conn.id, self.receive_from(conn, deadline)))
         return msgs
 
+    def receive_from(self, conn, deadline=None):
+        """returns the next message of this run from the connector, raises a TimeoutError after the deadline"""
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time())
+            run_id, msg = conn.receive(timeout)
+            if run_id >= self.run_id:
+                return msg
+            log.debug('Dropped a message of the aborted run {} of trustee {}.'.format(run_id, conn.id))
+
     def broadcast_and_receive(self, msg):
+        self.rounds += 1
         self.broadcast(msg)
         response = self.receive()
         response.append((self.id, msg))
@@ -1,22 +1,66 @@
-from socket import socket, gethostname
+import logging
+from socket import create_server
+from threading import Lock, Thread
+
+from src.network.server_connector import ServerConnector
+from src.network.socket_connector import HANDSHAKE_TIMEOUT, read_handshake
+
+log = logging.getLogger(__name__)
+
 
 class ConnectionServer():
+    """
+    Accepts the connections of other trustees on (host, port), port 0 picks a free port.
+    Every connection starts with a handshake of the connecting trustee, its socket is handed
+    to the ServerConnector of that trustee (also after reconnects).
+    """
 
-    def __init__(self, name, port):
-        self.name = name
+    def __init__(self, id, host, port):
+        self.id = id
+        self.host = host
         self.port = port
+        self.connectors = {}
+        self.lock = Lock()
+        self.sock = None
+        self.closed = False
 
-    def receive_connections(self):
-        s = socket()         # Create a socket object
-        host = gethostname()  # Get local machine name
-        port = self.port            # Reserve a port for your service.
+    def start(self):
+        """starts listening, returns the address"""
+        self.sock = create_server((self.host, self.port))
+        self.port = self.sock.getsockname()[1]
+        Thread(target=self.receive_connections, daemon=True).start()
+        log.info('Trustee {} waiting for connections on {}:{}.'.format(self.id, self.host, self.port))
+        return self.host, self.port
+
+    def get_connector(self, id):
+        with self.lock:
+            connector = self.connectors.get(id)
+            if connector is None:
+                connector = ServerConnector(id)
+                self.connectors[id] = connector
+            return connector
 
-        s.bind((host, port))        # Bind to the port
-        s.listen(5)                 # Now wait for client connection.
+    def receive_connections(self):
+        while not self.closed:
+            try:
+                conn, addr = self.sock.accept()
+            except OSError:
+                return
+            log.debug('Connection established by {}.'.format(addr))
+            Thread(target=self._handshake, args=(conn,), daemon=True).start()
 
-        log.info('{} waiting for connections on port {}'.format(self.name, self.port))
+    def _handshake(self, conn):
+        try:
+            conn.settimeout(HANDSHAKE_TIMEOUT)
+            peer_id, peer_received = read_handshake(conn)
+            self.get_connector(peer_id).attach(conn, self.id, peer_received)
+        except Exception as e:
+            log.warning('Handshake of a connection failed: {!r}'.format(e))
+            conn.close()
 
-        while True:
-            conn, addr = s.accept()
-            log.info('Connection established by {} ({})'.format(conn, addr))
-            
+    def close(self):
+        self.closed = True
+        if self.sock is not None:
+            self.sock.close()
+        for connector in self.connectors.values():
+            connector.close()
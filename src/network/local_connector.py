@@ -1,5 +1,5 @@
 import logging
-from time import sleep
+from queue import Empty, SimpleQueue
 
 from src.network.connection import Connector
 
@@ -7,10 +7,14 @@ log = logging.getLogger(__name__)
 
 
 class LocalConnector(Connector):
+    """
+    Connector between two trustees of the same process. Messages are passed through a queue,
+    so a waiting receiver wakes up as soon as the message arrives.
+    """
 
     def __init__(self, id):
         self.id = id
-        self.stream = []
+        self.stream = SimpleQueue()
 
     def connect(self, connection):
         self.connection = connection
@@ -19,9 +23,11 @@ class LocalConnector(Connector):
         self.connection.receive_next_msg(msg)
 
     def receive_next_msg(self, msg):
-        self.stream.append(msg)
-
-    def receive(self):
-        while len(self.stream) == 0:
-            sleep(0.01)
-        return self.stream.pop(0)
+        self.stream.put(msg)
+
+    def receive(self, timeout=None):
+        """returns the next message, raises a TimeoutError if none arrives within timeout seconds"""
+        try:
+            return self.stream.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError('No message of trustee {} within {}s.'.format(self.id, timeout))
@@ -0,0 +1,37 @@
+import logging
+from threading import Lock, Thread
+
+from src.network.local_connector import LocalConnector
+
+log = logging.getLogger(__name__)
+
+
+class PipeConnector(LocalConnector):
+    """
+    Connector between trustees in different processes over one end of a multiprocessing pipe.
+    A reader thread moves arriving messages into the queue of the connector right away,
+    so two trustees sending large messages to each other at the same time don't block on a full pipe.
+    """
+
+    def __init__(self, id, conn):
+        super().__init__(id)
+        self.conn = conn
+        self.send_lock = Lock()
+        self.reader = Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def send(self, msg):
+        with self.send_lock:
+            self.conn.send(msg)
+
+    def close(self):
+        self.conn.close()
+
+    def _read(self):
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                log.debug('Pipe to trustee {} closed.'.format(self.id))
+                return
+            self.receive_next_msg(msg)
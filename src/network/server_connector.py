@@ -1,28 +1,19 @@
-from socket import socket, AF_INET, SOCK_STREAM
 import logging
 
-log = logging.getLogger(__name__)
-
-MSG_END = 'END'
+from src.network.socket_connector import SocketConnector
 
-class ServerConnector():
-
-    def __init__(self, socket, addr):
-        self.socket = socket
-        self.addr = addr
+log = logging.getLogger(__name__)
 
-    def connect(self):
-        sock = socket(AF_INET, SOCK_STREAM)
-        log.info('Trying to connect with {} on port {}...'.format(self.name, self.port))
-        sock.connect((self.name, self.port))
-        self.connection = sock
-        log.info('Connected!')
 
-    def send(self, msg):
-        self.connection.send('{}{}'.format(msg, MSG_END))
+class ServerConnector(SocketConnector):
+    """
+    Connector to a trustee, which connected to the ConnectionServer of this trustee.
+    After a lost connection the other trustee reconnects, the server attaches the new socket.
+    """
 
-    def receive(self):
-        s = ""
-        while not MSG_END in s:
-            s += self.connection.recv(1024)
-        return s.split(MSG_END)[0]
\ No newline at end of file
+    def attach(self, sock, own_id, peer_received):
+        """uses the socket of a new connection of the trustee, whose handshake was received"""
+        self._stop_reader()
+        self.send_handshake(sock, own_id)
+        if self._start(sock, peer_received):
+            log.info('Trustee {} connected.'.format(self.id))
@@ -0,0 +1,199 @@
+import io
+import logging
+import pickle
+import struct
+from collections import deque
+from socket import IPPROTO_TCP, SHUT_RDWR, TCP_NODELAY
+from threading import Event, Lock, Thread
+
+from src.network.local_connector import LocalConnector
+
+log = logging.getLogger(__name__)
+
+# frames the peer may have missed on a lost connection, a protocol round is only a few frames
+RESEND_HISTORY = 64
+MAX_FRAME_SIZE = 1 << 30
+HANDSHAKE_TIMEOUT = 10
+
+
+class MessageUnpickler(pickle.Unpickler):
+    """
+    Unpickler of protocol messages, which only creates numbers, containers and ciphertexts.
+    Messages of other trustees must not run arbitrary code.
+    """
+
+    ALLOWED = {
+        ('builtins', 'set'),
+        ('builtins', 'frozenset'),
+        ('gmpy2', 'from_binary'),
+        ('gmpy2.gmpy2', 'from_binary'),
+        ('src.crypto.paillier_abb', 'PaillierCiphertext'),
+        ('src.crypto.paillier_abb', 'restore_ciphertext'),
+        ('src.crypto.plain_abb', 'PlainCiphertext'),
+        ('src.crypto.cipher_vector', 'CipherVector'),
+        ('src.crypto.cipher_vector', 'CipherMatrix'),
+    }
+
+    def find_class(self, module, name):
+        if (module, name) not in self.ALLOWED:
+            raise pickle.UnpicklingError('{}.{} is not allowed in messages.'.format(module, name))
+        return super().find_class(module, name)
+
+
+def encode_frame(msg):
+    """the message with its length as prefix"""
+    payload = pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL)
+    return SocketConnector.HEADER.pack(len(payload)) + payload
+
+
+def decode_message(data):
+    return MessageUnpickler(io.BytesIO(data)).load()
+
+
+def recv_exact(sock, view, n):
+    """receives exactly n bytes into the memoryview"""
+    pos = 0
+    while pos < n:
+        count = sock.recv_into(view[pos:n], n - pos)
+        if count == 0:
+            raise ConnectionError('Connection closed by the other side.')
+        pos += count
+
+
+def read_handshake(sock):
+    """reads the first frame of a connection: (party id, number of frames the party received)"""
+    header = bytearray(SocketConnector.HEADER.size)
+    recv_exact(sock, memoryview(header), len(header))
+    (length,) = SocketConnector.HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionError('Frame of {} bytes exceeds the limit.'.format(length))
+    data = bytearray(length)
+    recv_exact(sock, memoryview(data), length)
+    return decode_message(data)
+
+
+class SocketConnector(LocalConnector):
+    """
+    Connector to another trustee over a TCP connection with length-prefixed frames.
+    A reader thread receives the frames into a preallocated buffer and queues the messages.
+    Sent frames are kept for a while, so they are sent again after a reconnect, if the peer missed them:
+    the handshake of every connection exchanges (party id, number of received frames).
+    """
+
+    HEADER = struct.Struct('<I')
+
+    def __init__(self, id):
+        super().__init__(id)
+        self.sock = None
+        self.lock = Lock()
+        self.connected = Event()
+        self.closed = False
+        self.reader = None
+
+        self.sent = 0
+        self.received = 0
+        self.history = deque(maxlen=RESEND_HISTORY)
+
+        self.header = bytearray(self.HEADER.size)
+        self.buffer = bytearray(1 << 16)
+
+    def send(self, msg):
+        frame = encode_frame(msg)
+        with self.lock:
+            self.history.append(frame)
+            self.sent += 1
+            if self.sock is not None:
+                try:
+                    self.sock.sendall(frame)
+                except OSError as e:
+                    # the frame is sent again after the reconnect
+                    log.info('Connection to trustee {} lost while sending: {!r}'.format(self.id, e))
+                    self._drop(self.sock)
+
+    def wait_connected(self, timeout=None):
+        if not self.connected.wait(timeout):
+            raise TimeoutError('No connection to trustee {} within {}s.'.format(self.id, timeout))
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            if self.sock is not None:
+                self._drop(self.sock)
+
+    def disconnect(self):
+        """closes the current connection, like a network failure would"""
+        with self.lock:
+            if self.sock is not None:
+                self._drop(self.sock)
+
+    def on_disconnect(self):
+        """called by the reader thread after the connection was lost"""
+        pass
+
+    def send_handshake(self, sock, own_id):
+        sock.sendall(encode_frame((own_id, self.received)))
+
+    def _start(self, sock, peer_received):
+        """uses the connection after the handshake: sends the frames the peer missed and starts reading.
+        Returns False, if the connector was closed meanwhile"""
+        sock.settimeout(None)
+        sock.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+        with self.lock:
+            if self.closed:
+                sock.close()
+                return False
+            missing = self.sent - peer_received
+            if missing > len(self.history) or missing < 0:
+                sock.close()
+                raise ValueError('Trustee {} missed {} frames, which are not kept anymore.'.format(self.id, missing))
+            for frame in list(self.history)[len(self.history) - missing:]:
+                sock.sendall(frame)
+            self.sock = sock
+            self.connected.set()
+        self.reader = Thread(target=self._read, args=(sock,), daemon=True)
+        self.reader.start()
+        return True
+
+    def _stop_reader(self):
+        """drops the current connection and waits for its reader, so the count of received frames is final"""
+        with self.lock:
+            if self.sock is not None:
+                self._drop(self.sock)
+        if self.reader is not None:
+            self.reader.join()
+            self.reader = None
+
+    def _drop(self, sock):
+        # the caller holds the lock
+        if self.sock is sock:
+            self.sock = None
+            self.connected.clear()
+        try:
+            sock.shutdown(SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+
+    def _read(self, sock):
+        try:
+            while True:
+                msg = self._read_frame(sock)
+                self.received += 1
+                self.receive_next_msg(msg)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            log.debug('Connection to trustee {} closed: {!r}'.format(self.id, e))
+        with self.lock:
+            self._drop(sock)
+        if not self.closed:
+            self.on_disconnect()
+
+    def _read_frame(self, sock):
+        recv_exact(sock, memoryview(self.header), self.HEADER.size)
+        (length,) = self.HEADER.unpack(self.header)
+        if length > MAX_FRAME_SIZE:
+            raise ConnectionError('Frame of {} bytes exceeds the limit.'.format(length))
+        if length > len(self.buffer):
+            self.buffer = bytearray(max(length, 2 * len(self.buffer)))
+        view = memoryview(self.buffer)
+        recv_exact(sock, view, length)
+        return decode_message(view[:length])
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+
+from gmpy2 import f_div
+from src.crypto.abb import Ciphertext
+from src.network.async_channel import AsyncChannel
+from src.protocols.protocol import Protocol
+from src.protocols.sublinear import (BroadcastRandomMultManyProtocol, EqStorage,
+                                     GtStorage, SublinearEqProtocol,
+                                     SublinearGtProtocol,
+                                     SublinearMultiplicationManyProtocol,
+                                     split_bits)
+from src.util.utils import if_then_else
+
+log = logging.getLogger(__name__)
+
+
+class Scope():
+    """position in the protocol tree, the keys of its messages and branches are numbered in the order they are created"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def next_key(self):
+        key = self.path + (self.count,)
+        self.count += 1
+        return key
+
+
+current_scope = ContextVar('current_scope')
+
+
+async def run_in_scope(path, aw):
+    token = current_scope.set(Scope(path))
+    try:
+        return await aw
+    finally:
+        current_scope.reset(token)
+
+
+async def first(aw):
+    return (await aw)[0]
+
+
+class AsyncProtocol(Protocol):
+    """
+    Protocol whose run is a coroutine. All trustees run it on an event loop of their worker thread
+    and communicate through an AsyncChannel, so independent subprotocols can be awaited concurrently
+    (see gather) and the messages of one tick share a round.
+    The messages are keyed by their position in the protocol tree, which has to be the same for all trustees:
+    a branch only broadcasts or starts subprotocols in a fixed order, concurrent branches are started by gather.
+    Preprocessing pools are not used, since the trustees may schedule the branches in a different order.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.async_channel = None
+
+    def execute(self, *args):
+        return asyncio.run(self._execute(*args))
+
+    async def _execute(self, *args):
+        self.async_channel = AsyncChannel(self.connection, asyncio.get_running_loop())
+        self.async_channel.start()
+        try:
+            return await run_in_scope((), self.run(*args))
+        finally:
+            await self.async_channel.close()
+
+    async def run(self, *args):
+        return 0
+
+    def run_subprotocol(self, protocol, args):
+        """returns the coroutine of the subprotocol"""
+        if not isinstance(protocol, AsyncProtocol):
+            raise TypeError('{} is no AsyncProtocol.'.format(type(protocol).__name__))
+        protocol.init_from_protocol(self)
+        protocol.async_channel = self.async_channel
+        return run_in_scope(current_scope.get().next_key(), protocol.run(*args))
+
+    def local_protocol(self, protocol):
+        """synchronous protocol for the local steps of a primitive, it has no connection"""
+        protocol.set_abb(self.abb)
+        return protocol
+
+    def broadcast_and_receive(self, msg):
+        return self.async_channel.broadcast_and_receive(current_scope.get().next_key(), msg)
+
+    def gather(self, *aws):
+        """awaits the coroutines concurrently, each one in its own branch"""
+        scope = current_scope.get()
+        return asyncio.gather(*[run_in_scope(scope.next_key(), aw) for aw in aws])
+
+    def dec(self, enc_x):
+        return first(self.dec_many([enc_x]))
+
+    def dec_many(self, enc_xs):
+        enc_xs = list(enc_xs)
+        self.abb.op_logger.log_dec(len(enc_xs))
+        return self.run_subprotocol(AsyncDecManyProtocol(), [enc_xs])
+
+    def mul(self, enc_x, enc_y):
+        return first(self.mul_many([enc_x], [enc_y]))
+
+    def mul_many(self, xs, ys):
+        xs = list(xs)
+        ys = list(ys)
+        self.abb.op_logger.log_mul(sum(isinstance(x, Ciphertext) and isinstance(y, Ciphertext) for x, y in zip(xs, ys)))
+        return self.run_subprotocol(AsyncMulManyProtocol(), [xs, ys])
+
+    def eq(self, x, y, bits):
+        return first(self.eq_many([(x, y)], bits))
+
+    def eq_many(self, pairs, bits):
+        pairs = list(pairs)
+        self.abb.op_logger.log_eq(bits, n=len(pairs))
+        return self.run_subprotocol(AsyncEqManyProtocol(), [*self._to_ciphers(pairs), bits])
+
+    def gt(self, x, y, bits):
+        return first(self.gt_many([(x, y)], bits))
+
+    def gt_many(self, pairs, bits):
+        pairs = list(pairs)
+        self.abb.op_logger.log_gt(bits, n=len(pairs))
+        return self.run_subprotocol(AsyncGtManyProtocol(), [*self._to_ciphers(pairs), bits])
+
+    def _to_ciphers(self, pairs):
+        return ([self.abb.convert_to_cipher(x) for x, _ in pairs],
+                [self.abb.convert_to_cipher(y) for _, y in pairs])
+
+
+class AsyncDecManyProtocol(AsyncProtocol):
+
+    async def run(self, enc_xs):
+        enc_xs = list(enc_xs)
+        if len(enc_xs) == 0:
+            return []
+        plaintext_shares = await self.broadcast_and_receive(self.abb.compute_plaintext_shares(enc_xs))
+        return self.abb.reconstruct_plaintexts(plaintext_shares, len(enc_xs))
+
+
+class AsyncMulManyProtocol(AsyncProtocol):
+    """ products of two ciphertexts by the sublinear multiplication, products with constants locally """
+
+    async def run(self, xs, ys):
+        results = [None] * len(xs)
+        secure = []
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            if isinstance(x, Ciphertext) and isinstance(y, Ciphertext):
+                secure.append(i)
+            else:
+                results[i] = x * y
+        if len(secure) == 0:
+            return results
+        enc_xs = [xs[i] for i in secure]
+        enc_ys = [ys[i] for i in secure]
+
+        random_mult = self.local_protocol(BroadcastRandomMultManyProtocol())
+        messages = await self.broadcast_and_receive(random_mult.create_message(enc_ys))
+        enc_ds, enc_es = random_mult.check_messages(enc_ys, messages)
+
+        mult = self.local_protocol(SublinearMultiplicationManyProtocol())
+        ss = await self.run_subprotocol(AsyncDecManyProtocol(), [mult.mask(enc_xs, enc_ds)])
+        for i, product in zip(secure, mult.unmask(enc_ys, ss, enc_es)):
+            results[i] = product
+        return results
+
+
+class AsyncEqManyProtocol(AsyncProtocol):
+    """ the steps of SublinearEqManyProtocol """
+
+    async def run(self, ciphers1, ciphers2, bits_int):
+        if len(ciphers1) == 0:
+            return []
+        eq = self.local_protocol(SublinearEqProtocol())
+        data = EqStorage(self.abb).get_data(bits_int)
+
+        enc_ms = [cipher1 - cipher2 + data['enc_r'] for cipher1, cipher2 in zip(ciphers1, ciphers2)]
+        ms = await self.run_subprotocol(AsyncDecManyProtocol(), [enc_ms])
+        enc_shifted_h_dists = [eq.calc_enc_h_dist(m, bits_int, data) for m in ms]
+        enc_m_hs = await self.run_subprotocol(AsyncMulManyProtocol(), [[data['enc_R_inv']] * len(ms), enc_shifted_h_dists])
+        m_hs = await self.run_subprotocol(AsyncDecManyProtocol(), [enc_m_hs])
+        return [eq.eval_polynomial(m_h, bits_int, data) for m_h in m_hs]
+
+
+class AsyncGtManyProtocol(AsyncProtocol):
+    """ the steps of SublinearGtManyProtocol """
+
+    async def run(self, enc_xs, enc_ys, bits_int):
+        if len(enc_xs) == 0:
+            return []
+        if bits_int == 1:
+            enc_products = await self.run_subprotocol(AsyncMulManyProtocol(), [enc_xs, enc_ys])
+            return [enc_y * (-1) + 1 + enc_product for enc_y, enc_product in zip(enc_ys, enc_products)]
+
+        gt = self.local_protocol(SublinearGtProtocol())
+        data = GtStorage(self.abb).get_data(bits_int)
+
+        enc_zs = [gt.get_enc_diff(enc_x, enc_y) + (2**bits_int) for enc_x, enc_y in zip(enc_xs, enc_ys)]
+
+        bits_low, bits_high = split_bits(bits_int)
+        ms = await self.run_subprotocol(AsyncDecManyProtocol(), [[enc_z + data['enc_r'] for enc_z in enc_zs]])
+        m_lows = [m % (2**bits_low) for m in ms]
+        m_highs = [f_div(m, 2**bits_low) % (2**bits_high) for m in ms]
+
+        enc_bs = await self.run_subprotocol(AsyncEqManyProtocol(), [
+            [self.abb.enc_no_r(m_high) for m_high in m_highs], [data['enc_r_top']] * len(ms), bits_high])
+
+        enc_m_tildes = [if_then_else(enc_b, m_low, m_high) for enc_b, m_low, m_high in zip(enc_bs, m_lows, m_highs)]
+        enc_r_diff = gt.get_enc_diff(data['enc_r_bot'], data['enc_r_top'])
+        enc_b_r_diffs = await self.run_subprotocol(AsyncMulManyProtocol(), [enc_bs, [enc_r_diff] * len(ms)])
+        enc_r_tildes = [enc_b_r_diff + data['enc_r_top'] for enc_b_r_diff in enc_b_r_diffs]
+
+        enc_gt_tildes = await self.run_subprotocol(AsyncGtManyProtocol(), [enc_m_tildes, enc_r_tildes, bits_high])
+
+        return [gt.calc_result(enc_z, m, enc_gt_tilde, data, bits_int)
+                for enc_z, m, enc_gt_tilde in zip(enc_zs, ms, enc_gt_tildes)]
+
+
+class AsyncDuelsDecProtocol(AsyncProtocol):
+    """ [x >= y, x == y] of each pair, all comparisons run concurrently (like the duels of a Condorcet evaluation) """
+
+    async def run(self, pairs, bits):
+        return await self.gather(*[self.duel(x, y, bits) for x, y in pairs])
+
+    async def duel(self, x, y, bits):
+        enc_gt, enc_eq = await self.gather(self.gt(x, y, bits), self.eq(x, y, bits))
+        return await self.dec_many([enc_gt, enc_eq])
@@ -0,0 +1,171 @@
+import logging
+from collections import deque
+from threading import Condition, Lock, Thread
+
+log = logging.getLogger(__name__)
+
+
+class PreprocessingPool():
+    """
+    Pool of one-time preprocessing tuples (fresh masks) of one sublinear storage (eq or gt) and bit width.
+    Tuples are generated offline (fill) or by a background worker whenever the pool runs low.
+    All trustees evaluate the same operations in the same order, so each consumer (the abb of a trustee)
+    has its own cursor: the i-th operation of every trustee uses the i-th tuple.
+    A tuple is dropped as soon as all consumers used it.
+    If a consumer runs out of tuples, it waits for the worker (block) or generates the tuple inline.
+    n_consumers has to be the number of trustees, otherwise used tuples are never dropped.
+    """
+
+    pools = {}
+    pools_lock = Lock()
+
+    def __init__(self, storage, bits_int, n_consumers, low_watermark=16, high_watermark=256, block=True, timeout=60):
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError('Watermarks have to fulfill 0 <= low ({}) <= high ({}).'.format(low_watermark, high_watermark))
+        self.storage = storage
+        self.bits_int = bits_int
+        self.n_consumers = n_consumers
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.block = block
+        self.timeout = timeout
+
+        # entries [tuple, number of consumers, which didn't use it yet], tuples[0] has the index offset
+        self.tuples = deque()
+        self.offset = 0
+        self.cursors = {}
+        self.waiting = 0
+        self.cond = Condition()
+        self.worker = None
+        self.worker_active = False
+
+        self.count_generated = 0
+        self.count_generated_inline = 0
+        self.count_used = 0
+        self.count_waits = 0
+        self.min_depth = None
+
+    @classmethod
+    def get_key(cls, prot, abb, bits_int):
+        return (prot, abb.get_context_key(), bits_int)
+
+    @classmethod
+    def register(cls, pool):
+        """ the sublinear protocols of abbs with the key of the pool use its tuples """
+        with cls.pools_lock:
+            cls.pools[cls.get_key(pool.storage.PROT, pool.storage.abb, pool.bits_int)] = pool
+
+    @classmethod
+    def unregister(cls, pool):
+        with cls.pools_lock:
+            cls.pools.pop(cls.get_key(pool.storage.PROT, pool.storage.abb, pool.bits_int), None)
+
+    @classmethod
+    def get_pool(cls, prot, abb, bits_int):
+        return cls.pools.get(cls.get_key(prot, abb, bits_int))
+
+    def __len__(self):
+        return len(self.tuples)
+
+    def get_depth(self):
+        """ number of tuples left for the consumer, which is furthest ahead """
+        with self.cond:
+            return self._get_depth()
+
+    def _get_depth(self):
+        furthest = max(self.cursors.values()) if len(self.cursors) > 0 else self.offset
+        return self.offset + len(self.tuples) - furthest
+
+    def get_metrics(self):
+        with self.cond:
+            return {
+                'depth': self._get_depth(),
+                'min_depth': self.min_depth,
+                'stored': len(self.tuples),
+                'generated': self.count_generated,
+                'generated_inline': self.count_generated_inline,
+                'used': self.count_used,
+                'waits': self.count_waits,
+            }
+
+    def pop(self, consumer):
+        """ returns the next tuple of the consumer """
+        with self.cond:
+            index = self.cursors.get(consumer, self.offset)
+            while index - self.offset >= len(self.tuples):
+                if not (self.block and self.worker_active):
+                    break
+                self.count_waits += 1
+                self.waiting += 1
+                self.cond.notify_all()
+                arrived = self.cond.wait(self.timeout)
+                self.waiting -= 1
+                if not arrived and index - self.offset >= len(self.tuples):
+                    raise TimeoutError('No preprocessing tuple with {} bits within {}s.'.format(self.bits_int, self.timeout))
+
+            generate = index - self.offset >= len(self.tuples)
+
+        if generate:
+            log.debug('Preprocessing pool ran dry, generate tuple with {} bits inline.'.format(self.bits_int))
+            self.fill(1)
+            with self.cond:
+                self.count_generated_inline += 1
+
+        with self.cond:
+            entry = self.tuples[index - self.offset]
+            entry[1] -= 1
+            self.cursors[consumer] = index + 1
+            if entry[1] == 0:
+                self.count_used += 1
+            while len(self.tuples) > 0 and self.tuples[0][1] == 0:
+                self.tuples.popleft()
+                self.offset += 1
+
+            depth = self._get_depth()
+            if self.min_depth is None or depth < self.min_depth:
+                self.min_depth = depth
+            if depth < self.low_watermark:
+                self.cond.notify_all()
+            return entry[0]
+
+    def fill(self, count=None):
+        """ generates tuples until the depth reaches the high watermark (or count new tuples) """
+        if count is None:
+            count = max(0, self.high_watermark - self.get_depth())
+        for _ in range(count):
+            data = self.storage.generate_tuple(self.bits_int)
+            with self.cond:
+                self.tuples.append([data, self.n_consumers])
+                self.count_generated += 1
+                self.cond.notify_all()
+        return count
+
+    def start_worker(self):
+        """ starts a daemon thread refilling the pool up to the high watermark
+        whenever its depth drops below the low watermark """
+        if self.worker is not None:
+            return
+        self.worker_active = True
+        self.worker = Thread(target=self._refill_loop, daemon=True)
+        self.worker.start()
+
+    def stop_worker(self):
+        with self.cond:
+            self.worker_active = False
+            self.cond.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    def _refill_loop(self):
+        while True:
+            with self.cond:
+                while self.worker_active and self._get_depth() >= self.low_watermark and self.waiting == 0:
+                    self.cond.wait()
+                if not self.worker_active:
+                    return
+                missing = max(1, self.high_watermark - self._get_depth())
+            log.debug('Refill preprocessing pool ({} bits) with {} tuples.'.format(self.bits_int, missing))
+            # generate in small steps, so waiting consumers continue early
+            while missing > 0 and self.worker_active:
+                missing -= self.fill(min(missing, 4))
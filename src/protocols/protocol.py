@@ -1,6 +1,6 @@
 import logging
 
-from src.crypto.abb import Ciphertext
+from src.crypto.abb import ContextRegistry
 import traceback
 
 log = logging.getLogger(__name__)
@@ -39,10 +39,10 @@ class Protocol():
 
     def start(self, *args):
         try:
-            for arg in args:
-                if isinstance(arg, Ciphertext):
-                    arg.abb = self.abb
-            out = self.run(*args)
+            if self.abb is not None:
+                # ciphertext operations of this thread are evaluated by the abb of this protocol
+                ContextRegistry.activate(self.abb)
+            out = self.execute(*args)
             if self.top_protocol:
                 self.output_func(out)
             return out
@@ -55,6 +55,10 @@ class Protocol():
             else:
                 raise(e)
 
+    def execute(self, *args):
+        """runs the protocol, protocols with another execution model (see AsyncProtocol) override it"""
+        return self.run(*args)
+
     def run(self, args):
         return 0
 
@@ -69,6 +73,12 @@ class DecProtocol(Protocol):
         return self.abb.dec(enc_x)
 
 
+class DecManyProtocol(Protocol):
+
+    def run(self, enc_xs):
+        return self.abb.dec_many(enc_xs)
+
+
 class GtDecProtocol(Protocol):
 
     def run(self, enc_x, enc_y, bits):
@@ -83,8 +93,26 @@ class EqDecProtocol(Protocol):
         return self.abb.dec(enc_z)
 
 
+class EqManyDecProtocol(Protocol):
+
+    def run(self, pairs, bits):
+        return self.abb.dec_many(self.abb.eq_many(pairs, bits))
+
+
+class GtManyDecProtocol(Protocol):
+
+    def run(self, pairs, bits):
+        return self.abb.dec_many(self.abb.gt_many(pairs, bits))
+
+
 class MulDecProtocol(Protocol):
 
     def run(self, enc_x, enc_y):
         enc_z = enc_x * enc_y
         return self.abb.dec(enc_z)
+
+
+class MulManyDecProtocol(Protocol):
+
+    def run(self, xs, ys):
+        return self.abb.dec_many(self.abb.mul_many(xs, ys))
@@ -26,6 +26,30 @@ class ProtocolSuite():
         prot.abb = self.abb
         return prot
 
+    def preprocess(self, abb, bits_list):
+        """generates the data needed by eq and gt tests with the given bit widths in advance"""
+        pass
+
+    def create_preprocessing_pools(self, abb, eq_ops, gt_ops, n_consumers=None, fill=True, **pool_args):
+        """creates pools of one-time preprocessing data for the expected eq and gt operations (dicts bits -> count)"""
+        return []
+
+    def mul_many(self, ciphers1, ciphers2):
+        """independent multiplications, suites without a batched protocol run them one after another"""
+        return [self.mul(cipher1, cipher2) for cipher1, cipher2 in zip(ciphers1, ciphers2)]
+
+    def eq_many(self, ciphers1, ciphers2, bits):
+        """independent equality tests, suites without a batched protocol run them one after another"""
+        return [self.eq(cipher1, cipher2, bits) for cipher1, cipher2 in zip(ciphers1, ciphers2)]
+
+    def gt_many(self, ciphers1, ciphers2, bits):
+        """independent greater-than tests, suites without a batched protocol run them one after another"""
+        return [self.gt(cipher1, cipher2, bits) for cipher1, cipher2 in zip(ciphers1, ciphers2)]
+
+    def create_mul_material_pool(self, count, fill=True, **pool_args):
+        """creates a pool of precomputed input independent multiplication material of the trustee of this suite"""
+        return None
+
     @abc.abstractmethod
     def add(self, cipher1, cipher2):
         pass
@@ -1,26 +1,42 @@
 import abc
 import logging
 from os import getcwd, makedirs
-from os.path import exists, join
+from os.path import dirname, exists, join
 from random import choice, randrange
 from threading import Lock
 
 import numpy as np
 import yaml
 
-from gmpy2 import (add, f_div, fac, gcd, invert, mpz, mpz_random, mul, powmod,
-                   random_state, log2)
+from gmpy2 import (add, f_div, fac, gcd, invert, mpz, mpz_random, mpz_urandomb,
+                   mul, powmod, random_state, log2)
+from src.crypto.cipher_vector import CipherVector
+from src.protocols.preprocessing_pool import PreprocessingPool
 from src.protocols.protocol import Protocol
 from src.protocols.protocol_suite import ProtocolSuite
-from src.util.utils import get_binary_representation, if_then_else, minus1to
+from src.util.binary_store import BinaryStore
+from src.util.utils import (get_binary_representation, if_then_else, minus1to,
+                            multi_powmod)
 
 log = logging.getLogger(__name__)
 
+# bits of the random exponents of the batch verification, a wrong proof passes with probability 2^-BATCH_SECURITY
+BATCH_SECURITY = 40
+
 
 class SubLinearProtocolSuite(ProtocolSuite):
 
     def __init__(self):
         super().__init__()
+        self.batch_verification = True
+
+    def set_batch_verification(self, enabled):
+        """
+        With batch verification the proofs of correct multiplication of all trustees and factors
+        of a multiplication round are checked together (see BatchVerifyCorrectMulProtocol),
+        otherwise each proof is checked on its own.
+        """
+        self.batch_verification = enabled
 
     def add(self, cipher1, cipher2):
         raise NotImplementedError()
@@ -29,40 +45,178 @@ class SubLinearProtocolSuite(ProtocolSuite):
         protocol = self.init_protocol(SublinearMultiplicationProtocol())
         return protocol.start(cipher1, cipher2)
 
+    def mul_many(self, ciphers1, ciphers2):
+        protocol = self.init_protocol(SublinearMultiplicationManyProtocol())
+        return protocol.start(ciphers1, ciphers2)
+
     def eq(self, cipher1, cipher2, bits):
         protocol = self.init_protocol(SublinearEqProtocol())
         return protocol.start(cipher1, cipher2, bits)
 
+    def eq_many(self, ciphers1, ciphers2, bits):
+        protocol = self.init_protocol(SublinearEqManyProtocol())
+        return protocol.start(ciphers1, ciphers2, bits)
+
     def gt(self, cipher1, cipher2, bits):
         protocol = self.init_protocol(SublinearGtProtocol())
         return protocol.start(cipher1, cipher2, bits)
 
+    def gt_many(self, ciphers1, ciphers2, bits):
+        protocol = self.init_protocol(SublinearGtManyProtocol())
+        return protocol.start(ciphers1, ciphers2, bits)
+
+    def preprocess(self, abb, bits_list):
+        eq_bits, gt_bits = get_preprocessing_bits(bits_list)
+        for bits in sorted(eq_bits):
+            EqStorage(abb).get_data(bits)
+        for bits in sorted(gt_bits):
+            GtStorage(abb).get_data(bits)
+
+    def create_preprocessing_pools(self, abb, eq_ops, gt_ops, n_consumers=None, fill=True, **pool_args):
+        """
+        creates and registers pools of one-time tuples for the expected operations
+        (dicts bits -> count, like the counts of the ABBLogger of a previous run).
+        The capacity of each pool is the planned number of tuples, with fill the pools are filled offline.
+        pool_args are passed to PreprocessingPool (e.g. block or the watermarks).
+        """
+        pools = []
+        for (prot, bits), count in sorted(get_tuple_counts(eq_ops, gt_ops).items()):
+            storage = EqStorage(abb) if prot == EqStorage.PROT else GtStorage(abb)
+            args = dict(pool_args)
+            args.setdefault('high_watermark', count)
+            args.setdefault('low_watermark', min(16, args['high_watermark']))
+            pool = PreprocessingPool(storage, bits, n_consumers or abb.num_shares, **args)
+            if fill:
+                pool.fill(count)
+            PreprocessingPool.register(pool)
+            pools.append(pool)
+        return pools
+
+    def create_mul_material_pool(self, count, fill=True, **pool_args):
+        """
+        creates and registers a pool with the multiplication material of the trustee of this suite.
+        Every trustee has to create its own pool.
+        """
+        return create_mul_material_pool(self.abb, count, fill, **pool_args)
+
+
+def create_mul_material_pool(abb, count, fill=True, **pool_args):
+    """
+    creates and registers the pool of multiplication material of the trustee of abb
+    (see MulMaterialGenerator), the capacity is count (e.g. from get_mul_count)
+    """
+    args = dict(pool_args)
+    args.setdefault('high_watermark', count)
+    args.setdefault('low_watermark', min(16, args['high_watermark']))
+    pool = PreprocessingPool(MulMaterialGenerator(abb), 0, 1, **args)
+    if fill:
+        pool.fill(count)
+    PreprocessingPool.register(pool)
+    return pool
+
+
+def get_tuple_counts(eq_ops, gt_ops):
+    """returns the number of preprocessing tuples (dict (prot, bits) -> count) needed by
+    the given eq and gt operations (dicts bits -> count), including all recursion levels of gt"""
+    counts = {}
+    for bits, n in eq_ops.items():
+        counts[(EqStorage.PROT, bits)] = counts.get((EqStorage.PROT, bits), 0) + n
+    for bits, n in gt_ops.items():
+        while bits > 1:
+            counts[(GtStorage.PROT, bits)] = counts.get((GtStorage.PROT, bits), 0) + n
+            bits = split_bits(bits)[1]
+            counts[(EqStorage.PROT, bits)] = counts.get((EqStorage.PROT, bits), 0) + n
+    return counts
+
+
+def get_preprocessing_data(abb, storage_cls, bits_int):
+    """returns a one-time tuple, if a preprocessing pool is registered for the key of abb, otherwise the stored data"""
+    pool = PreprocessingPool.get_pool(storage_cls.PROT, abb, bits_int)
+    if pool is not None:
+        return pool.pop(abb)
+    return storage_cls(abb).get_data(bits_int)
+
+
+def get_mul_material(abb):
+    """returns the input independent material of a multiplication of the trustee of abb,
+    taken from its preprocessing pool if one is registered, otherwise generated inline.
+    Abbs without key share (e.g. the setup or a local abb) have no pool"""
+    if getattr(abb, 'sk', None) is not None:
+        pool = PreprocessingPool.get_pool(MulMaterialGenerator.get_prot(abb), abb, 0)
+        if pool is not None:
+            return pool.pop(abb)
+    return MulMaterialGenerator(abb).generate_tuple(0)
+
+
+def get_mul_count(eq_ops, gt_ops, mul_ops=0):
+    """returns the number of secure multiplications of the given eq and gt operations (dicts bits -> count)
+    and mul_ops further multiplications"""
+    count = mul_ops + sum(eq_ops.values())
+    for bits, n in gt_ops.items():
+        # every level multiplies once and runs an eq test, the last level multiplies once
+        while bits > 1:
+            count += 2 * n
+            bits = split_bits(bits)[1]
+        count += n
+    return count
+
+
+def split_bits(bits_int):
+    """returns the number of low and high bits of a gt test with bits_int bits,
+    the high part (and the recursion) gets the extra bit of odd widths"""
+    return bits_int // 2, bits_int - bits_int // 2
+
+
+def get_preprocessing_bits(bits_list):
+    """returns the bit widths of eq and gt data needed by eq and gt tests with the given bit widths"""
+    eq_bits = set()
+    gt_bits = set()
+    for bits in bits_list:
+        eq_bits.add(bits)
+        while bits > 1:
+            gt_bits.add(bits)
+            bits = split_bits(bits)[1]
+            eq_bits.add(bits)
+        gt_bits.add(bits)
+    return eq_bits, gt_bits
+
 
 class SublinearMultiplicationProtocol(Protocol):
 
     def run(self, enc_x, enc_y):
-        enc_d, enc_e = self.run_subprotocol(
-            BroadcastRandomMultProtocol(), [enc_y])
+        return self.run_subprotocol(SublinearMultiplicationManyProtocol(), [[enc_x], [enc_y]])[0]
+
 
-        enc_s = enc_x
-        for enc_d_i in enc_d:
-            enc_s += enc_d_i[1]
+class SublinearMultiplicationManyProtocol(Protocol):
+    """ independent multiplications in the rounds of one: one broadcast of the masks, products and proofs
+    of all factors and one decryption of all masked factors """
 
-        s = self.abb.dec(enc_s)
+    def run(self, enc_xs, enc_ys):
+        if len(enc_xs) == 0:
+            return []
+        enc_ds, enc_es = self.run_subprotocol(BroadcastRandomMultManyProtocol(), [enc_ys])
+        ss = self.abb.dec_many(self.mask(enc_xs, enc_ds))
+        return self.unmask(enc_ys, ss, enc_es)
 
-        enc_mult = enc_y * s
-        enc_res = enc_mult
-        for enc_e_i in enc_e:
-            enc_res = enc_res - enc_e_i[1]
+    def mask(self, enc_xs, enc_ds):
+        """x + sum of the masks d of all parties"""
+        enc_ss = CipherVector.from_ciphers(self.abb, enc_xs)
+        for _, enc_d in enc_ds:
+            enc_ss.accumulate(enc_d)
+        return enc_ss
 
-        return enc_res
+    def unmask(self, enc_ys, ss, enc_es):
+        """x * y = y * (x + sum d) - sum of the products e = y * d of all parties"""
+        enc_es_sum = CipherVector.zeros(self.abb, len(enc_ys))
+        for _, enc_e in enc_es:
+            enc_es_sum.accumulate(enc_e)
+        return [enc_y * s - enc_e for enc_y, s, enc_e in zip(enc_ys, ss, enc_es_sum)]
 
 
 class SublinearEqProtocol(Protocol):
 
     def run(self, cipher1, cipher2, bits_int):
-        storage = EqStorage(self.abb)
-        data = storage.get_data(bits_int)
+        data = get_preprocessing_data(self.abb, EqStorage, bits_int)
 
         enc_x = cipher1 - cipher2
 
@@ -71,64 +225,74 @@ class SublinearEqProtocol(Protocol):
         enc_shifted_h_dist = self.calc_enc_h_dist(m, bits_int, data)
         enc_m_h = data['enc_R_inv'] * enc_shifted_h_dist
         m_h = self.abb.dec(enc_m_h)
-        enc_powers = [data['enc_pow_R'][i-1] * powmod(
-            m_h, i, self.abb.pk.n) for i in range(1, bits_int + 2)]
-        enc_eval = self.abb.enc_no_r(data['poly_coeffs'][0])
+        return self.eval_polynomial(m_h, bits_int, data)
 
-        max_power = min(len(data['poly_coeffs']), len(enc_powers))
-        for i in range(1, len(data['poly_coeffs'])):
-            temp = enc_powers[i-1] * data['poly_coeffs'][i]
-            enc_eval = enc_eval + temp
-
-        return enc_eval
+    def eval_polynomial(self, m_h, bits_int, data):
+        # polynomial sum(coeffs[i] * (R * m_h)^i) as one linear combination of the encrypted powers of R
+        n = self.abb.pk.n
+        coeffs = data['poly_coeffs']
+        weights = [(powmod(m_h, i, n) * coeffs[i]) % n for i in range(1, min(len(coeffs), bits_int + 2))]
+        return self.abb.linear_combination(data['enc_pow_R'][:len(weights)], weights, coeffs[0])
 
     def calc_enc_h_dist(self, m, bits_int, data):
         bin_m = get_binary_representation(m, bits_int)
-        enc_h_dist = self.abb.enc_no_r(0)
-        for i in range(bits_int):
-            bit_m = bin_m[len(bin_m) - i - 1]
-            enc_bit_r = data['enc_bits_r'][len(data['enc_bits_r']) - i - 1]
-            enc_s = enc_bit_r + bit_m
-            enc_neg_p = enc_bit_r * (- 2 * bit_m)
-            enc_xor = enc_s + enc_neg_p
-            enc_h_dist = enc_h_dist + enc_xor
-        # Add 1 to hamming distance
-        return enc_h_dist + 1
+        enc_bits_r = data['enc_bits_r']
+        enc_bits = [enc_bits_r[len(enc_bits_r) - i - 1] for i in range(bits_int)]
+        bits_m = [bin_m[len(bin_m) - i - 1] for i in range(bits_int)]
+        # bit_r xor bit_m = bit_r * (1 - 2 * bit_m) + bit_m, add 1 to hamming distance
+        return self.abb.linear_combination(enc_bits, [1 - 2 * bit_m for bit_m in bits_m], sum(bits_m) + 1)
+
+
+class SublinearEqManyProtocol(SublinearEqProtocol):
+    """ independent equality tests in lockstep: every step decrypts the values of all tests together,
+    so k tests need the rounds of one """
+
+    def run(self, ciphers1, ciphers2, bits_int):
+        datas = [get_preprocessing_data(self.abb, EqStorage, bits_int) for _ in ciphers1]
+
+        enc_ms = [cipher1 - cipher2 + data['enc_r'] for cipher1, cipher2, data in zip(ciphers1, ciphers2, datas)]
+        ms = self.abb.dec_many(enc_ms)
+        enc_shifted_h_dists = [self.calc_enc_h_dist(m, bits_int, data) for m, data in zip(ms, datas)]
+        enc_m_hs = self.abb.mul_many([data['enc_R_inv'] for data in datas], enc_shifted_h_dists)
+        m_hs = self.abb.dec_many(enc_m_hs)
+        return [self.eval_polynomial(m_h, bits_int, data) for m_h, data in zip(m_hs, datas)]
 
 
 class SublinearGtProtocol(Protocol):
 
     def run(self, enc_x, enc_y, bits_int):
-        storage = GtStorage(self.abb)
-        data = storage.get_data(bits_int)
-
         if bits_int == 1:
             return self.recursion_abort(enc_x, enc_y)
 
+        data = get_preprocessing_data(self.abb, GtStorage, bits_int)
+
         # enc z
         enc_diff = self.get_enc_diff(enc_x, enc_y)
         enc_z = enc_diff + (2**bits_int)
 
         # calc m
-        powmod_half = powmod(2, int(bits_int/2), self.abb.pk.n)
+        bits_low, bits_high = split_bits(bits_int)
         enc_m = enc_z + data['enc_r']
         m = self.abb.dec(enc_m)
-        m_low = m % powmod_half
-        m_high = f_div(m, powmod_half) % powmod_half
+        m_low = m % (2**bits_low)
+        m_high = f_div(m, 2**bits_low) % (2**bits_high)
         enc_m_high = self.abb.enc_no_r(m_high)
 
         # eq test
-        enc_b = self.abb.eq(enc_m_high, data['enc_r_top'], bits_int//2)
+        enc_b = self.abb.eq(enc_m_high, data['enc_r_top'], bits_high)
 
         # calc tilde
         enc_m_tilde = if_then_else(enc_b, m_low, m_high)
         enc_r_diff = self.get_enc_diff(data['enc_r_bot'], data['enc_r_top'])
         enc_r_tilde = (enc_b * enc_r_diff) + data['enc_r_top']
 
-        # rec step
-        enc_gt_tilde = self.abb.gt(enc_m_tilde, enc_r_tilde, bits_int // 2)
+        # rec step, the low bits are compared with the (not shorter) high bits
+        enc_gt_tilde = self.abb.gt(enc_m_tilde, enc_r_tilde, bits_high)
+
+        return self.calc_result(enc_z, m, enc_gt_tilde, data, bits_int)
 
-        # calc result
+    def calc_result(self, enc_z, m, enc_gt_tilde, data, bits_int):
+        powmod_half = 2**split_bits(bits_int)[0]
         enc_f = enc_gt_tilde * (-1) + 1
         powmod_all = powmod(2, bits_int, self.abb.pk.n)
         enc_f_mul = enc_f * powmod_all
@@ -149,23 +313,83 @@ class SublinearGtProtocol(Protocol):
         return self.run_subprotocol(EncDiffProtocol(), [enc_x, enc_y])
 
 
-class BroadcastRandomMultProtocol(Protocol):
-
-    def run(self, enc_y):
-        d = self.abb.get_random_plaintext()
-        enc_d, r = self.abb.enc_get_r(d)
-        enc_e = enc_y * d
+class SublinearGtManyProtocol(SublinearGtProtocol):
+    """ independent greater-than tests in lockstep: all tests run through each recursion level together,
+    the decryptions, the inner eq tests and the multiplications of a level are batched,
+    so k tests need the rounds of one """
 
-        proof = self.run_subprotocol(ProofCorrectMulProtocol(), [enc_y, enc_d, enc_e, d, r, 1])
-
-        enc_d_list = self.broadcast_and_receive(enc_d)
-        enc_e_list = self.broadcast_and_receive(enc_e)
-        zk_proofs = self.broadcast_and_receive(proof)
-
-        for enc_d, enc_e, proof in zip(enc_d_list, enc_e_list, zk_proofs):
-            v = self.run_subprotocol(VerifyCorrectMulProtocol(), [enc_y, enc_d[1], enc_e[1], proof[1][0], proof[1][1], proof[1][2]])
-            if not v:
-                raise ValueError('ZK proof failed.')
+    def run(self, enc_xs, enc_ys, bits_int):
+        if len(enc_xs) == 0:
+            return []
+        if bits_int == 1:
+            enc_products = self.abb.mul_many(enc_xs, enc_ys)
+            return [enc_y * (-1) + 1 + enc_product for enc_y, enc_product in zip(enc_ys, enc_products)]
+
+        datas = [get_preprocessing_data(self.abb, GtStorage, bits_int) for _ in enc_xs]
+
+        enc_zs = [self.get_enc_diff(enc_x, enc_y) + (2**bits_int) for enc_x, enc_y in zip(enc_xs, enc_ys)]
+
+        bits_low, bits_high = split_bits(bits_int)
+        ms = self.abb.dec_many([enc_z + data['enc_r'] for enc_z, data in zip(enc_zs, datas)])
+        m_lows = [m % (2**bits_low) for m in ms]
+        m_highs = [f_div(m, 2**bits_low) % (2**bits_high) for m in ms]
+
+        enc_bs = self.abb.eq_many([(self.abb.enc_no_r(m_high), data['enc_r_top']) for m_high, data in zip(m_highs, datas)],
+                                  bits_high)
+
+        enc_m_tildes = [if_then_else(enc_b, m_low, m_high) for enc_b, m_low, m_high in zip(enc_bs, m_lows, m_highs)]
+        enc_r_diffs = [self.get_enc_diff(data['enc_r_bot'], data['enc_r_top']) for data in datas]
+        enc_b_r_diffs = self.abb.mul_many(enc_bs, enc_r_diffs)
+        enc_r_tildes = [enc_b_r_diff + data['enc_r_top'] for enc_b_r_diff, data in zip(enc_b_r_diffs, datas)]
+
+        enc_gt_tildes = self.abb.gt_many(list(zip(enc_m_tildes, enc_r_tildes)), bits_high)
+
+        return [self.calc_result(enc_z, m, enc_gt_tilde, data, bits_int)
+                for enc_z, m, enc_gt_tilde, data in zip(enc_zs, ms, enc_gt_tildes, datas)]
+
+
+class BroadcastRandomMultManyProtocol(Protocol):
+
+    def run(self, enc_ys):
+        # masks, products and proofs of all factors in one message
+        messages = self.broadcast_and_receive(self.create_message(enc_ys))
+        return self.check_messages(enc_ys, messages)
+
+    def create_message(self, enc_ys):
+        enc_ds = []
+        enc_es = []
+        proofs = []
+        for enc_y in enc_ys:
+            # the mask and the announcement of the proof don't depend on enc_y
+            material = get_mul_material(self.abb)
+            d = material['d']
+            enc_d = material['enc_d']
+            enc_e = enc_y * d
+            enc_ds.append(enc_d)
+            enc_es.append(enc_e)
+            proofs.append(self.run_subprotocol(ProofCorrectMulProtocol(), [enc_y, enc_d, enc_e, d, material['r'], 1, material]))
+        return enc_ds, enc_es, proofs
+
+    def check_messages(self, enc_ys, messages):
+        """verifies the proofs of all parties, returns their masks and products as lists of (party, list)"""
+        enc_d_list = []
+        enc_e_list = []
+        statements = []
+        parties = []
+        for party, (enc_ds, enc_es, proofs) in messages:
+            for enc_y, enc_d, enc_e, proof in zip(enc_ys, enc_ds, enc_es, proofs):
+                statements.append((enc_y, enc_d, enc_e, proof[0], proof[1], proof[2]))
+                parties.append(party)
+            enc_d_list.append((party, enc_ds))
+            enc_e_list.append((party, enc_es))
+
+        if getattr(self.abb.prot_suite, 'batch_verification', False):
+            failed = self.run_subprotocol(BatchVerifyCorrectMulProtocol(), [statements])
+        else:
+            failed = [i for i, statement in enumerate(statements)
+                      if not self.run_subprotocol(VerifyCorrectMulProtocol(), list(statement))]
+        if len(failed) > 0:
+            raise ValueError('ZK proof of party {} failed.'.format(parties[failed[0]]))
 
         return enc_d_list, enc_e_list
 
@@ -178,13 +402,17 @@ class EncDiffProtocol(Protocol):
 
 class ProofCorrectMulProtocol(Protocol):
 
-    def run(self, enc_x, enc_y, enc_z, y, r, s):
+    def run(self, enc_x, enc_y, enc_z, y, r, s, material=None):
+        """material: precomputed announcement randomness (a, enc_a, u, v, v_n), see MulMaterialGenerator"""
+        if material is None:
+            material = MulMaterialGenerator(self.abb).generate_announcement()
         # announcement
-        a = self.abb.get_random_plaintext()
-        enc_a, u = self.abb.enc_get_r(a)
+        a = material['a']
+        enc_a = material['enc_a']
+        u = material['u']
+        v = material['v']
         enc_b = enc_x * a
-        v = self.abb.get_r()
-        enc_b = self.abb.randomize(enc_b, r=v)
+        enc_b = self.abb.init_cipher((enc_b.val * material['v_n']) % self.abb.pk.n_sq)
         announcement = (enc_a, enc_b)
 
         # challenge
@@ -226,56 +454,215 @@ class VerifyCorrectMulProtocol(Protocol):
         return True
 
 
+class BatchVerifyCorrectMulProtocol(Protocol):
+    """
+    Checks many proofs of correct multiplication (statements as the arguments of VerifyCorrectMulProtocol) at once.
+    Both equations of every proof are raised to random exponents with BATCH_SECURITY bits and multiplied,
+    so all proofs cost few multi-exponentiations and a single exponentiation with n.
+    Elements of small order, which could cancel out, are encryptions of 0 and don't change the checked plaintexts.
+    If the combined check fails, the statements are halved until the wrong proofs are found.
+    """
+
+    def run(self, statements):
+        """returns the indices of the wrong proofs"""
+        if len(statements) == 0:
+            return []
+        if len(statements) == 1:
+            return [] if self.run_subprotocol(VerifyCorrectMulProtocol(), list(statements[0])) else [0]
+        if self.check(statements):
+            return []
+        log.info('Batch verification of {} proofs fails, locate the wrong proofs.'.format(len(statements)))
+        half = len(statements) // 2
+        return self.run(statements[:half]) + [half + i for i in self.run(statements[half:])]
+
+    def check(self, statements):
+        pk = self.abb.pk
+        # first equations: g^d * e^n = enc_y^c * enc_a, second equations: enc_x^d * f^n = enc_z^c * enc_b
+        plain = 0
+        r_bases, r_exps = [], []
+        x_exps = {}
+        right_bases, right_exps = [], []
+        for enc_x, enc_y, enc_z, (enc_a, enc_b), c, (d, e, f) in statements:
+            t1 = mpz_urandomb(self.abb.rand, BATCH_SECURITY) + 1
+            t2 = mpz_urandomb(self.abb.rand, BATCH_SECURITY) + 1
+            plain += t1 * d
+            r_bases += [e, f]
+            r_exps += [t1, t2]
+            # the factors are shared by the proofs of all trustees
+            x_exps[enc_x.val] = x_exps.get(enc_x.val, 0) + t2 * d
+            right_bases += [enc_y.val, enc_a.val, enc_z.val, enc_b.val]
+            right_exps += [t1 * c, t1, t2 * c, t2]
+
+        left = pk.encode_const(plain % pk.n)
+        left = (left * powmod(multi_powmod(r_bases, r_exps, pk.n_sq), pk.n, pk.n_sq)) % pk.n_sq
+        left = (left * multi_powmod(list(x_exps.keys()), list(x_exps.values()), pk.n_sq)) % pk.n_sq
+        return left == multi_powmod(right_bases, right_exps, pk.n_sq)
+
+
+class MulMaterialGenerator():
+    """
+    Input independent parts of a multiplication of one trustee: the random mask d with its encryption
+    and the randomness of the announcement of the proof of correct multiplication.
+    The material is secret, it is only used by the trustee of abb and isn't stored in files.
+    """
+
+    def __init__(self, abb):
+        self.abb = abb
+        # pools of the material are registered per trustee
+        self.PROT = self.get_prot(abb)
+
+    @classmethod
+    def get_prot(cls, abb):
+        sk = getattr(abb, 'sk', None)
+        return ('mul', sk.index if sk is not None else None)
+
+    def generate_tuple(self, bits_int=0):
+        material = self.generate_announcement()
+        material['d'] = self.abb.get_random_plaintext()
+        material['enc_d'], material['r'] = self.abb.enc_get_r(material['d'])
+        return material
+
+    def generate_announcement(self):
+        material = {}
+        material['a'] = self.abb.get_random_plaintext()
+        material['enc_a'], material['u'] = self.abb.enc_get_r(material['a'])
+        material['v'] = self.abb.get_r()
+        material['v_n'] = powmod(material['v'], self.abb.pk.n, self.abb.pk.n_sq)
+        return material
+
+
 class SublinearStorage():
+    """
+    Preprocessing data of the sublinear protocols, stored in one binary store per key size (see BinaryStore)
+    with a record per key and bit width. The groups of a record are the FIELDS of the storage.
+    Data of yaml files, which were not migrated, is still readable.
+    Loaded data is kept in a process wide cache keyed by (storage, ABB type, n, bits),
+    so only the first access of each key reads (or generates) the file.
+    The cached dicts and ciphertexts are shared by all trustees and must not be modified.
+    """
 
     __metaclass__ = abc.ABCMeta
     lock = Lock()
+    cache = {}
 
     def __init__(self, prot, abb):
         self.abb = abb
+        self.prot = prot
         self.rand = random_state(randrange(1234567891011121314))
         abb_name = type(self.abb).__name__
         self.data_path = join('data', 'sublinear', abb_name, prot)
-        self.create_dir(self.data_path)
 
     def create_dir(self, dir):
         makedirs(dir, exist_ok=True)
 
+    def _get_cache_key(self, bits_int):
+        return (self.prot, type(self.abb).__name__, str(self.abb.pk.n), bits_int)
+
     def get_data(self, bits_int):
         """ used to obtain data with given bits. 
         If no such data is stored, it will be generated """
-        self.lock.acquire()
-        result = None
-        try:
-            generate = False
-            filename = self._get_filename(self.abb.pk.bits, bits_int)
-            if not exists(filename):
-                generate = True
-            else:
-                data = self._load_data_file(filename)
-                if not str(self.abb.pk.n) in data.keys():
-                    generate = True
-            if generate:
-                log.info('No data stored for this parameters.')
-                self._generate_data(filename, bits_int)
-
-            data = self._load_data_file(filename)
-            result = self._recreate_data(data[str(self.abb.pk.n)])
-        finally:
-            self.lock.release()
+        # reads without lock: entries are only added or removed as a whole
+        result = self.cache.get(self._get_cache_key(bits_int))
+        if result is not None:
+            return result
+        with self.lock:
+            result = self.cache.get(self._get_cache_key(bits_int))
+            if result is None:
+                result = self._load_data(bits_int)
+                self.cache[self._get_cache_key(bits_int)] = result
         return result
 
-    def _get_filename(self, key_bits, int_bits):
+    def reload(self, bits_int):
+        """ drops the cached data with given bits and loads it from the file again """
+        self.invalidate(self.abb, bits_int)
+        return self.get_data(bits_int)
+
+    @classmethod
+    def invalidate(cls, abb=None, bits_int=None):
+        """ drops cached data of all storages, restricted to the key of abb and to bits_int if given """
+        with cls.lock:
+            for key in list(cls.cache.keys()):
+                _, abb_name, n, bits = key
+                if abb is not None and (abb_name != type(abb).__name__ or n != str(abb.pk.n)):
+                    continue
+                if bits_int is not None and bits != bits_int:
+                    continue
+                del cls.cache[key]
+
+    def _load_data(self, bits_int):
+        """ reads the data from the file, generates it if it isn't stored """
+        values = self._read_data(bits_int)
+        if values is None:
+            log.info('No data stored for this parameters.')
+            self.create_dir(self.data_path)
+            self._generate_data(bits_int)
+            values = self._read_data(bits_int)
+        return self._recreate_data(values)
+
+    def _read_data(self, bits_int):
+        """ values of this key from the binary store or from a yaml file, which was not migrated """
+        filename = self._get_filename(self.abb.pk.bits)
+        if exists(filename):
+            groups = BinaryStore.open(filename).get(self.abb.pk.n, bits_int)
+            if groups is not None:
+                return self.from_groups(groups)
+        filename = self._get_yaml_filename(self.abb.pk.bits, bits_int)
+        if exists(filename):
+            return self._load_data_file(filename).get(str(self.abb.pk.n))
+        return None
+
+    def _get_filename(self, key_bits):
+        return join(getcwd(), self.data_path, '{}K.bin'.format(key_bits))
+
+    def _get_yaml_filename(self, key_bits, int_bits):
         return join(getcwd(), self.data_path, '{}K-{}-I.yaml'.format(key_bits, int_bits))
 
-    def _load_data_file(self, filename):
+    @classmethod
+    def _load_data_file(cls, filename):
         file = open(filename, 'r', encoding='utf-8')
         out = yaml.load(file.read(), Loader=yaml.FullLoader)
         file.close()
         return out
 
+    def _write_data(self, bits_int, values):
+        """ appends the values of this key to the binary store """
+        store = BinaryStore.open(self._get_filename(self.abb.pk.bits))
+        store.append(self.abb.pk.n, bits_int, self.to_groups(values))
+
+    def _generate_data(self, int_bits):
+        data = self.generate_tuple(int_bits)
+        values = {}
+        for name, is_list in self.FIELDS:
+            if is_list:
+                values[name] = [getattr(v, 'val', v) for v in data[name]]
+            else:
+                values[name] = getattr(data[name], 'val', data[name])
+        self._write_data(int_bits, values)
+
+    @classmethod
+    def to_groups(cls, values):
+        """ groups of integers of a binary store record in the order of FIELDS """
+        return [values[name] if is_list else [values[name]] for name, is_list in cls.FIELDS]
+
+    @classmethod
+    def from_groups(cls, groups):
+        return {name: group if is_list else group[0] for (name, is_list), group in zip(cls.FIELDS, groups)}
+
+    @classmethod
+    def migrate_yaml_file(cls, yaml_filename, key_bits, int_bits):
+        """ appends the data of all keys of a yaml file to the binary store next to it,
+        keys already stored are skipped. Returns the number of migrated keys """
+        store = BinaryStore.open(join(dirname(yaml_filename), '{}K.bin'.format(key_bits)))
+        migrated = 0
+        for n, values in (cls._load_data_file(yaml_filename) or {}).items():
+            if (int(n), int_bits) not in store:
+                store.append(int(n), int_bits, cls.to_groups(values))
+                migrated += 1
+        return migrated
+
     @abc.abstractclassmethod
-    def _generate_data(self, filename, int_bits):
+    def generate_tuple(self, int_bits):
+        """ returns one set of fresh masks as dict of ciphertexts (and public constants) """
         pass
 
     @abc.abstractclassmethod
@@ -285,33 +672,24 @@ class SublinearStorage():
 
 class EqStorage(SublinearStorage):
 
+    PROT = 'eq'
+    FIELDS = (('enc_bits_r', True), ('enc_r', False), ('enc_R_inv', False), ('enc_pow_R', True), ('poly_coeffs', True))
+    poly_coeffs_cache = {}
+
     def __init__(self, abb):
         super().__init__('eq', abb)
 
-    def _generate_data(self, filename, int_bits):
+    def generate_tuple(self, int_bits):
         rand_r, rand_bits_r, rand_R_exp, rand_R_inv = self._gen_unenc_randomness(
             int_bits, self.abb.pk.n)
-        enc_bits_r = [self.abb.enc(rand_bit) for rand_bit in rand_bits_r]
-        enc_r = self.abb.enc(rand_r)
-        enc_R_inv = self.abb.enc(rand_R_inv)
-        enc_pow_R = [self.abb.enc(rand_R_power) for rand_R_power in rand_R_exp]
-        poly_coeffs = self._generate_poly_coeffs(int_bits, self.abb.pk.n)[int_bits - 1]
 
         data = {}
-        data['enc_bits_r'] = [str(r) for r in enc_bits_r]
-        data['enc_r'] = str(enc_r)
-        data['enc_R_inv'] = str(enc_R_inv)
-        data['enc_pow_R'] = [str(r) for r in enc_pow_R]
-        data['poly_coeffs'] = [str(c) for c in poly_coeffs]
-
-        content = {}
-        if exists(filename):
-            content = self._load_data_file(filename)
-        content[str(self.abb.pk.n)] = data
-
-        f = open(filename, 'w', encoding='utf-8')
-        f.write(str(yaml.dump(content)))
-        f.close()
+        data['enc_bits_r'] = [self.abb.enc(rand_bit) for rand_bit in rand_bits_r]
+        data['enc_r'] = self.abb.enc(rand_r)
+        data['enc_R_inv'] = self.abb.enc(rand_R_inv)
+        data['enc_pow_R'] = [self.abb.enc(rand_R_power) for rand_R_power in rand_R_exp]
+        data['poly_coeffs'] = self._get_poly_coeffs(int_bits)
+        return data
 
     def _recreate_data(self, data_str):
         data = {}
@@ -341,6 +719,15 @@ class EqStorage(SublinearStorage):
 
         return random_r, random_bits, random_R_exp, random_R_inv
 
+    def _get_poly_coeffs(self, int_bits):
+        """the coefficients only depend on the key and the bits, so they are shared by all tuples"""
+        key = (str(self.abb.pk.n), int_bits)
+        coeffs = self.poly_coeffs_cache.get(key)
+        if coeffs is None:
+            coeffs = self._generate_poly_coeffs(int_bits, self.abb.pk.n)[int_bits - 1]
+            self.poly_coeffs_cache[key] = coeffs
+        return coeffs
+
     def _generate_poly_coeffs(self, degree, modulus):
         degree = degree + 1
 
@@ -368,38 +755,29 @@ class EqStorage(SublinearStorage):
 
 class GtStorage(SublinearStorage):
 
+    PROT = 'gt'
+    FIELDS = (('enc_r', False), ('enc_r_bot', False), ('enc_r_top', False))
+
     def __init__(self, abb):
         super().__init__('gt', abb)
 
-    def _generate_data(self, filename, bits_int):
-        max_val = int(pow(2, bits_int / 2))
+    def generate_tuple(self, bits_int):
+        bits_low, bits_high = split_bits(bits_int)
 
-        r_top = mpz_random(self.rand, max_val)
-        r_bot = mpz_random(self.rand, max_val)
+        r_top = mpz_random(self.rand, 2**bits_high)
+        r_bot = mpz_random(self.rand, 2**bits_low)
 
         kappa = self.abb.pk.bits - 1 - bits_int
         r_parties = mpz_random(self.rand, int(pow(2, kappa) - 1)) + 1
 
         r = int(pow(2, bits_int)) * r_parties + \
-            int(pow(2, bits_int / 2)) * r_top + r_bot
-
-        enc_r = self.abb.enc(r)
-        enc_r_bot = self.abb.enc(r_bot)
-        enc_r_top = self.abb.enc(r_top)
+            int(pow(2, bits_low)) * r_top + r_bot
 
         data = {}
-        data['enc_r'] = str(enc_r)
-        data['enc_r_bot'] = str(enc_r_bot)
-        data['enc_r_top'] = str(enc_r_top)
-
-        content = {}
-        if exists(filename):
-            content = self._load_data_file(filename)
-        content[str(self.abb.pk.n)] = data
-
-        f = open(filename, 'w', encoding='utf-8')
-        f.write(str(yaml.dump(content)))
-        f.close()
+        data['enc_r'] = self.abb.enc(r)
+        data['enc_r_bot'] = self.abb.enc(r_bot)
+        data['enc_r_top'] = self.abb.enc(r_top)
+        return data
 
     def _recreate_data(self, data_str):
         data = {}
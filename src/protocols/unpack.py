@@ -0,0 +1,35 @@
+import logging
+
+from gmpy2 import mpz_urandomb
+from src.crypto.cipher_vector import CipherVector
+from src.protocols.protocol import Protocol
+
+log = logging.getLogger(__name__)
+
+
+class UnpackProtocol(Protocol):
+    """
+    Turns packed ciphertexts (see PackedEncoding) into one ciphertext per counter.
+    Every party masks each slot with a random value that is STATISTICAL_SECURITY bits longer than the counters
+    and publishes the packed and the single encryptions of its masks. The masked packed plaintexts are decrypted,
+    each counter is the decrypted slot minus the encrypted masks of all parties.
+    """
+
+    def __init__(self, encoding):
+        super().__init__()
+        self.encoding = encoding
+
+    def run(self, packed):
+        encoding = self.encoding
+        masks = [mpz_urandomb(self.abb.rand, encoding.mask_bits) for _ in range(encoding.n_values)]
+        enc_masks = CipherVector.from_ciphers(self.abb, [self.abb.enc(mask) for mask in masks])
+        enc_packed_masks = encoding.encrypt(self.abb, masks)
+
+        masked = CipherVector.from_ciphers(self.abb, packed)
+        enc_mask_sums = CipherVector.zeros(self.abb, encoding.n_values)
+        for _, (enc_packed, enc_single) in self.broadcast_and_receive((enc_packed_masks, enc_masks)):
+            masked.accumulate(enc_packed)
+            enc_mask_sums.accumulate(enc_single)
+
+        masked_values = encoding.unpack(self.abb.dec_many(masked))
+        return masked_values - enc_mask_sums
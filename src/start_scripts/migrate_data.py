@@ -0,0 +1,46 @@
+import argparse
+import logging
+import re
+from glob import glob
+from os import getcwd, remove
+from os.path import basename, join
+
+from src.protocols.sublinear import EqStorage, GtStorage
+from src.util.logging import setup_logging
+from src.util.primes import PrimeStorage
+
+log = logging.getLogger(__name__)
+
+
+def migrate_primes(delete=False):
+    """moves the primes of all yaml files in data/primes into binary stores"""
+    primes = PrimeStorage()
+    for filename in sorted(glob(join(getcwd(), primes.dataPath, 'primes-*.yaml'))):
+        bits = int(re.match(r'primes-(\d+)\.yaml', basename(filename)).group(1))
+        migrated = primes.migrate(bits)
+        log.info('{}: {} primes migrated'.format(basename(filename), migrated))
+        if delete:
+            remove(filename)
+
+
+def migrate_sublinear(delete=False):
+    """moves the data of all yaml files in data/sublinear into binary stores (one per ABB, protocol and key size)"""
+    for storage_cls in [EqStorage, GtStorage]:
+        pattern = join(getcwd(), 'data', 'sublinear', '*', storage_cls.PROT, '*K-*-I.yaml')
+        for filename in sorted(glob(pattern)):
+            key_bits, int_bits = re.match(r'(\d+)K-(\d+)-I\.yaml', basename(filename)).groups()
+            migrated = storage_cls.migrate_yaml_file(filename, int(key_bits), int(int_bits))
+            log.info('{}: {} keys migrated'.format(filename, migrated))
+            if delete:
+                remove(filename)
+
+
+if __name__ == '__main__':
+    setup_logging(logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Migrates the yaml files of the data directory into binary stores.')
+    parser.add_argument('--delete', action='store_true', help='delete the yaml files after the migration')
+    args = parser.parse_args()
+
+    migrate_primes(args.delete)
+    migrate_sublinear(args.delete)
@@ -0,0 +1,55 @@
+import random
+import sys
+from time import time
+
+from src.crypto.paillier_abb import PaillierABB
+from src.protocols.async_protocol import AsyncDuelsDecProtocol
+from src.protocols.protocol import Protocol
+from src.protocols.sublinear import SubLinearProtocolSuite
+from src.util.logging import setup_logging
+from src.util.protocol_runner import ProtocolRunner
+
+
+class DuelsDecProtocol(Protocol):
+    """ [x >= y, x == y] of each pair, one comparison after the other """
+
+    def run(self, pairs, bits):
+        return [self.abb.dec_many([self.abb.gt(x, y, bits), self.abb.eq(x, y, bits)]) for x, y in pairs]
+
+
+class DuelsManyDecProtocol(Protocol):
+    """ [x >= y, x == y] of each pair, the comparisons batched by gt_many and eq_many """
+
+    def run(self, pairs, bits):
+        gts = self.abb.dec_many(self.abb.gt_many(pairs, bits))
+        eqs = self.abb.dec_many(self.abb.eq_many(pairs, bits))
+        return [[gt, eq] for gt, eq in zip(gts, eqs)]
+
+
+def test_duels(trustees, name, prot, pairs, bits):
+    start_time = time()
+    result, _ = ProtocolRunner(trustees, prot).run([pairs, bits])
+    t = time() - start_time
+    print('%s: %d duels (%d bit) %8.3fs, %4d rounds' % (name, len(pairs), bits, t, trustees[0].abb.prot_suite.connection.rounds))
+    return result
+
+
+if __name__ == '__main__':
+    setup_logging()
+
+    bits_key = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    trustee_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    threshold = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    bits = int(sys.argv[4]) if len(sys.argv) > 4 else 8
+    n_cand = int(sys.argv[5]) if len(sys.argv) > 5 else 5
+
+    trustees = PaillierABB.gen_trustees(bits_key, trustee_count, threshold, SubLinearProtocolSuite)
+    abb = trustees[0].abb
+    # the duels of a Condorcet evaluation: each pair of candidates
+    pairs = [(abb.enc(random.randint(0, 2**bits - 1)), abb.enc(random.randint(0, 2**bits - 1)))
+             for i in range(n_cand) for j in range(i + 1, n_cand)]
+
+    results = [test_duels(trustees, 'sequential', DuelsDecProtocol, pairs, bits),
+               test_duels(trustees, 'batched   ', DuelsManyDecProtocol, pairs, bits),
+               test_duels(trustees, 'async     ', AsyncDuelsDecProtocol, pairs, bits)]
+    assert results[0] == results[1] == results[2]
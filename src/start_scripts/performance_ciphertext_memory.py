@@ -0,0 +1,64 @@
+import sys
+
+from src.crypto.paillier_abb import PaillierABB
+from src.election.condorcet.condorcet_election_system import Condorcet
+from src.util.logging import setup_logging
+from src.util.position_vote import PositionVote
+
+
+class LegacyCiphertext():
+    """ciphertext layout before slotted ciphertexts: a __dict__ holding the value and an abb reference"""
+
+    def __init__(self, abb, val):
+        self.abb = abb
+        self.val = val
+
+
+def copy_ballot(ballot, cipher_factory):
+    """copies a condorcet ballot, every value is copied, so each layout stores its own integers"""
+    matrix = [[cipher_factory(c.val + 0) for c in row] for row in ballot[0]]
+    borda_points = [cipher_factory(c.val + 0) for c in ballot[1]]
+    return [matrix, borda_points]
+
+
+def deep_size(obj):
+    """bytes used by nested lists of ciphertexts (sys.getsizeof includes the limbs of mpz values)"""
+    if isinstance(obj, list):
+        return sys.getsizeof(obj) + sum(deep_size(o) for o in obj)
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    if hasattr(obj, 'val'):
+        size += sys.getsizeof(obj.val)
+    return size
+
+
+def measure_bytes_per_ballot(ballots, cipher_factory):
+    copies = [copy_ballot(ballot, cipher_factory) for ballot in ballots]
+    return deep_size(copies) / len(ballots)
+
+
+def measure_condorcet_ballots(bits_key, n_cand, n_votes):
+    pk, _ = PaillierABB.keygen(bits_key, 3, 2)
+    abb = PaillierABB(None, pk, 3, 2, None)
+    system = Condorcet(n_cand)
+    ballots = [system.generate_valid_vote(vote, abb) for vote in PositionVote.generate_random(n_votes, n_cand)]
+
+    legacy = measure_bytes_per_ballot(ballots, lambda val: LegacyCiphertext(abb, val))
+    slotted = measure_bytes_per_ballot(ballots, abb.init_cipher)
+    values = measure_bytes_per_ballot(ballots, lambda val: val)
+
+    print('Condorcet ballot with {} candidates, {} bit key:'.format(n_cand, bits_key))
+    print('  legacy ciphertexts:  %10.0f bytes per ballot' % legacy)
+    print('  slotted ciphertexts: %10.0f bytes per ballot' % slotted)
+    print('  values only:         %10.0f bytes per ballot' % values)
+
+
+if __name__ == '__main__':
+    setup_logging()
+
+    bits_key = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    n_cand = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    n_votes = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    measure_condorcet_ballots(bits_key, n_cand, n_votes)
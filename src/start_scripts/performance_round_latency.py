@@ -0,0 +1,51 @@
+import random
+import sys
+from time import sleep, time
+
+from src.crypto.paillier_abb import PaillierABB
+from src.election.trustee import init_trustees
+from src.network.local_connector import LocalConnector
+from src.protocols.sublinear import SublinearGtProtocol, SubLinearProtocolSuite
+from src.util.logging import setup_logging
+from src.util.protocol_runner import ProtocolRunner
+
+
+class PollingLocalConnector(LocalConnector):
+    """receives like the connector before the queue based one: polls every 10ms"""
+
+    def receive(self, timeout=None):
+        while self.stream.empty():
+            sleep(0.01)
+        return self.stream.get()
+
+
+def test_round_latency(trustees, name, bits, runs):
+    abb = trustees[0].abb
+    times = []
+    rounds = 0
+    for _ in range(runs):
+        enc_x = abb.enc(random.randint(0, 2**bits - 1))
+        enc_y = abb.enc(random.randint(0, 2**bits - 1))
+        start_time = time()
+        ProtocolRunner(trustees, SublinearGtProtocol).run([enc_x, enc_y, bits])
+        times.append(time() - start_time)
+        rounds += abb.prot_suite.connection.rounds
+
+    print('%s: gt %d bit avg %8.3fs, %d rounds, %7.2fms per round' % (
+        name, bits, sum(times) / runs, rounds / runs, 1000 * sum(times) / rounds))
+
+
+if __name__ == '__main__':
+    setup_logging()
+
+    bits_key = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    trustee_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    threshold = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    bits = int(sys.argv[4]) if len(sys.argv) > 4 else 32
+    runs = int(sys.argv[5]) if len(sys.argv) > 5 else 5
+
+    trustees = PaillierABB.gen_trustees(bits_key, trustee_count, threshold, SubLinearProtocolSuite)
+    polling_trustees = init_trustees([t.abb for t in trustees], [t.id for t in trustees], PollingLocalConnector)
+
+    test_round_latency(polling_trustees, 'polling', bits, runs)
+    test_round_latency(trustees, 'queue  ', bits, runs)
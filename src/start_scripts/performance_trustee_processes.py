@@ -0,0 +1,59 @@
+import logging
+import random
+import sys
+from time import time
+
+from src.crypto.paillier_abb import PaillierABB
+from src.election.borda.borda_election_system import Borda
+from src.election.condorcet.condorcet_election_system import Condorcet
+from src.election.condorcet.condorcet_implementations import Copeland
+from src.election.condorcet.condorcet_no_winner_evaluations import (
+    MiniMaxMarginsEvaluation, SchulzeEvaluation, SmithFastEvaluation)
+from src.election.election_authority import ElectionAuthority
+from src.protocols.sublinear import SubLinearProtocolSuite
+from src.util.logging import setup_logging
+from src.util.position_vote import PositionVote
+
+
+def get_election_mix(n_cand, n_votes):
+    """the elections of main.py"""
+    return [
+        Borda(n_cand, point_limit=int((n_cand+1)*n_votes/2)),
+        Borda(n_cand, num_winners=4),
+        Borda(n_cand),
+        Condorcet(n_cand, leak_better_half=False),
+        Copeland(n_cand, leak_max_points=False, evaluate_condorcet=False),
+        Condorcet(n_cand, [MiniMaxMarginsEvaluation], evaluate_condorcet=False),
+        Condorcet(n_cand, [SmithFastEvaluation], evaluate_condorcet=False),
+        Condorcet(n_cand, [SchulzeEvaluation], evaluate_condorcet=False),
+    ]
+
+
+def test_performance_trustee_processes(bits_key, trustee_count, n_cand, n_votes, processes):
+    pk, sks = PaillierABB.load_key(bits_key, trustee_count, trustee_count)
+    trustees = PaillierABB.create_trustees(pk, sks, trustee_count, trustee_count, SubLinearProtocolSuite, processes)
+    random.seed(3)
+    votes = PositionVote.generate_random(n_votes, n_cand)
+
+    start_time = time()
+    for election in get_election_mix(n_cand, n_votes):
+        ElectionAuthority(lambda: trustees, election).add_votes_and_evaluate(votes)
+    duration = time() - start_time
+
+    if processes:
+        for trustee in trustees:
+            trustee.shutdown()
+    return duration
+
+
+if __name__ == '__main__':
+    setup_logging(logging.WARNING)
+
+    bits_key = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    n_cand = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    n_votes = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    for trustee_count in [3, 5]:
+        threads = test_performance_trustee_processes(bits_key, trustee_count, n_cand, n_votes, False)
+        processes = test_performance_trustee_processes(bits_key, trustee_count, n_cand, n_votes, True)
+        print('%d trustees: threads %8.2fs, processes %8.2fs, speedup %.2f' % (trustee_count, threads, processes, threads / processes))
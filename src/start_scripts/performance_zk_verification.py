@@ -0,0 +1,56 @@
+import sys
+from time import time
+
+from src.crypto.paillier_abb import PaillierABB
+from src.protocols.sublinear import (BatchVerifyCorrectMulProtocol,
+                                     MulMaterialGenerator,
+                                     ProofCorrectMulProtocol,
+                                     SubLinearProtocolSuite,
+                                     VerifyCorrectMulProtocol)
+from src.util.logging import setup_logging
+
+
+def create_statements(abb, count):
+    """proofs of correct multiplication as sent by the trustees in a multiplication round"""
+    prover = ProofCorrectMulProtocol()
+    prover.set_abb(abb)
+    statements = []
+    for i in range(count):
+        material = MulMaterialGenerator(abb).generate_tuple()
+        enc_y = abb.enc(i)
+        enc_z = enc_y * material['d']
+        proof = prover.run(enc_y, material['enc_d'], enc_z, material['d'], material['r'], 1, material)
+        statements.append((enc_y, material['enc_d'], enc_z) + proof)
+    return statements
+
+
+def test_performance_zk_verification(abb, counts):
+    print('proofs  individual      batch')
+    for count in counts:
+        statements = create_statements(abb, count)
+
+        verifier = VerifyCorrectMulProtocol()
+        verifier.set_abb(abb)
+        start_time = time()
+        for statement in statements:
+            assert verifier.run(*statement)
+        individual_time = time() - start_time
+
+        verifier = BatchVerifyCorrectMulProtocol()
+        verifier.set_abb(abb)
+        start_time = time()
+        assert verifier.run(statements) == []
+        batch_time = time() - start_time
+
+        print('%6d  %9.3fs  %9.3fs' % (count, individual_time, batch_time))
+
+
+if __name__ == '__main__':
+    setup_logging()
+
+    bits_key = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    max_count = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    trustees = PaillierABB.gen_trustees(bits_key, 3, 2, SubLinearProtocolSuite)
+    counts = [2**i for i in range(max_count.bit_length()) if 2**i <= max_count]
+    test_performance_zk_verification(trustees[0].abb, counts)
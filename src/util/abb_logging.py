@@ -6,6 +6,10 @@ log = logging.getLogger(__name__)
 class ABBLogger():
 
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """sets all counters to zero"""
         self.count_gt_operations = {}
         self.count_eq_operations = {}
         self.count_dec_operations = 0
@@ -13,6 +17,15 @@ class ABBLogger():
 
         self.is_logging_active = True
 
+    def merge(self, other):
+        """adds the counts of another logger (e.g. of a trustee process)"""
+        for bits, n in other.count_gt_operations.items():
+            self._add_ops_bits(self.count_gt_operations, bits, n=n)
+        for bits, n in other.count_eq_operations.items():
+            self._add_ops_bits(self.count_eq_operations, bits, n=n)
+        self.count_dec_operations += other.count_dec_operations
+        self.count_mul_operations += other.count_mul_operations
+
     def log_dec(self, n=1):
         if self.is_logging_active:
             self.count_dec_operations += n
@@ -56,3 +69,23 @@ class ABBLogger():
     def get_count_mul_operations(self):
         """as int"""
         return self.count_mul_operations
+
+    def get_bit_savings(self):
+        """
+        dict: op ('eq', 'gt') -> (bits, padded bits), the summed bit widths of all operations
+        and the sums with each width rounded up to a power of two, as comparisons needed before
+        """
+        savings = {}
+        for op, op_dict in [('eq', self.count_eq_operations), ('gt', self.count_gt_operations)]:
+            bits = sum(b * n for b, n in op_dict.items())
+            padded = sum(get_padded_bits(b) * n for b, n in op_dict.items())
+            savings[op] = (bits, padded)
+        return savings
+
+
+def get_padded_bits(bits):
+    """the next power of two, which is at least 2"""
+    padded = 2
+    while padded < bits:
+        padded *= 2
+    return padded
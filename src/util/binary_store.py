@@ -0,0 +1,156 @@
+import logging
+import mmap
+import struct
+from os import fsync
+from os.path import abspath, exists, getsize
+from threading import Lock
+
+from gmpy2 import mpz
+
+log = logging.getLogger(__name__)
+
+
+class BinaryStore():
+    """
+    Append-only binary container for big integers (primes, preprocessing data).
+    The file starts with a fixed header (magic, version), followed by records. A record holds
+    groups of non-negative integers for one (modulus, bits) key:
+
+        width, bits, n_groups, n_ints (uint32 each), modulus, group sizes (uint32 each), ints
+
+    The modulus and all ints of a record are little-endian and width bytes long.
+    Records are only appended, reads use a memory map and an index (modulus, bits) -> record offsets,
+    which is extended by the records appended since the last read.
+    """
+
+    MAGIC = b'ORDINOS\x00'
+    VERSION = 1
+    HEADER = struct.Struct('<8sII')
+    RECORD = struct.Struct('<IIII')
+    SIZE = struct.Struct('<I')
+
+    stores = {}
+    stores_lock = Lock()
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = Lock()
+        self.index = {}
+        self.n_records = 0
+        # bytes of the file covered by the index
+        self.indexed = 0
+
+    @classmethod
+    def open(cls, filename):
+        """ returns the store of the file, shared within the process """
+        filename = abspath(filename)
+        with cls.stores_lock:
+            store = cls.stores.get(filename)
+            if store is None:
+                store = cls(filename)
+                cls.stores[filename] = store
+            return store
+
+    def __len__(self):
+        with self.lock:
+            self._refresh()
+            return self.n_records
+
+    def __contains__(self, key):
+        with self.lock:
+            self._refresh()
+            return (int(key[0]), key[1]) in self.index
+
+    def keys(self):
+        """ returns all (modulus, bits) keys in the order of their first record """
+        with self.lock:
+            self._refresh()
+            return list(self.index.keys())
+
+    def get(self, modulus, bits):
+        """ returns the groups of the first record of the key or None """
+        records = self.get_all(modulus, bits, limit=1)
+        return records[0] if len(records) > 0 else None
+
+    def get_all(self, modulus, bits, limit=None):
+        """ returns the groups (lists of mpz) of all records of the key in the order they were appended """
+        with self.lock:
+            self._refresh()
+            offsets = self.index.get((int(modulus), bits), [])[:limit]
+            if len(offsets) == 0:
+                return []
+            with open(self.filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return [self._read_record(mm, offset) for offset in offsets]
+
+    def append(self, modulus, bits, groups):
+        """ appends a record with the given groups (lists of non-negative integers) of the key """
+        values = [int(v) for group in groups for v in group]
+        modulus = int(modulus)
+        if modulus < 0 or any(v < 0 for v in values):
+            raise ValueError('Only non-negative integers can be stored.')
+        width = max([1] + [(v.bit_length() + 7) // 8 for v in values + [modulus]])
+
+        record = bytearray(self.RECORD.pack(width, bits, len(groups), len(values)))
+        record += modulus.to_bytes(width, 'little')
+        for group in groups:
+            record += self.SIZE.pack(len(group))
+        for v in values:
+            record += v.to_bytes(width, 'little')
+
+        with self.lock:
+            new_file = not exists(self.filename) or getsize(self.filename) == 0
+            with open(self.filename, 'ab') as f:
+                if new_file:
+                    f.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0))
+                # one write per record, so concurrent appends don't interleave
+                f.write(bytes(record))
+                f.flush()
+                fsync(f.fileno())
+
+    def _refresh(self):
+        """ indexes the records appended since the last call """
+        if not exists(self.filename):
+            return
+        size = getsize(self.filename)
+        if size <= self.indexed:
+            return
+        with open(self.filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = self.indexed
+            if offset == 0:
+                offset = self._check_header(mm)
+            while offset + self.RECORD.size <= size:
+                width, bits, n_groups, n_ints = self.RECORD.unpack_from(mm, offset)
+                length = self.RECORD.size + width + self.SIZE.size * n_groups + width * n_ints
+                if offset + length > size:
+                    break
+                modulus = int.from_bytes(mm[offset + self.RECORD.size:offset + self.RECORD.size + width], 'little')
+                self.index.setdefault((modulus, bits), []).append(offset)
+                self.n_records += 1
+                offset += length
+            if offset < size:
+                log.warning('Incomplete record at byte {} of {}.'.format(offset, self.filename))
+            self.indexed = offset
+
+    def _check_header(self, mm):
+        if len(mm) < self.HEADER.size:
+            raise ValueError('{} is no binary store.'.format(self.filename))
+        magic, version, _ = self.HEADER.unpack_from(mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError('{} is no binary store.'.format(self.filename))
+        if version != self.VERSION:
+            raise ValueError('Unsupported version {} of {}.'.format(version, self.filename))
+        return self.HEADER.size
+
+    def _read_record(self, mm, offset):
+        width, _, n_groups, _ = self.RECORD.unpack_from(mm, offset)
+        pos = offset + self.RECORD.size + width
+        sizes = struct.unpack_from('<{}I'.format(n_groups), mm, pos)
+        pos += self.SIZE.size * n_groups
+        groups = []
+        for size in sizes:
+            group = []
+            for _ in range(size):
+                group.append(mpz(int.from_bytes(mm[pos:pos + width], 'little')))
+                pos += width
+            groups.append(group)
+        return groups
@@ -1,16 +1,73 @@
+import argparse
 import logging
 import yaml
+from multiprocessing import cpu_count, get_context
 from os.path import exists, join
-from os import getcwd
+from os import getcwd, makedirs
+from queue import Queue
 from threading import Lock
 from random import choice, randrange
 from gmpy2 import mpz, powmod, invert, is_prime, random_state, mpz_urandomb, log2, mpz_random, gcd, add, mul, fac
+from src.util.binary_store import BinaryStore
 
 
 log = logging.getLogger(__name__)
 
+# candidates are sieved by all odd primes below SIEVE_LIMIT (for primes with at least SIEVE_MIN_BITS bits)
+SIEVE_LIMIT = 2**12
+SIEVE_MIN_BITS = 32
+# number of candidates q, q + 2, ... searched from one random start
+SIEVE_WINDOW = 4096
+
+
+def get_small_primes(limit):
+    """ odd primes below limit (sieve of Eratosthenes) """
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i in range(3, limit) if sieve[i]]
+
+
+SIEVE_PRIMES = get_small_primes(SIEVE_LIMIT)
+
+
+def sieve_safe_prime_candidates(q0, window=SIEVE_WINDOW):
+    """ offsets k of the candidates q = q0 + 2k (q0 odd), for which neither q nor p = 2q + 1 has a factor in SIEVE_PRIMES """
+    sieve = bytearray([1]) * window
+    for s in SIEVE_PRIMES:
+        r = q0 % s
+        inv_2 = (s + 1) // 2
+        # s divides q, if q = 0 mod s, and p, if q = (s - 1) / 2 mod s
+        for target in (0, (s - 1) // 2):
+            k = ((target - r) * inv_2) % s
+            sieve[k::s] = bytes(len(range(k, window, s)))
+    return [k for k in range(window) if sieve[k]]
+
+
+def search_safe_prime(bits, seed, window=SIEVE_WINDOW):
+    """ searches the sieved candidates of a window from a random start (given by seed).
+    Returns the first safe prime (p, q) with p of given bits or None """
+    rand = random_state(seed)
+    q0 = mpz(2)**(bits - 2) + mpz_urandomb(rand, bits - 2)
+    q0 |= 1
+    limit = mpz(2)**(bits - 1)
+    for k in sieve_safe_prime_candidates(q0, window):
+        q = q0 + 2 * k
+        if q >= limit:
+            break
+        p = 2 * q + 1
+        # a fermat test of p is much cheaper than is_prime and rejects most candidates
+        if powmod(2, p - 1, p) == 1 and is_prime(q) and is_prime(p):
+            return (p, q)
+    return None
+
 
 class PrimeStorage():
+    """ safe primes in binary stores (see BinaryStore), one record (p, q) per prime.
+    Primes of yaml files, which were not migrated, are still readable. """
+
     def __init__(self):
         self.dataPath = join('data', 'primes')
         self.rand = random_state(randrange(1234567891011121314))
@@ -18,27 +75,22 @@ class PrimeStorage():
     def getRandomSafePrime(self, bitlength):
         """ used to obtain a random prime with given bits. 
         If no such prime is stored, it will generate them"""
-        filename = self.getFileName(bitlength)
-
-        if not exists(filename):
+        primes = self.getPrimes(bitlength)
+        if len(primes) == 0:
             log.info('No primes stored of length {}. Searching for primes...'.format(bitlength))
             self.generateSafePrimes(bitlength)
-
-        file = open(filename, 'r', encoding='utf-8')
-        primes = yaml.load(file.read(), Loader=yaml.FullLoader)
-        file.close()
+            primes = self.getPrimes(bitlength)
         return choice(primes)
 
     def getRandomSafePrimes(self, bitlength):
         """ used to obtain random safe primes with given bits. 
         If no such primes are stored, it will generate them"""
-        filename = self.getFileName(bitlength)
-
-        if not exists(filename):
+        primes = self.getPrimes(bitlength)
+        if len(primes) == 0:
             log.info('No primes stored of length {}. Searching for primes...'.format(bitlength))
             self.generateSafePrimes(bitlength)
+            primes = self.getPrimes(bitlength)
 
-        primes = self.getPrimes(filename)
         #(p, p_) = choice(primes)
         #(q, q_) = choice(primes)
         (p, p_) = primes[0]
@@ -48,27 +100,69 @@ class PrimeStorage():
             (q, q_) = choice(primes)
         return ((p, p_), (q, q_))
 
-    def generateSafePrimes(self, bits, n=2):
+    def generateSafePrimes(self, bits, n=2, processes=None, progress=None, cancel=None):
         """Generates safe primes of given size and safes them in file for later usage.
-        It will search for n new primes"""
-        filename = self.getFileName(bits)
+        It will search for n new primes, with processes > 1 in parallel (see generate_safe_primes_parallel),
+        by default in this process only, since it is called during key generation, while trustee threads may run.
+        Returns the number of new primes, which is smaller than n if cancel (threading.Event) was set"""
+        if processes is None:
+            processes = 1
+        # the order of the primes determines the keys, so yaml primes are moved first
+        self.migrate(bits)
+        makedirs(join(getcwd(), self.dataPath), exist_ok=True)
+        store = BinaryStore.open(self.getFileName(bits))
         found = 0
-        found_primes = []
+        found_primes = self.getPrimes(bits)
+        while found < n and not (cancel is not None and cancel.is_set()):
+            if processes > 1 and bits >= SIEVE_MIN_BITS:
+                primes = self.generate_safe_primes_parallel(bits, n - found, processes, progress, cancel)
+            else:
+                primes = [self.generate_safe_prime(bits)]
+            for prime in primes:
+                if prime not in found_primes and found < n:
+                    found_primes.append(prime)
+                    store.append(0, bits, [prime])
+                    found += 1
+                    log.info('Found {}. prime'.format(len(found_primes)))
+        return found
+
+    def generate_safe_primes_parallel(self, bits, n, processes=None, progress=None, cancel=None):
+        """ searches n distinct safe primes with a pool of processes, every task searches one sieved window.
+        At most two tasks per process are queued, the pool is terminated as soon as enough primes are found
+        or cancel (threading.Event) is set. progress(found, n, windows) is called after each window.
+        The processes are spawned, forking a process with running threads (e.g. trustee workers) could deadlock """
+        processes = processes or cpu_count()
+        found = []
+        windows = 0
+        results = Queue()
+        with get_context('spawn').Pool(processes) as pool:
+            pending = 0
+            while len(found) < n and not (cancel is not None and cancel.is_set()):
+                while pending < 2 * processes:
+                    seed = int(mpz_urandomb(self.rand, 64))
+                    pool.apply_async(search_safe_prime, (bits, seed), callback=results.put, error_callback=results.put)
+                    pending += 1
+                result = results.get()
+                pending -= 1
+                windows += 1
+                if isinstance(result, BaseException):
+                    raise result
+                if result is not None and result not in found:
+                    found.append(result)
+                if progress is not None:
+                    progress(len(found), n, windows)
+            pool.terminate()
+        log.debug('Searched {} windows for {} primes with {} bits.'.format(windows, len(found), bits))
+        return found
+
+    def getPrimes(self, bits):
+        """ returns a list of all stored primes with given bits """
+        filename = self.getFileName(bits)
         if exists(filename):
-            found_primes = self.getPrimes(filename)
-        while found < n:
-            prime = self.generate_safe_prime(bits)
-            if prime not in found_primes:
-                found_primes.append(prime)
-                f = open(filename, 'w', encoding='utf-8')
-                primes_str = [(str(p), str(q)) for (p, q) in found_primes]
-                f.write(str(yaml.dump(primes_str)))
-                f.close()
-                found += 1
-                log.info('Found {}. prime'.format(len(found_primes)))
-
-    def getPrimes(self, filename):
-        """ returns a list of all primes in given file"""
+            return [tuple(groups[0]) for groups in BinaryStore.open(filename).get_all(0, bits)]
+        return self._getYamlPrimes(self.getYamlFileName(bits))
+
+    def _getYamlPrimes(self, filename):
         if exists(filename):
             file = open(filename, 'r', encoding='utf-8')
             primes_str = yaml.load(file.read(), Loader=yaml.FullLoader)
@@ -78,7 +172,22 @@ class PrimeStorage():
         else:
             return []
 
+    def migrate(self, bits):
+        """ moves the primes of the yaml file into the binary store, if it doesn't exist yet.
+        Returns the number of migrated primes """
+        filename = self.getFileName(bits)
+        if exists(filename):
+            return 0
+        primes = self._getYamlPrimes(self.getYamlFileName(bits))
+        store = BinaryStore.open(filename)
+        for prime in primes:
+            store.append(0, bits, [prime])
+        return len(primes)
+
     def getFileName(self, bits):
+        return join(getcwd(), self.dataPath, 'primes-{}.bin'.format(bits))
+
+    def getYamlFileName(self, bits):
         return join(getcwd(), self.dataPath, 'primes-{}.yaml'.format(bits))
 
     def generate_safe_prime(self, bits):
@@ -86,9 +195,14 @@ class PrimeStorage():
         A secure prime is a prime p of the form p = 2 * q + 1 where q is also a prime.
         The output of this function is (p, q) with p and q as described above.
 
-        The function draws a candidate and tests it. If it is not able to find a good
+        Primes with at least SIEVE_MIN_BITS bits are searched in sieved windows of candidates (see search_safe_prime),
+        smaller ones by drawing and testing single candidates. If it is not able to find a good
         candidate, it will run forever.
         """
+        while bits >= SIEVE_MIN_BITS:
+            prime = search_safe_prime(bits, int(mpz_urandomb(self.rand, 64)))
+            if prime is not None:
+                return prime
         while True:
             # generate p, a prime of input length
             p = mpz(2)**(bits-1) + mpz_urandomb(self.rand, (bits-1))
@@ -96,4 +210,27 @@ class PrimeStorage():
                 # p is prime, get q and test if q is also prime
                 q = (p - 1) // 2
                 if is_prime(q):
-                    return (p, q)
\ No newline at end of file
+                    return (p, q)
+
+
+if __name__ == '__main__':
+    from src.util.logging import setup_logging
+    setup_logging(logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Fills the prime store with safe primes of the given bit lengths.')
+    parser.add_argument('bits', type=int, nargs='+', help='bit lengths of the primes (half of the key bits)')
+    parser.add_argument('--count', type=int, default=2, help='number of primes, which should be stored per bit length')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    def report(found, n, windows):
+        if windows % 100 == 0 or found == n:
+            log.info('{} of {} primes found after {} windows'.format(found, n, windows))
+
+    storage = PrimeStorage()
+    for bits in args.bits:
+        missing = args.count - len(storage.getPrimes(bits))
+        if missing > 0:
+            log.info('Searching {} primes with {} bits...'.format(missing, bits))
+            storage.generateSafePrimes(bits, missing, args.processes or cpu_count(), report)
+        log.info('{} primes with {} bits are stored.'.format(len(storage.getPrimes(bits)), bits))
@@ -1,5 +1,4 @@
 import logging
-from time import sleep, time
 import gmpy2 as gmpy
 
 import numpy as np
@@ -16,17 +15,15 @@ class ProtocolRunner():
 
     def run(self, protocol_args):
         self.protocol_args = protocol_args
+        futures = []
         for t in self.trustees:
             p = self.protocol_initializer()
-            t.run_protocol(p, *self.protocol_args)
+            futures.append(t.run_protocol(p, *self.protocol_args))
 
-        for t in self.trustees:
-            while not t.is_protocol_finished():
-                sleep(0.05)
+        results = [future.result() for future in futures]
 
-        result = self.trustees[0].result
-        for t in self.trustees:
-            r = t.result
+        result = results[0]
+        for r in results:
             try:
                 if isinstance(result, (list, tuple, np.ndarray)):
                     if not np.array_equal(r, result):
@@ -1,4 +1,4 @@
-from gmpy2 import mpz, is_even
+from gmpy2 import invert, is_even, mpz, powmod
 
 
 def init_empty_cand_dict(n_cand, enc_zero):
@@ -18,7 +18,7 @@ def if_then_else(cond, val_true, val_false):
     - val_true (return if cond=1)
     - val_false (return if cond=0)
     """
-    return cond * val_true + (1 - cond) * val_false
+    return cond * (val_true - val_false) + val_false
 
 
 def ext_euclid(n, m):
@@ -75,10 +75,70 @@ def minus1to(k):
 
 
 def calc_lambda(shares, own_index, delta):
-    """calculates lambda used for interpolation"""
-    y = mpz(delta)
+    """calculates lambda used for interpolation.
+    The result is exact, since delta (n_shares!) is a multiple of the denominator"""
+    numerator = mpz(delta)
+    denominator = mpz(1)
     for share in shares:
         if share[0] != own_index:
-            y *= -share[0]
-            y /= (own_index - share[0])
-    return mpz(y)
+            numerator *= -share[0]
+            denominator *= own_index - share[0]
+    if numerator % denominator != 0:
+        raise ValueError('delta {} is not divisible by {}.'.format(delta, denominator))
+    return numerator // denominator
+
+
+def multi_powmod(bases, exponents, modulus, chunk_size=4):
+    """
+    computes prod(bases[i]^exponents[i]) mod modulus as simultaneous
+    multi-exponentiation (Straus): all exponents share one chain of squarings.
+    Bases are grouped into chunks, every chunk uses a table of all products of its bases.
+    Negative exponents are allowed, if the corresponding bases are invertible.
+    """
+    bases = [mpz(b) for b in bases]
+    exponents = [mpz(e) for e in exponents]
+    for i, e in enumerate(exponents):
+        if e < 0:
+            bases[i] = invert(bases[i], modulus)
+            exponents[i] = -e
+    if len(bases) == 1:
+        return powmod(bases[0], exponents[0], modulus)
+
+    tables = []
+    for start in range(0, len(bases), chunk_size):
+        chunk = bases[start:start + chunk_size]
+        table = [mpz(1)]
+        for base in chunk:
+            table += [(t * base) % modulus for t in table]
+        tables.append((start, len(chunk), table))
+
+    result = mpz(1)
+    for bit in range(max(e.bit_length() for e in exponents) - 1, -1, -1):
+        result = (result * result) % modulus
+        for start, length, table in tables:
+            index = 0
+            for i in range(length):
+                if exponents[start + i].bit_test(bit):
+                    index |= 1 << i
+            if index:
+                result = (result * table[index]) % modulus
+    return result
+
+
+def batch_invert(values, modulus):
+    """
+    inverts all values modulo modulus with a single modular inversion (Montgomery's trick):
+    prefix products are inverted once and unwound with 3 multiplications per value.
+    """
+    if len(values) == 0:
+        return []
+    prefix = [mpz(values[0]) % modulus]
+    for val in values[1:]:
+        prefix.append((prefix[-1] * val) % modulus)
+    inv = invert(prefix[-1], modulus)
+    inverses = [None] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = (inv * prefix[i - 1]) % modulus
+        inv = (inv * values[i]) % modulus
+    inverses[0] = inv
+    return inverses
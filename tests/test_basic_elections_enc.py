@@ -5,7 +5,9 @@ import time
 import unittest
 from time import sleep, time
 
+from src.crypto.packing import PackedEncoding
 from src.crypto.paillier_abb import PaillierABB
+from src.election.borda.borda_election_system import Borda
 from src.election.election_authority import ElectionAuthority
 from src.election.single_vote.single_vote_election_system import \
     SingleVoteElection
@@ -47,5 +49,37 @@ class BasicElectionEncTest(unittest.TestCase):
         self.assertTrue(1 in result)
         self.assertTrue(3 in result)
 
+    def test_packed_winner_election(self):
+        e = ElectionAuthority(self.trustee_gen, SingleVoteElection(7, packed=True))
+        e.add_generic_vote(PointVote([0, 1, 0, 0, 0, 0, 0]), count=2)
+        e.add_generic_vote(PointVote([0, 0, 0, 0, 0, 1, 0]), count=3)
+        e.add_generic_vote(PointVote([0, 0, 0, 0, 0, 0, 1]), count=1)
+        # 256 bit keys fit 3 slots of 76 bits per ciphertext
+        self.assertEqual(3, len(e.bulletin_board.vote_aggregation))
+        result = e.trigger_evaluation()
+        self.assertEqual([5], list(result))
+
+    def test_packed_borda(self):
+        e = ElectionAuthority(self.trustee_gen, Borda(3, packed=True, expected_votes_n=10))
+        e.add_generic_vote(PointVote([3, 2, 1]), count=1)
+        e.add_generic_vote(PointVote([1, 3, 2]), count=2)
+        result = e.trigger_evaluation()
+        self.assertEqual([1], list(result))
+
+    def test_packed_headroom(self):
+        abb = PaillierABB.gen_trustees(256, 5, 3, SubLinearProtocolSuite)[0].abb
+        encoding = PackedEncoding.for_abb(abb, 5, 3, max_votes=10)
+        self.assertEqual(encoding.value_bits, 5)
+        self.assertEqual(encoding.unpack(encoding.pack([0, 1, 2, 3, 30])), [0, 1, 2, 3, 30])
+        self.assertRaises(ValueError, encoding.check_votes, 11)
+        self.assertRaises(ValueError, encoding.encrypt_vote, abb, [0, 4, 0, 0, 0])
+
+        bb = Borda(3, packed=True, expected_votes_n=2).bulletin_board_functions_class()
+        aggregation = bb.get_initial_vote_aggregation(abb, 3)
+        vote = bb.encoding.encrypt_vote(abb, [3, 2, 1])
+        bb.aggregate_vote(aggregation, vote)
+        bb.aggregate_vote(aggregation, vote)
+        self.assertRaises(ValueError, bb.aggregate_vote, aggregation, vote)
+
     def _init_election(self, n_cand):
         return ElectionAuthority(self.trustee_gen, SingleVoteElection(n_cand))
@@ -1,21 +1,45 @@
+import gc
 import json
 import logging
 import math
+import pickle
+import tempfile
 import time
 import unittest
+from os.path import join
 from random import randint
-
-from src.crypto.paillier_abb import PaillierABB
-from src.election.trustee import init_trustees
-from src.protocols.protocol import (DecProtocol, EqDecProtocol, GtDecProtocol,
+from threading import Event
+
+from gmpy2 import is_prime, mpz
+from src.crypto.abb import ContextRegistry
+from src.crypto.cipher_vector import CipherMatrix, CipherVector
+from src.crypto.paillier_abb import (LazyPaillierCiphertext, PaillierABB,
+                                    PaillierCiphertext, PaillierKeyStorage,
+                                    shared_decryption)
+from src.crypto.randomizer_pool import RandomizerPool
+from src.election.trustee import Trustee, init_trustees
+from src.network.connection import Channel
+from src.network.local_connector import LocalConnector
+from src.network.socket_connector import decode_message, encode_frame
+from src.protocols.protocol import (DecManyProtocol, DecProtocol,
+                                    EqDecProtocol, GtDecProtocol,
                                     MulDecProtocol, Protocol)
 from src.protocols.sublinear import SubLinearProtocolSuite
 from src.util.logging import setup_logging
+from src.util.primes import (SIEVE_PRIMES, PrimeStorage,
+                             sieve_safe_prime_candidates)
 from src.util.protocol_runner import ProtocolRunner
 
 log = logging.getLogger(__name__)
 
 
+class TimeoutProtocol(Protocol):
+    """returns the timeout of the rounds (defined here, so trustee processes can unpickle it)"""
+
+    def run(self):
+        return self.connection.timeout
+
+
 class PaillierABBTest(unittest.TestCase):
 
     def setUp(self):
@@ -51,6 +75,237 @@ class PaillierABBTest(unittest.TestCase):
             result, _ = eval.run([enc_x])
             self.assertEqual(result, x)
 
+    def test_dec_many(self):
+        xs = [self.abb.get_random_plaintext() for _ in range(self.test_runs)] + [0, 1]
+        eval = ProtocolRunner(self.trustees, DecManyProtocol)
+        result, _ = eval.run([[self.abb.enc(x) for x in xs]])
+        self.assertEqual(list(result), xs)
+        result, _ = eval.run([[]])
+        self.assertEqual(list(result), [])
+
+    def test_cipher_vector(self):
+        xs = [randint(100, 1000) for _ in range(self.test_runs)]
+        ys = [randint(0, 99) for _ in range(self.test_runs)]
+        vec_x = CipherVector.from_ciphers(self.abb, [self.abb.enc(x) for x in xs])
+        vec_y = CipherVector.from_ciphers(self.abb, {i: self.abb.enc(y) for i, y in enumerate(ys)})
+        eval = ProtocolRunner(self.trustees, DecManyProtocol)
+
+        result, _ = eval.run([list(vec_x + vec_y) + list(vec_x - vec_y) + list(3 * vec_y) + [vec_x.sum()]])
+        n = self.test_runs
+        self.assertEqual(list(result[:n]), [x + y for x, y in zip(xs, ys)])
+        self.assertEqual(list(result[n:2*n]), [x - y for x, y in zip(xs, ys)])
+        self.assertEqual(list(result[2*n:3*n]), [3 * y for y in ys])
+        self.assertEqual(result[3*n], sum(xs))
+
+        vec_y.accumulate(vec_x)
+        vec_y[0] += 1
+        result, _ = eval.run([vec_y.values()])
+        self.assertEqual(list(result), [x + y + (1 if i == 0 else 0) for i, (x, y) in enumerate(zip(xs, ys))])
+
+    def test_cipher_matrix(self):
+        rows = [[randint(0, 100) for _ in range(4)] for _ in range(3)]
+        matrix = CipherMatrix.zeros(self.abb, 3, 4)
+        matrix.accumulate([[self.abb.enc(x) for x in row] for row in rows])
+        matrix += CipherMatrix.from_ciphers(self.abb, [[self.abb.enc(x) for x in row] for row in rows])
+        eval = ProtocolRunner(self.trustees, DecManyProtocol)
+
+        result, _ = eval.run([[matrix[1][2]] + list(matrix.row_sums()) + list(matrix.col_sums())])
+        self.assertEqual(result[0], 2 * rows[1][2])
+        self.assertEqual(list(result[1:4]), [2 * sum(row) for row in rows])
+        self.assertEqual(list(result[4:]), [2 * sum(col) for col in zip(*rows)])
+
+    def test_linear_combination(self):
+        xs = [randint(0, 1000) for _ in range(6)]
+        weights = [1, -1, 2, -3, 0, self.abb.pk.n - 5]
+        enc_xs = [self.abb.enc(x) for x in xs[:5]] + [xs[5]]
+        result = self.abb.linear_combination(enc_xs, weights, 7)
+        eval = ProtocolRunner(self.trustees, DecProtocol)
+        z, _ = eval.run([result])
+        self.assertEqual(z, (sum(w * x for w, x in zip(weights, xs)) + 7) % self.abb.pk.n)
+
+    def test_lazy_mode(self):
+        for t in self.trustees:
+            t.abb.set_lazy(True)
+        x, y = randint(0, 1000), randint(0, 1000)
+        x_ = self.abb.enc(x)
+        y_ = self.abb.enc(y)
+        z_ = (x_ * 3 - y_) * 2 + x_ + 5
+        self.assertIsInstance(z_, LazyPaillierCiphertext)
+        self.assertEqual(len(z_.terms), 2)
+        eval = ProtocolRunner(self.trustees, DecProtocol)
+        z, _ = eval.run([z_])
+        self.assertEqual(z, (7 * x - 2 * y + 5) % self.abb.pk.n)
+
+        # lazy ciphertexts are sent as plain ones
+        lazy = (x_ - y_) * 3
+        for loaded in [pickle.loads(pickle.dumps(lazy)), decode_message(encode_frame(lazy)[4:])]:
+            self.assertIs(type(loaded), PaillierCiphertext)
+            self.assertEqual(loaded, PaillierCiphertext(self.abb, lazy.val))
+
+        for _ in range(3):
+            x = randint(0, 2**self.bits-1)
+            y = randint(0, 2**self.bits-1)
+            self._test_eq(x, y)
+            self._test_gt(x, y)
+            self._test_mul(x, y)
+
+    def test_safe_prime_generation(self):
+        q0 = mpz(2**100 + 1)
+        for k in sieve_safe_prime_candidates(q0):
+            q = q0 + 2 * k
+            self.assertTrue(all(q % s != 0 and (2 * q + 1) % s != 0 for s in SIEVE_PRIMES))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # the generated primes must not end up in the data directory of the repository
+            primes = PrimeStorage()
+            primes.dataPath = tmp
+            (p, q) = primes.generate_safe_prime(64)
+            self.assertEqual(p.bit_length(), 64)
+            self.assertTrue(p == 2 * q + 1 and is_prime(p) and is_prime(q))
+
+            reported = []
+            self.assertEqual(primes.generateSafePrimes(64, 2, processes=2, progress=lambda *args: reported.append(args)), 2)
+            self.assertEqual(len(set(primes.getPrimes(64))), 2)
+            self.assertEqual(reported[-1][:2], (2, 2))
+
+            cancel = Event()
+            cancel.set()
+            self.assertEqual(primes.generateSafePrimes(64, 2, processes=2, cancel=cancel), 0)
+
+    def test_local_connector(self):
+        # a is the connector of trustee 0 to trustee 1, b the one of trustee 1 to trustee 0
+        a, b = LocalConnector(1), LocalConnector(0)
+        a.connect(b)
+        b.connect(a)
+        for i in range(3):
+            a.send(i)
+        self.assertEqual([b.receive(0.1) for _ in range(3)], [0, 1, 2])
+        with self.assertRaises(TimeoutError):
+            b.receive(0.01)
+
+        channel = Channel(1, [b], timeout=0.01, run_id=1)
+        # the message of an earlier run is dropped
+        a.send((0, 'w'))
+        a.send((1, 'x'))
+        self.assertEqual(channel.broadcast_and_receive('y'), [(0, 'x'), (1, 'y')])
+        self.assertEqual(a.receive(0.1), (1, 'y'))
+        with self.assertRaises(TimeoutError):
+            channel.broadcast_and_receive('z')
+
+    def test_round_timeout(self):
+        class SlowProtocol(Protocol):
+            def run(self):
+                if self.abb.sk.index == 1:
+                    time.sleep(0.5)
+                return self.broadcast_and_receive(1)
+
+        for trustee in self.trustees:
+            trustee.set_timeout(0.1)
+        futures = [trustee.run_protocol(SlowProtocol()) for trustee in self.trustees]
+        # the trustee with key share 1 is late, the others don't wait for it
+        results = [future.result() for future in futures]
+        self.assertEqual(results.count('Abort.'), len(self.trustees) - 1)
+        # the late messages of the aborted run don't disturb the next one
+        enc_x = self.abb.enc(3)
+        futures = [trustee.run_protocol(DecProtocol(), enc_x) for trustee in self.trustees]
+        self.assertEqual([future.result() for future in futures], [3] * len(self.trustees))
+
+    def test_trustee_worker(self):
+        class FailingProtocol(Protocol):
+            def run(self):
+                raise ValueError('failed on purpose')
+
+        result, _ = ProtocolRunner(self.trustees, FailingProtocol).run([])
+        self.assertEqual(result, 'Abort.')
+        worker = self.trustees[0].worker
+        # the worker survives the abort and runs the next protocol
+        result, _ = ProtocolRunner(self.trustees, DecProtocol).run([self.abb.enc(3)])
+        self.assertEqual(result, 3)
+        self.assertIs(self.trustees[0].worker, worker)
+        for trustee in self.trustees:
+            trustee.stop_worker()
+            self.assertIsNone(trustee.worker)
+
+    def test_worker_ends_with_trustee(self):
+        trustees = PaillierABB.gen_trustees(self.bits_key, 3, 2, SubLinearProtocolSuite)
+        result, _ = ProtocolRunner(trustees, DecProtocol).run([trustees[0].abb.enc(3)])
+        self.assertEqual(result, 3)
+        workers = [trustee.worker for trustee in trustees]
+        del trustees, result, _
+        gc.collect()
+        for worker in workers:
+            worker.join(5)
+            self.assertFalse(worker.is_alive())
+
+    def test_process_trustees(self):
+        trustees = PaillierABB.gen_trustees(self.bits_key, 3, 2, SubLinearProtocolSuite, processes=True)
+        try:
+            abb = trustees[0].abb
+            result, _ = ProtocolRunner(trustees, MulDecProtocol).run([abb.enc(3), abb.enc(5)])
+            self.assertEqual(result, 15)
+            result, _ = ProtocolRunner(trustees, GtDecProtocol).run([abb.enc(2), abb.enc(3), self.bits])
+            self.assertEqual(result, 0)
+            # the operations of the trustee processes are counted by the trustees of this process
+            self.assertEqual(abb.op_logger.get_count_gt_operations(), {self.bits: 1})
+            self.assertGreater(abb.op_logger.get_count_dec_operations(), 0)
+
+            # the timeout of the rounds is set in the trustee processes
+            for trustee in trustees:
+                trustee.set_timeout(5)
+            result, _ = ProtocolRunner(trustees, TimeoutProtocol).run([])
+            self.assertEqual(result, 5)
+        finally:
+            for trustee in trustees:
+                trustee.shutdown()
+        self.assertFalse(any(trustee.process.is_alive() for trustee in trustees))
+
+    def test_tcp_trustees(self):
+        trustees = [Trustee(t.abb, t.id) for t in self.trustees]
+        addresses = {t.id: t.listen('127.0.0.1') for t in trustees}
+        for trustee in trustees:
+            trustee.connect_tcp(addresses, timeout=5)
+            trustee.set_timeout(10)
+        try:
+            result, _ = ProtocolRunner(trustees, MulDecProtocol).run([self.abb.enc(3), self.abb.enc(5)])
+            self.assertEqual(result, 15)
+
+            # the trustees reconnect and messages sent in between are delivered
+            trustees[1].connections[0].disconnect()
+            trustees[0].connections[2].disconnect()
+            result, _ = ProtocolRunner(trustees, GtDecProtocol).run([self.abb.enc(2), self.abb.enc(1), self.bits])
+            self.assertEqual(result, 1)
+        finally:
+            for trustee in trustees:
+                trustee.stop_worker()
+                trustee.close_connections()
+
+    def test_message_framing(self):
+        msg = ([self.abb.enc(i) for i in range(3)], {'x': mpz(2)**4000}, (1, 'a'))
+        frame = encode_frame(msg)
+        self.assertEqual(int.from_bytes(frame[:4], 'little'), len(frame) - 4)
+        decoded = decode_message(frame[4:])
+        self.assertEqual([c.val for c in decoded[0]], [c.val for c in msg[0]])
+        self.assertEqual(decoded[1:], msg[1:])
+        # messages can't create other objects
+        with self.assertRaises(Exception):
+            decode_message(encode_frame(Event())[4:])
+
+    def test_key_storage(self):
+        trustees = PaillierABB.load_trustees(self.bits_key, self.n_shares, self.threshold, SubLinearProtocolSuite)
+        trustees[0].abb.op_logger.log_dec()
+        self.assertIs(PaillierABB.load_trustees(self.bits_key, self.n_shares, self.threshold, SubLinearProtocolSuite), trustees)
+        self.assertEqual(trustees[0].abb.op_logger.get_count_dec_operations(), 0)
+        result, _ = ProtocolRunner(trustees, DecProtocol).run([trustees[0].abb.enc(42)])
+        self.assertEqual(result, 42)
+
+        storage = PaillierKeyStorage()
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = join(tmp, 'key.yaml')
+            storage.save(filename, self.abb.pk, [trustee.abb.sk for trustee in self.trustees])
+            pk, sks = storage.load(filename)
+        self.assertEqual(pk.n, self.abb.pk.n)
+        self.assertEqual([sk.key_share for sk in sks], [trustee.abb.sk.key_share for trustee in self.trustees])
+
     def test_zero(self):
         for _ in range(self.test_runs):
             x = 0
@@ -129,6 +384,120 @@ class PaillierABBTest(unittest.TestCase):
             z, _ = eval.run([z_])
             self.assertEqual(z, (x - y) % self.abb.pk.n)
 
+    def test_compact_ciphertext(self):
+        enc_x = self.abb.enc(3)
+        self.assertFalse(hasattr(enc_x, '__dict__'))
+        self.assertEqual(enc_x.ctx, self.abb.ctx_id)
+        # ciphertexts of a local abb with the same key are evaluated in the same context
+        local_abb = self.abb.create_local_abb()
+        self.assertTrue(ContextRegistry.same_context(local_abb.ctx_id, self.abb.ctx_id))
+        self.assertEqual(local_abb.enc_no_r(5), self.abb.enc_no_r(5))
+        # outside of protocols the abb which created a ciphertext evaluates its operations
+        self.assertIs(local_abb.enc(1).abb, local_abb)
+        self.assertIs(enc_x.abb, self.abb)
+        eval = ProtocolRunner(self.trustees, MulDecProtocol)
+        z, _ = eval.run([local_abb.enc(3), local_abb.enc(4)])
+        self.assertEqual(z, 12)
+
+    def test_enc_no_r_matches_modexp(self):
+        pk = self.abb.pk
+        for x in [0, 1, -1, 32, pk.CONST_CACHE_LIMIT + 1, self.abb.get_random_plaintext()]:
+            self.assertEqual(self.abb.enc_no_r(x).val, pow(pk.g, x % pk.n, pk.n_sq))
+        # cached constants do not change
+        self.assertEqual(self.abb.enc_no_r(-1).val, pow(pk.g, pk.n - 1, pk.n_sq))
+
+    def test_sub_from_const(self):
+        for _ in range(self.test_runs):
+            x = self.abb.get_random_plaintext()
+            y = self.abb.get_random_plaintext()
+            y_ = self.abb.enc(y)
+            z_ = x - y_
+            eval = ProtocolRunner(self.trustees, DecProtocol)
+            z, _ = eval.run([z_])
+            self.assertEqual(z, (x - y) % self.abb.pk.n)
+
+    def test_decryption_with_many_shares(self):
+        # n_shares! exceeds the precision of floating point numbers
+        pk, sks = PaillierABB.keygen(self.bits_key, 20, 15)
+        abb = PaillierABB(None, pk, 20, 15, None)
+        for _ in range(self.test_runs):
+            x = abb.get_random_plaintext()
+            result, _, _ = shared_decryption(sks, abb.enc(x))
+            self.assertEqual(result, x)
+
+    def test_dealer_context(self):
+        pk, sks, dealer = PaillierABB.dealer_keygen(self.bits_key, self.n_shares, self.threshold)
+        abb = PaillierABB(None, pk, self.n_shares, self.threshold, None)
+        abb.set_dealer(dealer)
+        for _ in range(self.test_runs):
+            r, r_n = dealer.get_randomizer()
+            self.assertEqual(r_n, pow(r, pk.n, pk.n_sq))
+            x = abb.get_random_plaintext()
+            result, _, _ = shared_decryption(sks, abb.enc(x))
+            self.assertEqual(result, x)
+        dealer.wipe()
+        self.assertFalse(dealer.is_active())
+        # after wiping, randomizers are generated without the factorization
+        x = abb.get_random_plaintext()
+        result, _, _ = shared_decryption(sks, abb.enc(x))
+        self.assertEqual(result, x)
+
+    def test_preprocessing_during_setup(self):
+        trustees = PaillierABB.gen_trustees(self.bits_key, self.n_shares, self.threshold, SubLinearProtocolSuite, preprocess_bits=[self.bits])
+        abb = trustees[0].abb
+        self.assertIsNone(abb.dealer)
+        eval = ProtocolRunner(trustees, GtDecProtocol)
+        z, _ = eval.run([abb.enc(3), abb.enc(1), self.bits])
+        self.assertEqual(z, 1)
+
+    def test_randomizer_pool(self):
+        pool = RandomizerPool(self.abb.pk, low_watermark=2, high_watermark=5)
+        pool.fill()
+        self.assertEqual(len(pool), 5)
+        abb = self.abb.create_local_abb()
+        abb.set_randomizer_pool(pool)
+        # the last encryptions are done after the pool ran dry
+        for _ in range(self.test_runs):
+            x = abb.get_random_plaintext()
+            enc_x = abb.enc(x)
+            eval = ProtocolRunner(self.trustees, DecProtocol)
+            result, _ = eval.run([enc_x])
+            self.assertEqual(result, x)
+        self.assertEqual(len(pool), 0)
+
+    def test_randomizer_pool_persistence(self):
+        with tempfile.TemporaryDirectory() as data_path:
+            pool = RandomizerPool(self.abb.pk, low_watermark=1, high_watermark=3)
+            pool.data_path = data_path
+            pool.fill()
+            randomizers = list(pool.randomizers)
+            pool.save()
+            self.assertEqual(len(pool), 0)
+
+            loaded_pool = RandomizerPool(self.abb.pk)
+            loaded_pool.data_path = data_path
+            self.assertEqual(loaded_pool.load(), 3)
+            self.assertEqual(list(loaded_pool.randomizers), randomizers)
+            # stored randomizers are handed out only once
+            second_pool = RandomizerPool(self.abb.pk)
+            second_pool.data_path = data_path
+            self.assertEqual(second_pool.load(), 0)
+
+    def test_randomizer_pool_worker(self):
+        pool = RandomizerPool(self.abb.pk, low_watermark=4, high_watermark=8)
+        pool.start_worker()
+        deadline = time.time() + 10
+        while len(pool) < 8 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(pool), 8)
+        for _ in range(5):
+            self.assertIsNotNone(pool.pop())
+        deadline = time.time() + 10
+        while len(pool) < 8 and time.time() < deadline:
+            time.sleep(0.01)
+        pool.stop_worker()
+        self.assertEqual(len(pool), 8)
+
     def test_eq_0_0(self):
         self._test_eq(0, 0)
 
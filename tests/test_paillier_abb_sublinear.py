@@ -1,16 +1,29 @@
 import json
 import logging
 import math
+import shutil
+import tempfile
 import time
 import unittest
+from os.path import basename, join
 from random import randint
 
 from src.crypto.paillier_abb import PaillierABB
 from src.election.trustee import init_trustees
-from src.protocols.protocol import (DecProtocol, EqDecProtocol, GtDecProtocol,
-                                    MulDecProtocol, Protocol)
-from src.protocols.sublinear import SubLinearProtocolSuite
+from src.protocols.protocol import (DecProtocol, EqDecProtocol,
+                                    EqManyDecProtocol, GtDecProtocol,
+                                    GtManyDecProtocol, MulDecProtocol,
+                                    MulManyDecProtocol, Protocol)
+from src.protocols.async_protocol import AsyncDuelsDecProtocol, AsyncProtocol
+from src.protocols.preprocessing_pool import PreprocessingPool
+from src.protocols.sublinear import (BatchVerifyCorrectMulProtocol, EqStorage,
+                                     GtStorage, MulMaterialGenerator,
+                                     ProofCorrectMulProtocol, SublinearStorage,
+                                     SubLinearProtocolSuite, get_mul_count,
+                                     get_mul_material, get_tuple_counts)
+from src.util.binary_store import BinaryStore
 from src.util.logging import setup_logging
+from src.util.primes import PrimeStorage
 from src.util.protocol_runner import ProtocolRunner
 
 log = logging.getLogger(__name__)
@@ -129,6 +142,132 @@ class PlainABBSublinearTest(unittest.TestCase):
             z, _ = eval.run([z_])
             self.assertEqual(z, (x - y) % self.abb.pk.n)
 
+    def test_storage_cache(self):
+        data = EqStorage(self.abb).get_data(self.bits)
+        # every trustee gets the same cached data
+        self.assertIs(EqStorage(self.trustees[1].abb).get_data(self.bits), data)
+        self.assertIsNot(GtStorage(self.abb).get_data(self.bits), data)
+
+        SublinearStorage.invalidate(self.abb, self.bits)
+        reloaded = EqStorage(self.abb).get_data(self.bits)
+        self.assertIsNot(reloaded, data)
+        self.assertEqual(reloaded['enc_r'], data['enc_r'])
+        self.assertIsNot(EqStorage(self.abb).reload(self.bits), reloaded)
+        self._test_eq(1, 1)
+
+    def test_binary_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = join(tmp, 'store.bin')
+            store = BinaryStore(filename)
+            self.assertEqual(store.get(7, 2), None)
+            store.append(7, 2, [[1, 2**70], [3]])
+            store.append(7, 2, [[4, 5], []])
+            store.append(2**80, 1, [[0]])
+            self.assertEqual(store.get(7, 2), [[1, 2**70], [3]])
+            self.assertEqual(store.get_all(7, 2)[1], [[4, 5], []])
+            self.assertEqual(BinaryStore(filename).keys(), [(7, 2), (2**80, 1)])
+            self.assertRaises(ValueError, store.append, 7, 2, [[-1]])
+
+            # an incomplete record at the end is ignored
+            with open(filename, 'ab') as f:
+                f.write(b'\x01\x00')
+            self.assertEqual(len(BinaryStore(filename)), 3)
+
+    def test_storage_migration(self):
+        yaml_filename = EqStorage(self.abb)._get_yaml_filename(self.abb.pk.bits, self.bits)
+        with tempfile.TemporaryDirectory() as tmp:
+            copy = join(tmp, basename(yaml_filename))
+            shutil.copy(yaml_filename, copy)
+            self.assertGreater(EqStorage.migrate_yaml_file(copy, self.abb.pk.bits, self.bits), 0)
+            self.assertEqual(EqStorage.migrate_yaml_file(copy, self.abb.pk.bits, self.bits), 0)
+
+            groups = BinaryStore.open(join(tmp, '{}K.bin'.format(self.abb.pk.bits))).get(self.abb.pk.n, self.bits)
+            storage = EqStorage(self.abb)
+            migrated = storage._recreate_data(EqStorage.from_groups(groups))
+            stored = storage._recreate_data(storage._load_data_file(yaml_filename)[str(self.abb.pk.n)])
+            self.assertEqual(migrated['enc_bits_r'], stored['enc_bits_r'])
+            self.assertEqual(migrated['poly_coeffs'], stored['poly_coeffs'])
+
+            primes = PrimeStorage()
+            stored_primes = primes.getPrimes(self.bits_key // 2)
+            shutil.copy(primes.getYamlFileName(self.bits_key // 2), tmp)
+            primes.dataPath = tmp
+            self.assertEqual(primes.migrate(self.bits_key // 2), len(stored_primes))
+            self.assertEqual(primes.getPrimes(self.bits_key // 2), stored_primes)
+
+    def test_batch_verification(self):
+        for batch in [False, True]:
+            for trustee in self.trustees:
+                trustee.abb.prot_suite.set_batch_verification(batch)
+            self._test_mul(3, 5)
+
+        prover = ProofCorrectMulProtocol()
+        prover.set_abb(self.abb)
+        statements = []
+        for x in range(6):
+            material = MulMaterialGenerator(self.abb).generate_tuple()
+            enc_y = self.abb.enc(x)
+            enc_z = enc_y * material['d']
+            proof = prover.run(enc_y, material['enc_d'], enc_z, material['d'], material['r'], 1, material)
+            statements.append((enc_y, material['enc_d'], enc_z) + proof)
+        verifier = BatchVerifyCorrectMulProtocol()
+        verifier.set_abb(self.abb)
+        self.assertEqual(verifier.run(statements), [])
+
+        # a wrong response of the fifth proof
+        ann, c, (d, e, f) = statements[4][3:]
+        statements[4] = statements[4][:3] + (ann, c, (d + 1, e, f))
+        self.assertEqual(verifier.run(statements), [4])
+
+    def test_mul_material_pools(self):
+        self.assertEqual(get_mul_count({2: 3}, {4: 2}, 1), 1 + 3 + 2 * 5)
+        count = get_mul_count({self.bits: 2}, {}, 1)
+        pools = [trustee.abb.prot_suite.create_mul_material_pool(count) for trustee in self.trustees]
+        # an abb without key share generates its material inline
+        self.assertIn('enc_d', get_mul_material(self.abb.create_local_abb()))
+        try:
+            self._test_mul(3, 5)
+            for x, y in [(0, 1), (2, 2)]:
+                self._test_eq(x, y)
+            for pool in pools:
+                metrics = pool.get_metrics()
+                self.assertEqual(metrics['used'], count)
+                self.assertEqual(metrics['generated_inline'], 0)
+        finally:
+            for pool in pools:
+                PreprocessingPool.unregister(pool)
+
+    def test_preprocessing_pools(self):
+        self.assertEqual(get_tuple_counts({2: 3}, {4: 2}), {('eq', 2): 5, ('eq', 1): 2, ('gt', 4): 2, ('gt', 2): 2})
+        pools = self.abb.prot_suite.create_preprocessing_pools(self.abb, {self.bits: 3}, {self.bits: 2})
+        try:
+            for x, y in [(0, 1), (1, 1), (3, 2)]:
+                self._test_eq(x, y)
+            for x, y in [(2, 1), (1, 3)]:
+                self._test_gt(x, y)
+            for pool in pools:
+                metrics = pool.get_metrics()
+                # every trustee used each tuple exactly once
+                self.assertEqual(metrics['generated'], metrics['used'])
+                self.assertEqual(metrics['generated_inline'], 0)
+                self.assertEqual(metrics['stored'], 0)
+                self.assertEqual(metrics['depth'], 0)
+
+            # the worker refills the blocking pool of eq
+            eq_pool = pools[1]
+            self.assertEqual((eq_pool.storage.PROT, eq_pool.bits_int), ('eq', self.bits))
+            eq_pool.low_watermark = 1
+            eq_pool.high_watermark = 2
+            eq_pool.start_worker()
+            for _ in range(3):
+                self._test_eq(1, 0)
+            eq_pool.stop_worker()
+            self.assertEqual(eq_pool.get_metrics()['generated_inline'], 0)
+        finally:
+            for pool in pools:
+                pool.stop_worker()
+                PreprocessingPool.unregister(pool)
+
     def test_eq_0_0(self):
         self._test_eq(0, 0)
 
@@ -147,6 +286,69 @@ class PlainABBSublinearTest(unittest.TestCase):
             y = randint(0, 2**self.bits-1)
             self._test_eq(x, y)
 
+    def test_eq_many(self):
+        xs = [randint(0, 2**self.bits-1) for _ in range(self.test_runs)] + [0, 3]
+        ys = [randint(0, 2**self.bits-1) for _ in range(self.test_runs)] + [0, 3]
+        pairs = [(self.abb.enc(x), self.abb.enc(y)) for x, y in zip(xs, ys)]
+        eval = ProtocolRunner(self.trustees, EqManyDecProtocol)
+        z, _ = eval.run([pairs, self.bits])
+        self.assertEqual(z, [int(x == y) for x, y in zip(xs, ys)])
+        self.assertEqual(self.trustees[0].abb.op_logger.get_count_eq_operations()[self.bits], len(pairs))
+
+    def test_gt_many(self):
+        xs = [randint(0, 2**self.bits-1) for _ in range(self.test_runs)] + [0, 3]
+        ys = [randint(0, 2**self.bits-1) for _ in range(self.test_runs)] + [0, 2]
+        pairs = [(self.abb.enc(x), self.abb.enc(y)) for x, y in zip(xs, ys)]
+        eval = ProtocolRunner(self.trustees, GtManyDecProtocol)
+        z, _ = eval.run([pairs, self.bits])
+        self.assertEqual(z, [int(x >= y) for x, y in zip(xs, ys)])
+        self.assertEqual(self.trustees[0].abb.op_logger.get_count_gt_operations()[self.bits], len(pairs))
+
+    def test_odd_bit_widths(self):
+        self.assertEqual([self.abb.get_bits_for_size(x) for x in [0, 1, 2, 16, 17, 31]], [1, 1, 2, 5, 5, 5])
+        self.assertEqual(get_tuple_counts({}, {5: 1}),
+                         {('gt', 5): 1, ('eq', 3): 1, ('gt', 3): 1, ('eq', 2): 1, ('gt', 2): 1, ('eq', 1): 1})
+        for bits in [3, 5]:
+            xs = [randint(0, 2**bits-1) for _ in range(self.test_runs)] + [2**bits-1, 0, 2**bits-1, 2**(bits-1)]
+            ys = [randint(0, 2**bits-1) for _ in range(self.test_runs)] + [0, 2**bits-1, 2**bits-1, 2**(bits-1)-1]
+            pairs = [(self.abb.enc(x), self.abb.enc(y)) for x, y in zip(xs, ys)]
+            z, _ = ProtocolRunner(self.trustees, GtManyDecProtocol).run([pairs, bits])
+            self.assertEqual(z, [int(x >= y) for x, y in zip(xs, ys)])
+            z, _ = ProtocolRunner(self.trustees, EqManyDecProtocol).run([pairs, bits])
+            self.assertEqual(z, [int(x == y) for x, y in zip(xs, ys)])
+        n = self.test_runs + 4
+        savings = self.trustees[0].abb.op_logger.get_bit_savings()
+        self.assertEqual(savings, {'eq': ((3 + 5) * n, (4 + 8) * n), 'gt': ((3 + 5) * n, (4 + 8) * n)})
+
+    def test_mul_many(self):
+        xs = [randint(0, 2**16) for _ in range(self.test_runs)]
+        ys = [randint(0, 2**16) for _ in range(self.test_runs)]
+        enc_xs = [self.abb.enc(x) for x in xs]
+        enc_ys = [self.abb.enc(y) for y in ys[:-1]] + [ys[-1]]
+        eval = ProtocolRunner(self.trustees, MulManyDecProtocol)
+        z, _ = eval.run([enc_xs, enc_ys])
+        self.assertEqual(z, [(x * y) % self.abb.pk.n for x, y in zip(xs, ys)])
+        self.assertEqual(self.trustees[0].abb.op_logger.get_count_mul_operations(), self.test_runs - 1)
+
+    def test_async_protocols(self):
+        rounds = []
+        for n in [1, self.test_runs]:
+            xs = [randint(0, 2**self.bits-1) for _ in range(n)]
+            ys = [randint(0, 2**self.bits-1) for _ in range(n)]
+            pairs = [(self.abb.enc(x), self.abb.enc(y)) for x, y in zip(xs, ys)]
+            z, _ = ProtocolRunner(self.trustees, AsyncDuelsDecProtocol).run([pairs, self.bits])
+            self.assertEqual(z, [[int(x >= y), int(x == y)] for x, y in zip(xs, ys)])
+            rounds.append(self.abb.prot_suite.connection.rounds)
+        # the messages of concurrent comparisons are merged, a tick may split when messages arrive one by one
+        self.assertLess(rounds[1], 2 * rounds[0])
+
+        class MulProtocol(AsyncProtocol):
+            async def run(self, enc_x, enc_y):
+                return await self.dec(await self.mul(enc_x, enc_y))
+
+        z, _ = ProtocolRunner(self.trustees, MulProtocol).run([self.abb.enc(6), self.abb.enc(7)])
+        self.assertEqual(z, 42)
+
     def test_gt_0_0(self):
         self._test_gt(0, 0)
 